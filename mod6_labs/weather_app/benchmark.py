@@ -0,0 +1,606 @@
+"""Performance benchmarks for the Weather App.
+
+All benchmarks run against the local stand-in server in mock_server.py,
+so no API key or network access is needed.
+
+Usage:
+    python benchmark.py load [--concurrency 1,8,32,128] [--requests N]
+                             [--latency lognormal:0.02,0.5] [--error-rate R]
+                             [--payload-bytes B]
+    python benchmark.py client [--requests N]
+    python benchmark.py gazetteer [--cities N | --source FILE]
+    python benchmark.py snapshot [--entries N]
+    python benchmark.py metrics [--requests N] [--format json|prometheus]
+    python benchmark.py startup [--runs N] [--top N] [--budget-ms MS]
+    python benchmark.py forecast [--cities N] [--days D]
+    python benchmark.py render [--searches N]
+    python benchmark.py history [--searches N] [--entries N]
+    python benchmark.py observations [--rows N] [--cities N] [--queries N]
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import os
+import random
+import statistics
+import string
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+import httpx
+import numpy as np
+
+from config import Config
+from forecast import Forecast, ForecastTable
+from gazetteer import Gazetteer, build_index, read_source
+from history import SearchHistory
+from history_store import HistoryStore
+from metrics import Metrics
+import mock_server
+from mock_server import MockWeatherServer, make_forecast_payload, make_payload
+from models import WeatherSnapshot, orjson
+from observation_store import DAY, ObservationStore
+from weather_service import WeatherService, WeatherServiceError
+
+
+def percentile(ordered: List[float], p: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    rank = max(1, math.ceil(p / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def report(label: str, samples: List[float]):
+    """Print mean/median/p95 for a list of per-request timings in seconds."""
+    p95 = percentile(sorted(samples), 95)
+    print(
+        f"{label:<28} mean {statistics.mean(samples) * 1000:7.3f} ms"
+        f"   p50 {statistics.median(samples) * 1000:7.3f} ms"
+        f"   p95 {p95 * 1000:7.3f} ms"
+    )
+
+
+async def time_calls(call: Callable, n: int) -> List[float]:
+    """Await ``call()`` n times sequentially and return each duration."""
+    samples = []
+    for _ in range(n):
+        start = time.perf_counter()
+        await call()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def parse_latency(spec: str) -> mock_server.Latency:
+    """Turn "fixed:0.01", "uniform:0.005,0.05" or "lognormal:0.02,0.5" into a model."""
+    if spec in ("", "none"):
+        return None
+    name, _, args = spec.partition(":")
+    models = {
+        "fixed": mock_server.fixed,
+        "uniform": mock_server.uniform,
+        "lognormal": mock_server.lognormal,
+    }
+    if name not in models:
+        raise argparse.ArgumentTypeError(f"unknown latency model: {name}")
+    return models[name](*(float(arg) for arg in args.split(",") if arg))
+
+
+async def run_load(service: WeatherService, cities: List[str], concurrency: int):
+    """
+    Look up every city with ``concurrency`` workers.
+
+    Returns:
+        (per-request latencies in seconds, error count, wall time)
+    """
+    latencies: List[float] = []
+    errors = 0
+    queue = iter(cities)
+
+    async def worker():
+        nonlocal errors
+        for city in queue:
+            start = time.perf_counter()
+            try:
+                await service.get_weather(city)
+            except WeatherServiceError:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - start
+
+
+async def bench_load(
+    levels: List[int], n: int, latency, error_rate: float, payload_bytes: int
+):
+    """Latency percentiles, throughput and allocations at fixed concurrency."""
+    Config.RATE_LIMIT_PER_MINUTE = 60_000_000  # measure the service, not the quota
+    server = MockWeatherServer(
+        latency=latency, error_rate=error_rate, payload_padding=payload_bytes, seed=1
+    )
+    with server:
+        print(
+            f"{n} uncached lookups per level, error rate {error_rate:.1%}, "
+            f"+{payload_bytes} B payload, pool {Config.MAX_CONNECTIONS} connections\n"
+        )
+        print(
+            f"{'conc':>5} {'errors':>7} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} "
+            f"{'p99 ms':>8} {'alloc KiB/req':>14}"
+        )
+        for run, concurrency in enumerate(levels):
+            async with WeatherService() as service:
+                service.base_url = server.url
+                cities = [f"Run {run} City {i}" for i in range(n)]
+                latencies, errors, wall = await run_load(service, cities, concurrency)
+
+                # Second, shorter pass under tracemalloc for allocation figures
+                sample = [f"Run {run} Alloc {i}" for i in range(min(n, 200))]
+                tracemalloc.start()
+                await run_load(service, sample, concurrency)
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+
+            ordered = sorted(latencies)
+            print(
+                f"{concurrency:>5} {errors:>7} {n / wall:>9.0f} "
+                f"{percentile(ordered, 50) * 1000:>8.2f} "
+                f"{percentile(ordered, 95) * 1000:>8.2f} "
+                f"{percentile(ordered, 99) * 1000:>8.2f} "
+                f"{peak / len(sample) / 1024:>14.1f}"
+            )
+
+
+async def bench_client(n: int):
+    """Per-request latency: a new AsyncClient per call vs. the pooled client."""
+    with MockWeatherServer() as server:
+        Config.BASE_URL = server.url
+        Config.RATE_LIMIT_PER_MINUTE = 60_000_000  # measure latency, not the quota
+        params = {"q": "London", "appid": Config.API_KEY, "units": Config.API_UNITS}
+
+        async def client_per_call():
+            # What get_weather did before the client was shared
+            async with httpx.AsyncClient(timeout=Config.TIMEOUT) as client:
+                response = await client.get(server.url, params=params)
+                response.json()
+
+        async with WeatherService() as service:
+            await service.get_weather("London")  # warm the pool
+            before = await time_calls(client_per_call, n)
+            # Bypass the response cache so every call goes over HTTP
+            after = await time_calls(lambda: service._fetch_city("London"), n)
+
+    print(f"{n} sequential lookups against {server.url}\n")
+    report("before: client per call", before)
+    report("after:  pooled client", after)
+    print(f"\nspeedup (mean): {statistics.mean(before) / statistics.mean(after):.1f}x")
+
+
+def write_synthetic_cities(path: Path, n: int):
+    """Write n random cities in the bundled gazetteer format."""
+    rng = random.Random(42)
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(n):
+            name = "".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 12)))
+            f.write(
+                f"{i}\t{name.title()}\tXX\t{rng.uniform(-90, 90):.4f}\t"
+                f"{rng.uniform(-180, 180):.4f}\t{rng.randint(1000, 10**7)}\t\n"
+            )
+
+
+def measure(label: str, func):
+    """Run func once, printing wall time and peak Python allocations."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<28} {elapsed * 1000:9.2f} ms   peak {peak / 1024:9.1f} KiB")
+    return result
+
+
+def bench_gazetteer(n: int, source: str = None):
+    """Cold-load time and memory of the mmap index vs. a dict of all cities."""
+    with tempfile.TemporaryDirectory() as tmp:
+        if source is None:
+            source = Path(tmp) / "cities.tsv"
+            write_synthetic_cities(source, n)
+        index = Path(tmp) / "cities.idx"
+
+        keys = measure("build index", lambda: build_index(source, index))
+        print(f"{keys} keys, index file {index.stat().st_size / 1024:.0f} KiB\n")
+
+        gazetteer = measure("cold open (mmap)", lambda: Gazetteer(index))
+        measure("load dict from source", lambda: dict(read_source(source)))
+
+        names = [city.name for _, city in read_source(source)][:1000]
+        start = time.perf_counter()
+        for name in names:
+            gazetteer.lookup(name)
+        per_lookup = (time.perf_counter() - start) / len(names)
+        start = time.perf_counter()
+        for name in names:
+            gazetteer.prefix(name[:3], limit=5)
+        per_prefix = (time.perf_counter() - start) / len(names)
+        print(f"\nlookup  {per_lookup * 1e6:7.1f} us   prefix(5) {per_prefix * 1e6:7.1f} us")
+        gazetteer.close()
+
+
+def bench_snapshot(n: int):
+    """Memory per cached entry and parse time: raw dict vs. WeatherSnapshot."""
+    bodies = [
+        json.dumps(make_payload(f"City {i}")).encode("utf-8") for i in range(n)
+    ]
+    variants = [
+        ("dict (json)", json.loads),
+        ("snapshot (json)", lambda body: WeatherSnapshot.from_api(json.loads(body))),
+    ]
+    if orjson is not None:
+        variants += [
+            ("dict (orjson)", orjson.loads),
+            ("snapshot (orjson)", lambda body: WeatherSnapshot.from_api(orjson.loads(body))),
+        ]
+
+    print(f"{n} cached responses\n")
+    for label, parse in variants:
+        start = time.perf_counter()
+        for body in bodies:
+            parse(body)
+        elapsed = time.perf_counter() - start
+
+        tracemalloc.start()
+        entries = [parse(body) for body in bodies]
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del entries
+        print(f"{label:<20} {size / n:6.0f} B/entry   {elapsed / n * 1e6:6.2f} us/parse")
+
+
+async def bench_metrics(n: int, output: str):
+    """Instrumentation overhead on cached and uncached lookups, then a dump."""
+    Config.RATE_LIMIT_PER_MINUTE = 60_000_000  # measure the service, not the quota
+    metrics = Metrics()
+    with MockWeatherServer() as server:
+        print(f"{n} sequential lookups per row\n")
+        for label, registry in (("disabled", None), ("enabled", metrics)):
+            async with WeatherService(metrics=registry) as service:
+                service.base_url = server.url
+                cities = iter(f"{label} City {i}" for i in range(n))
+                uncached = await time_calls(lambda: service.get_weather(next(cities)), n)
+                cached = await time_calls(lambda: service.get_weather("London"), n)
+            report(f"uncached, metrics {label}", uncached)
+            report(f"cached, metrics {label}", cached)
+
+    print()
+    print(metrics.to_prometheus() if output == "prometheus" else metrics.to_json())
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int, int]]:
+    """Parse ``-X importtime`` output into (module, depth, self us, cumulative us)."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+    return rows
+
+
+def bench_startup(runs: int, top: int, budget_ms: float = None):
+    """Import cost of main.py and time to the first frame in a fresh process."""
+    app_dir = Path(__file__).resolve().parent
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=app_dir, capture_output=True, text=True,
+    )
+    rows = parse_importtime(result.stderr)
+    total = next(cumulative for name, depth, _, cumulative in rows if name == "main")
+    direct = [row for row in rows if row[1] == 1]  # main and interpreter startup
+    print(f"import main: {total / 1000:.1f} ms\n")
+    print(f"{'top-level imports':<28} {'cumulative ms':>14}")
+    for name, _, _, cumulative in sorted(direct, key=lambda row: -row[3]):
+        print(f"{name:<28} {cumulative / 1000:>14.1f}")
+    print(f"\n{'slowest modules (self)':<28} {'self ms':>14}")
+    for name, _, self_us, _ in sorted(rows, key=lambda row: -row[2])[:top]:
+        print(f"{name:<28} {self_us / 1000:>14.1f}")
+
+    samples = []
+    for _ in range(runs):
+        started = time.time()
+        child = subprocess.run(
+            [sys.executable, "headless.py", str(started)],
+            cwd=app_dir, capture_output=True, text=True, check=True,
+        )
+        samples.append(json.loads(child.stdout.strip().splitlines()[-1]))
+    first_frame = statistics.median(s["first_frame_ms"] for s in samples)
+    ready = statistics.median(s["ready_ms"] for s in samples)
+    print(f"\nmedian of {runs} cold starts (from process launch)")
+    print(f"first frame    {first_frame:8.1f} ms")
+    print(f"services ready {ready:8.1f} ms")
+    deferred = samples[0]["imported_by_main"]
+    if deferred:
+        print(f"imported before first frame but meant to be deferred: {', '.join(deferred)}")
+    if budget_ms is not None and first_frame > budget_ms:
+        raise SystemExit(f"first frame {first_frame:.1f} ms exceeds budget {budget_ms:.1f} ms")
+
+
+def daily_from_dicts(entries: List[dict], timezone: int) -> List[tuple]:
+    """Daily min/max/mean over a list of forecast dicts, one point at a time."""
+    days = {}
+    for entry in entries:
+        day = (entry["dt"] + timezone) // 86400
+        days.setdefault(day, []).append(entry["main"]["temp"])
+    return [(day, min(t), max(t), sum(t) / len(t)) for day, t in sorted(days.items())]
+
+
+def time_best(func, repeat: int = 5) -> float:
+    """Best of ``repeat`` wall times for func(), in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_forecast(cities: int, days: int):
+    """Memory and aggregation time: lists of dicts vs. NumPy columns."""
+    points = days * 8  # 3-hourly
+    bodies = [
+        json.dumps(make_forecast_payload(f"City {i}", points, start=1700000000 + i * 60))
+        for i in range(cities)
+    ]
+    print(f"{cities} cities x {days} days x 3-hourly = {cities * points:,} points\n")
+
+    tracemalloc.start()
+    as_dicts = [json.loads(body)["list"] for body in bodies]
+    dict_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    forecasts = [Forecast.from_api(json.loads(body), units="metric") for body in bodies]
+    column_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    table = ForecastTable(forecasts)
+
+    print(f"{'storage':<28} {'KiB':>10} {'B/point':>9}")
+    print(f"{'list of dicts':<28} {dict_bytes / 1024:>10.0f} {dict_bytes / (cities * points):>9.0f}")
+    print(f"{'Forecast per city':<28} {column_bytes / 1024:>10.0f} {column_bytes / (cities * points):>9.0f}")
+    print(f"{'ForecastTable arrays':<28} {table.nbytes / 1024:>10.0f} {table.nbytes / (cities * points):>9.1f}")
+
+    rows = [
+        ("daily, dict loop", lambda: [daily_from_dicts(e, 0) for e in as_dicts]),
+        ("daily, per Forecast", lambda: [f.daily() for f in forecasts]),
+        ("daily, ForecastTable", table.daily),
+        ("to imperial, dict loop", lambda: [
+            [e["main"]["temp"] * 9 / 5 + 32 for e in entries] for entries in as_dicts
+        ]),
+        ("to imperial, ForecastTable", lambda: table.converted("imperial")),
+        ("24h trends, ForecastTable", table.trends),
+        ("build ForecastTable", lambda: ForecastTable(forecasts)),
+    ]
+    print(f"\n{'operation (all cities)':<28} {'ms':>10}")
+    for label, func in rows:
+        print(f"{label:<28} {time_best(func) * 1000:>10.2f}")
+
+    # The vectorized path must agree with the straightforward one
+    daily = table.daily().for_city(0)
+    expected = daily_from_dicts(as_dicts[0], 0)
+    assert np.allclose(daily.temp_max, [row[2] for row in expected])
+
+
+async def bench_render(searches: int):
+    """Page updates and serialized diff bytes per search, on a headless page."""
+    import main as app_main
+    from headless import headless_page
+
+    Config.load()
+    Config.API_KEY = Config.API_KEY or "benchmark"
+    Config.ICON_PREFETCH = False
+    cities = ["London", "Paris", "Tokyo", "Lima", "Oslo"]
+    workdir = os.getcwd()
+    with MockWeatherServer() as server, tempfile.TemporaryDirectory() as directory:
+        Config.BASE_URL, Config.FORECAST_URL = server.url, server.forecast_url
+        Config.ICON_URL = server.icon_url
+        os.chdir(directory)  # history, cache and icon files
+        try:
+            page, connection = headless_page()
+            app = await asyncio.to_thread(app_main.WeatherApp, page)
+            await app.ready.wait()
+            rows = []
+            for i in range(searches):
+                app.city_input.value = cities[i % len(cities)]
+                connection.reset()
+                await app.get_weather()
+                if app.forecast_task is not None:
+                    await asyncio.wrap_future(app.forecast_task)
+                rows.append((len(connection.batches), connection.bytes_sent))
+            await app.on_shutdown(None)
+        finally:
+            os.chdir(workdir)
+
+    first, repeat = rows[: len(cities)], rows[len(cities):] or rows
+    print(f"{searches} searches over {len(cities)} cities (weather card + forecast strip)\n")
+    print(f"{'':<16} {'updates/search':>15} {'bytes/search':>13}")
+    for label, sample in (("first lookup", first), ("repeat lookup", repeat)):
+        updates = statistics.mean(count for count, _ in sample)
+        size = statistics.mean(size for _, size in sample)
+        print(f"{label:<16} {updates:>15.1f} {size:>13.0f}")
+
+
+def bench_history(searches: int, entries: int):
+    """A burst of searches: rewriting the file every time vs. SearchHistory + HistoryStore."""
+    history = [f"City {i}" for i in range(entries)]
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "search_history.json"
+
+        def rewrite(data):  # what save_history used to do on every search
+            with open(path, "w") as f:
+                json.dump(data, f)
+
+        started = time.perf_counter()
+        for i in range(searches):
+            history.insert(0, history.pop())
+            rewrite(list(history))
+        rewrite_ms = (time.perf_counter() - started) * 1000
+
+        store = HistoryStore(path)
+        ranked = SearchHistory.from_json(history)
+        started = time.perf_counter()
+        for i in range(searches):
+            ranked.record(history[i % entries])
+            store.save(ranked.to_json())
+        caller_ms = (time.perf_counter() - started) * 1000
+        started = time.perf_counter()
+        for i in range(searches):
+            ranked.top(Config.HISTORY_DROPDOWN_SIZE, prefix=f"City {i % 10}")
+        filter_us = (time.perf_counter() - started) / searches * 1e6
+        started = time.perf_counter()
+        store.close()
+        close_ms = (time.perf_counter() - started) * 1000
+
+    print(f"{searches} searches in a burst, {entries} history entries\n")
+    print(f"{'':<22} {'caller ms':>10} {'writes':>7}")
+    print(f"{'rewrite per search':<22} {rewrite_ms:>10.2f} {searches:>7}")
+    print(f"{'write-behind':<22} {caller_ms:>10.2f} {store.writes:>7}"
+          f"   (+{close_ms:.2f} ms for the final write on close)")
+    print(f"\nranked dropdown filtered by prefix: {filter_us:.1f} us")
+
+
+def bench_observations(rows: int, cities: int, queries: int):
+    """Observation store ingest rate, size and per-city range query latency."""
+    step = 600  # one observation per city every 10 minutes
+    steps = -(-rows // cities)
+    end = 1_700_000_000
+    start = end - steps * step
+    names = [f"City {i}, XX" for i in range(cities)]
+    rng = np.random.default_rng(0)
+    base = rng.uniform(-10, 30, cities)
+
+    def generate():
+        for t in range(steps):
+            ts = start + t * step
+            daily = 8 * math.sin(2 * math.pi * (ts % DAY) / DAY)
+            temps = (base + daily + rng.normal(0, 1, cities)).round(2).tolist()
+            winds = rng.uniform(0, 20, cities).round(1).tolist()
+            for name, temp, wind in zip(names, temps, winds):
+                yield name, ts, temp, temp - 1.5, 70.0, wind
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "history.db"
+        store = ObservationStore(path, batch_size=20_000)
+        started = time.perf_counter()
+        written = store.ingest(itertools.islice(generate(), rows))
+        ingest_s = time.perf_counter() - started
+        size = sum(f.stat().st_size for f in Path(directory).iterdir())
+        print(f"{written:,} observations, {cities:,} cities, every {step // 60} min\n")
+        print(f"ingest: {ingest_s:.1f} s, {written / ingest_s:,.0f} rows/s, "
+              f"{size / 2**20:,.0f} MiB on disk ({size / written:.0f} B/row incl. rollups)")
+
+        picks = rng.integers(0, cities, queries)
+        print(f"\n{'one week of one city':<24} {'points':>7} {'p50 ms':>8} {'p95 ms':>8}")
+        for resolution in ("raw", "hour", "day"):
+            times = []
+            for i in picks:
+                began = time.perf_counter()
+                series = store.series(names[i], end - 7 * DAY, end, resolution)
+                times.append((time.perf_counter() - began) * 1000)
+            p50, p95 = np.percentile(times, [50, 95])
+            print(f"{resolution:<24} {len(series):>7} {p50:>8.2f} {p95:>8.2f}")
+
+        # Rollups must agree with aggregating the raw rows
+        raw = store.series(names[0], end - DAY, end, "raw")
+        daily = store.series(names[0], end - DAY, end, "day")
+        last = raw.time >= daily.time[-1]
+        assert daily.count[-1] == last.sum()
+        assert np.isclose(daily.temp_mean[-1], raw.temp_mean[last].mean())
+        store.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="bench", required=True)
+
+    load = sub.add_parser("load", help="latency/throughput at fixed concurrency")
+    load.add_argument(
+        "--concurrency",
+        type=lambda value: [int(level) for level in value.split(",")],
+        default=[1, 8, 32, 128],
+    )
+    load.add_argument("--requests", type=int, default=500)
+    load.add_argument("--latency", type=parse_latency, default="lognormal:0.02,0.5")
+    load.add_argument("--error-rate", type=float, default=0.0)
+    load.add_argument("--payload-bytes", type=int, default=0)
+
+    client = sub.add_parser("client", help="pooled vs. per-call HTTP client")
+    client.add_argument("--requests", type=int, default=200)
+
+    gazetteer = sub.add_parser("gazetteer", help="city index load time and memory")
+    gazetteer.add_argument("--cities", type=int, default=100_000)
+    gazetteer.add_argument("--source", help="city list to index instead of synthetic data")
+
+    snapshot = sub.add_parser("snapshot", help="dict payloads vs. WeatherSnapshot")
+    snapshot.add_argument("--entries", type=int, default=10_000)
+
+    metrics = sub.add_parser("metrics", help="instrumentation overhead and output")
+    metrics.add_argument("--requests", type=int, default=2000)
+    metrics.add_argument("--format", choices=["json", "prometheus"], default="prometheus")
+
+    startup = sub.add_parser("startup", help="import time and time to first frame")
+    startup.add_argument("--runs", type=int, default=5)
+    startup.add_argument("--top", type=int, default=10)
+    startup.add_argument("--budget-ms", type=float, help="fail if first frame is slower")
+
+    forecast = sub.add_parser("forecast", help="columnar forecast memory and aggregation")
+    forecast.add_argument("--cities", type=int, default=1000)
+    forecast.add_argument("--days", type=int, default=5)
+
+    render = sub.add_parser("render", help="page updates and diff size per search")
+    render.add_argument("--searches", type=int, default=50)
+
+    history = sub.add_parser("history", help="burst history saves, sync vs. write-behind")
+    history.add_argument("--searches", type=int, default=200)
+    history.add_argument("--entries", type=int, default=10)
+
+    observations = sub.add_parser("observations", help="history store ingest and range queries")
+    observations.add_argument("--rows", type=int, default=10_000_000)
+    observations.add_argument("--cities", type=int, default=1000)
+    observations.add_argument("--queries", type=int, default=200)
+
+    args = parser.parse_args()
+    if args.bench == "load":
+        asyncio.run(bench_load(
+            args.concurrency, args.requests, args.latency,
+            args.error_rate, args.payload_bytes,
+        ))
+    elif args.bench == "client":
+        asyncio.run(bench_client(args.requests))
+    elif args.bench == "gazetteer":
+        bench_gazetteer(args.cities, args.source)
+    elif args.bench == "snapshot":
+        bench_snapshot(args.entries)
+    elif args.bench == "metrics":
+        asyncio.run(bench_metrics(args.requests, args.format))
+    elif args.bench == "startup":
+        bench_startup(args.runs, args.top, args.budget_ms)
+    elif args.bench == "forecast":
+        bench_forecast(args.cities, args.days)
+    elif args.bench == "render":
+        asyncio.run(bench_render(args.searches))
+    elif args.bench == "history":
+        bench_history(args.searches, args.entries)
+    elif args.bench == "observations":
+        bench_observations(args.rows, args.cities, args.queries)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+"""Look up the weather for many places from the command line, without the UI.
+
+Reads one city name or ``lat,lon`` pair per line from a file or stdin and
+writes one result per line (NDJSON) or per row (CSV) as lookups complete.
+Input is read as it is needed and at most ``--concurrency`` lookups are
+pending, so memory use does not grow with the input.
+
+With ``--checkpoint``, finished input lines are recorded as the run goes;
+running the same command again after an interruption skips them and
+appends to the output. Results are written before they are recorded, so
+a line may be repeated after a crash but is never lost. The checkpoint
+is removed when the run completes.
+
+Usage:
+    python cli.py cities.txt --format csv --output weather.csv
+    python cli.py cities.txt -o weather.ndjson --checkpoint weather.ckpt
+    cat coordinates.txt | python cli.py --units imperial
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import AsyncIterator, Dict, Iterable, Optional, Set, TextIO, Tuple, Union
+
+from config import Config
+from gazetteer import Gazetteer
+from rate_limiter import RateLimiter
+from units import UNIT_SYSTEMS, convert_snapshots
+from weather_service import WeatherService, WeatherServiceError
+
+FIELDS = (
+    "line", "query", "ok", "name", "country", "temp", "feels_like", "humidity",
+    "description", "wind_speed", "timestamp", "stale", "units", "error",
+)
+
+
+def parse_location(text: str) -> Union[str, Tuple[float, float], None]:
+    """A city name, a (lat, lon) pair, or None for a blank or ``#`` comment line."""
+    text = text.strip()
+    if not text or text.startswith("#"):
+        return None
+    first, _, second = text.partition(",")
+    try:
+        return float(first), float(second)
+    except ValueError:
+        return text  # e.g. "London" or "London, GB"
+
+
+async def read_lines(stream: TextIO, chunk_bytes: int = 1 << 16) -> AsyncIterator[str]:
+    """Lines of ``stream``, read on a worker thread so a slow pipe does not stall lookups."""
+    while True:
+        lines = await asyncio.to_thread(stream.readlines, chunk_bytes)
+        if not lines:
+            return
+        for line in lines:
+            yield line
+
+
+def to_record(line: int, query: str, result, units: str) -> Dict:
+    """One output record for a WeatherSnapshot or the error raised for it."""
+    record = dict.fromkeys(FIELDS)
+    record.update(line=line, query=query, units=units)
+    if isinstance(result, Exception):
+        record.update(ok=False, error=str(result))
+        return record
+    snapshot = convert_snapshots([result], Config.API_UNITS, units)[0]
+    record.update(
+        ok=True,
+        name=snapshot.name,
+        country=snapshot.country,
+        temp=snapshot.temp,
+        feels_like=snapshot.feels_like,
+        humidity=snapshot.humidity,
+        description=snapshot.description,
+        wind_speed=snapshot.wind_speed,
+        timestamp=snapshot.timestamp,
+        stale=snapshot.stale,
+    )
+    return record
+
+
+class NdjsonWriter:
+    def __init__(self, stream: TextIO):
+        self.stream = stream
+
+    def write(self, record: Dict):
+        self.stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+class CsvWriter:
+    def __init__(self, stream: TextIO, header: bool = True):
+        self.stream = stream
+        self._writer = csv.DictWriter(stream, fieldnames=FIELDS)
+        if header:
+            self._writer.writeheader()
+
+    def write(self, record: Dict):
+        self._writer.writerow(record)
+
+
+class Checkpoint:
+    """Input lines finished so far: every line below ``below``, plus ``done``.
+
+    Lines finish out of order, but only those above the first unfinished
+    line are kept in ``done``, so the file stays small however long the
+    input is.
+    """
+
+    def __init__(self, path: Optional[Path], source: str):
+        self.path = path
+        self.source = source
+        self.below = 0
+        self.done: Set[int] = set()
+        self.saved_at = time.monotonic()
+        if path is not None and path.exists():
+            state = json.loads(path.read_text())
+            if state.get("source") != source:
+                raise ValueError(
+                    f"{path} belongs to input {state.get('source')!r}, not {source!r}"
+                )
+            self.below = state["below"]
+            self.done = set(state["done"])
+
+    @property
+    def resumed(self) -> bool:
+        return self.below > 0 or bool(self.done)
+
+    def __contains__(self, line: int) -> bool:
+        return line < self.below or line in self.done
+
+    def mark(self, line: int):
+        self.done.add(line)
+        while self.below in self.done:
+            self.done.remove(self.below)
+            self.below += 1
+
+    def save(self):
+        if self.path is None:
+            return
+        state = {"source": self.source, "below": self.below, "done": sorted(self.done)}
+        temporary = self.path.with_name(f".{self.path.name}.tmp")
+        temporary.write_text(json.dumps(state))
+        os.replace(temporary, self.path)
+        self.saved_at = time.monotonic()
+
+    def remove(self):
+        if self.path is not None and self.path.exists():
+            self.path.unlink()
+
+
+async def run_batch(
+    service,
+    lines: AsyncIterator[str],
+    writer,
+    output: TextIO,
+    checkpoint: Checkpoint,
+    concurrency: Optional[int] = None,
+    units: Optional[str] = None,
+) -> Dict[str, int]:
+    """
+    Look up every location in ``lines`` and write each result as it completes.
+
+    Returns:
+        Counts of ``ok``, ``failed`` and ``skipped`` (already done) lines
+    """
+    limit = concurrency or Config.BATCH_CONCURRENCY
+    if limit < 1:
+        raise ValueError("concurrency must be at least 1")
+    units = units or Config.UNITS
+    counts = {"ok": 0, "failed": 0, "skipped": 0}
+    pending: Dict[asyncio.Future, Tuple[int, str]] = {}
+
+    async def lookup(location):
+        try:
+            return await service.get_weather_for(location, background=True)
+        except WeatherServiceError as e:
+            return e
+
+    numbered = _enumerate(lines)
+    exhausted = False
+    try:
+        while True:
+            while not exhausted and len(pending) < limit:
+                try:
+                    line, text = await numbered.__anext__()
+                except StopAsyncIteration:
+                    exhausted = True
+                    break
+                if line in checkpoint:
+                    counts["skipped"] += 1
+                    continue
+                location = parse_location(text)
+                if location is None:
+                    checkpoint.mark(line)
+                    continue
+                pending[asyncio.ensure_future(lookup(location))] = (line, text.strip())
+            if not pending:
+                break
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                line, query = pending.pop(task)
+                result = task.result()
+                writer.write(to_record(line + 1, query, result, units))
+                counts["failed" if isinstance(result, Exception) else "ok"] += 1
+                checkpoint.mark(line)
+            if time.monotonic() - checkpoint.saved_at >= Config.CLI_CHECKPOINT_INTERVAL:
+                output.flush()  # results first, so a saved line is always written
+                checkpoint.save()
+    finally:
+        for task in pending:
+            task.cancel()
+        output.flush()
+        checkpoint.save()
+    return counts
+
+
+async def _enumerate(lines: AsyncIterator[str]) -> AsyncIterator[Tuple[int, str]]:
+    line = 0
+    async for text in lines:
+        yield line, text
+        line += 1
+
+
+async def run(args: argparse.Namespace) -> Dict[str, int]:
+    source = args.input or "-"
+    checkpoint = Checkpoint(
+        Path(args.checkpoint) if args.checkpoint else None,
+        source if source == "-" else str(Path(source).resolve()),
+    )
+    resume = checkpoint.resumed
+    input_stream = sys.stdin if source == "-" else open(source, encoding="utf-8")
+    if args.output:
+        output = open(args.output, "a" if resume else "w", encoding="utf-8", newline="")
+    else:
+        output = sys.stdout
+    try:
+        if args.format == "csv":
+            writer = CsvWriter(output, header=not (resume and output.tell() > 0))
+        else:
+            writer = NdjsonWriter(output)
+        service = WeatherService(
+            # Queue rather than fail lookups over the limit: nobody is waiting on one
+            limiter=RateLimiter(
+                rate=Config.RATE_LIMIT_PER_MINUTE / 60,
+                burst=Config.RATE_LIMIT_BURST,
+                policy="wait",
+            ),
+            gazetteer=Gazetteer.load(Config.GAZETTEER_SOURCE),
+        )
+        async with service:
+            counts = await run_batch(
+                service, read_lines(input_stream), writer, output,
+                checkpoint, args.concurrency, args.units,
+            )
+        checkpoint.remove()  # finished; the next run starts over
+        return counts
+    finally:
+        if input_stream is not sys.stdin:
+            input_stream.close()
+        if output is not sys.stdout:
+            output.close()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    Config.load()  # before the defaults below are read
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("input", nargs="?", help="file with one location per line (default: stdin)")
+    parser.add_argument("-o", "--output", help="file to write (default: stdout)")
+    parser.add_argument("-f", "--format", choices=["ndjson", "csv"], default="ndjson")
+    parser.add_argument("-c", "--concurrency", type=int, default=Config.BATCH_CONCURRENCY)
+    parser.add_argument("--units", choices=UNIT_SYSTEMS, help="default: WEATHER_UNITS")
+    parser.add_argument("--checkpoint", help="record progress here and resume from it")
+    return parser
+
+
+def main(argv: Optional[Iterable[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+
+    try:
+        Config.validate()
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    try:
+        counts = asyncio.run(run(args))
+    except ValueError as e:  # e.g. a checkpoint from another input
+        print(e, file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        if args.checkpoint:
+            print(f"Interrupted; run again to resume from {args.checkpoint}", file=sys.stderr)
+        return 130
+    print(
+        f"{counts['ok']} ok, {counts['failed']} failed, {counts['skipped']} already done",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
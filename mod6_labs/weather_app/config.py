@@ -2,20 +2,20 @@
 """Configuration management for the Weather App."""
 
 import os
-from dotenv import load_dotenv
-
-# Load environment variables from .env file
-load_dotenv()
+from pathlib import Path
 
 class Config:
-    """Application configuration."""
+    """Application configuration.
+    
+    Values below are defaults. ``load()`` reads the .env file and applies
+    environment overrides; it runs on first use rather than at import so
+    that the app window can paint before any of this work is done.
+    """
     
     # API Configuration
-    API_KEY = os.getenv("OPENWEATHER_API_KEY", "")
-    BASE_URL = os.getenv(
-        "OPENWEATHER_BASE_URL", 
-        "https://api.openweathermap.org/data/2.5/weather"
-    )
+    API_KEY = ""  # OPENWEATHER_API_KEY
+    BASE_URL = "https://api.openweathermap.org/data/2.5/weather"  # OPENWEATHER_BASE_URL
+    FORECAST_URL = "https://api.openweathermap.org/data/2.5/forecast"  # OPENWEATHER_FORECAST_URL
     
     # App Configuration
     APP_TITLE = "Weather App"
@@ -23,18 +23,135 @@ class Config:
     APP_HEIGHT = 600
     
     # API Settings
-    UNITS = "metric"  # metric, imperial, or standard
+    API_UNITS = "metric"  # every request and cache entry uses these units
+    UNITS = "metric"  # shown by default: metric, imperial, or standard; WEATHER_UNITS
     TIMEOUT = 10  # seconds
+
+    # HTTP Connection Pool
+    MAX_CONNECTIONS = 20  # WEATHER_MAX_CONNECTIONS
+    MAX_KEEPALIVE_CONNECTIONS = 10  # WEATHER_MAX_KEEPALIVE
+    KEEPALIVE_EXPIRY = 30  # seconds an idle connection is kept open
+
+    # Response Cache
+    CACHE_TTL = 600  # seconds fresh; WEATHER_CACHE_TTL
+    CACHE_STALE_TTL = 3600  # seconds a stale entry may still be served
+    CACHE_MAX_ENTRIES = 256
+    CACHE_DB_FILE = "weather_cache.db"  # persistent store, next to search history
+    CACHE_DB_MAX_BYTES = 1_000_000
+    OBSERVATIONS_DB_FILE = "weather_history.db"  # every fetched observation, kept
+    OBSERVATIONS_BATCH_SIZE = 500  # rows written per transaction
+    OBSERVATIONS_FLUSH_INTERVAL = 30.0  # seconds buffered rows may wait for a write
+    FORECAST_TTL = 1800  # forecasts change every 3 hours upstream
+    FORECAST_DAYS = 5  # days shown in the forecast strip
+
+    # Coordinate Lookups
+    GEO_PRECISION = 5  # geohash characters; 5 is a cell of about 5 x 5 km
+    GEO_NEIGHBOR_TOLERANCE_KM = 5.0  # reuse an adjacent cell this close
+
+    # Local City Index
+    DATA_DIR = Path(__file__).parent / "data"
+    GAZETTEER_SOURCE = DATA_DIR / "cities.tsv"  # or a GeoNames cities*.txt export
+    GAZETTEER_STRICT = False  # True rejects names missing from the index
+
+    # Retries and Circuit Breaker
+    RETRY_ATTEMPTS = 3  # total tries for timeouts, connect errors and 5xx
+    RETRY_BASE_DELAY = 0.2  # seconds, doubled on each retry (with jitter)
+    RETRY_MAX_DELAY = 2.0
+    BREAKER_FAILURE_THRESHOLD = 5  # consecutive failed requests before opening
+    BREAKER_RESET_TIMEOUT = 30  # seconds to fail fast before trying again
+
+    # Rate Limiting (shared by every session using the API key)
+    RATE_LIMIT_PER_MINUTE = 60  # WEATHER_RATE_LIMIT_PER_MINUTE
+    RATE_LIMIT_BURST = 10
+    RATE_LIMIT_POLICY = "wait"  # "wait" to queue, "reject" to fail immediately
+
+    # Batch Lookups
+    BATCH_CONCURRENCY = 10  # WEATHER_BATCH_CONCURRENCY
+    CLI_CHECKPOINT_INTERVAL = 1.0  # seconds between checkpoint saves in cli.py
+
+    # Search History
+    HISTORY_FLUSH_INTERVAL = 1.0  # seconds; searches within it are saved in one write
+    HISTORY_MAX_ENTRIES = 5000  # the lowest ranked cities are dropped beyond this
+    HISTORY_HALF_LIFE = 7 * 24 * 3600  # seconds for a past search to count half as much
+    HISTORY_DROPDOWN_SIZE = 10  # cities shown under the search field
+
+    # Search
+    SEARCH_TYPEAHEAD = True  # look up known cities while typing; WEATHER_TYPEAHEAD=0
+    SEARCH_DEBOUNCE = 0.35  # seconds typing must pause before a typeahead lookup
+    TYPEAHEAD_MIN_CHARS = 3
+
+    # Watchlist
+    WATCHLIST_FILE = "watchlist.json"  # next to search history
+    WATCHLIST_INTERVAL = 600  # seconds between refreshes of a watched city
+    WATCHLIST_JITTER = 0.1  # each interval varies by up to +/- 10%
+
+    # Dashboard (python dashboard.py cities.txt)
+    DASHBOARD_FILE = "dashboard_cities.txt"  # one city per line, when no file is given
+    DASHBOARD_WIDTH = 1200
+    DASHBOARD_HEIGHT = 800
+    DASHBOARD_COLUMNS = 5  # cards per grid row
+    DASHBOARD_ROW_HEIGHT = 120  # pixels per grid row, fixed so rows can be skipped
+    DASHBOARD_PAGE_ROWS = 5  # grid rows taken as visible before the first scroll
+    DASHBOARD_SCROLL_MARGIN = 360  # pixels of rows kept built above and below the view
+    DASHBOARD_UPDATE_INTERVAL = 0.25  # seconds between page updates while fetching
+    ALERT_HEAT_TEMP = 35.0  # in API_UNITS
+    ALERT_COLD_TEMP = 0.0
+    ALERT_WIND_SPEED = 15.0
+
+    # Weather Icons
+    ICON_URL = "https://openweathermap.org/img/wn/{code}@2x.png"  # WEATHER_ICON_URL
+    ICON_CACHE_DIR = "icon_cache"  # content-addressed PNGs, next to search history
+    ICON_BUNDLE_DIR = DATA_DIR / "icons"  # optional <code>@2x.png files shipped with the app
+    ICON_PREFETCH = True  # download missing icons in the background; WEATHER_ICON_PREFETCH=0
+
+    # Instrumentation
+    METRICS_ENABLED = False  # WEATHER_METRICS=1
+    METRICS_FILE = "weather_metrics.prom"  # written on shutdown when enabled
+    
+    # Environment variables read by load(): attribute -> (variable, parser)
+    _ENV = {
+        "API_KEY": ("OPENWEATHER_API_KEY", str),
+        "BASE_URL": ("OPENWEATHER_BASE_URL", str),
+        "FORECAST_URL": ("OPENWEATHER_FORECAST_URL", str),
+        "MAX_CONNECTIONS": ("WEATHER_MAX_CONNECTIONS", int),
+        "MAX_KEEPALIVE_CONNECTIONS": ("WEATHER_MAX_KEEPALIVE", int),
+        "UNITS": ("WEATHER_UNITS", str),
+        "CACHE_TTL": ("WEATHER_CACHE_TTL", int),
+        "RATE_LIMIT_PER_MINUTE": ("WEATHER_RATE_LIMIT_PER_MINUTE", int),
+        "BATCH_CONCURRENCY": ("WEATHER_BATCH_CONCURRENCY", int),
+        "METRICS_ENABLED": ("WEATHER_METRICS", lambda value: value == "1"),
+        "ICON_URL": ("WEATHER_ICON_URL", str),
+        "ICON_PREFETCH": ("WEATHER_ICON_PREFETCH", lambda value: value != "0"),
+        "SEARCH_TYPEAHEAD": ("WEATHER_TYPEAHEAD", lambda value: value != "0"),
+    }
+    _loaded = False
+    
+    @classmethod
+    def load(cls):
+        """Load the .env file and environment overrides; later calls do nothing."""
+        if cls._loaded:
+            return cls
+        from dotenv import load_dotenv
+        
+        load_dotenv()
+        for attr, (variable, parse) in cls._ENV.items():
+            value = os.getenv(variable)
+            if value is not None:
+                setattr(cls, attr, parse(value))
+        cls._loaded = True
+        return cls
     
     @classmethod
     def validate(cls):
         """Validate that required configuration is present."""
+        cls.load()
         if not cls.API_KEY:
             raise ValueError(
                 "OPENWEATHER_API_KEY not found. "
                 "Please create a .env file with your API key."
             )
+        if cls.UNITS not in ("metric", "imperial", "standard"):
+            raise ValueError(
+                f"WEATHER_UNITS must be metric, imperial or standard, not {cls.UNITS!r}"
+            )
         return True
-
-# Validate configuration on import
-Config.validate()
\ No newline at end of file
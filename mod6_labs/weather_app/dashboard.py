@@ -0,0 +1,388 @@
+"""Dashboard of many cities' current weather in one scrolling grid.
+
+The latest weather of every city is kept in ``DashboardTable``, one NumPy
+column per field, so sorting and filtering never refetch. ``Dashboard``
+only keeps card controls for the rows near the visible part of the grid,
+moving that window as it is scrolled, and fills cards in as a batched,
+concurrent fetch completes.
+
+Run it with a file of city names, one per line:
+    python dashboard.py cities.txt
+"""
+
+import asyncio
+import math
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import flet as ft
+import numpy as np
+
+from config import Config
+from models import WeatherSnapshot
+from units import TEMPERATURE_SYMBOLS, convert_temperature
+
+# Alert flags, combined per city in DashboardTable.alerts
+ALERT_HEAT = 1
+ALERT_COLD = 2
+ALERT_WIND = 4
+ALERT_ERROR = 8  # the last lookup failed
+ALERT_LABELS = {ALERT_HEAT: "Heat", ALERT_COLD: "Cold", ALERT_WIND: "Wind", ALERT_ERROR: "No data"}
+
+SORT_KEYS = ("city", "temp", "humidity", "wind_speed", "alerts")
+
+
+def alert_flags(temp, wind_speed):
+    """Alert flags for temperatures and wind speeds in Config.API_UNITS (arrays too)."""
+    temp = np.asarray(temp)
+    wind_speed = np.asarray(wind_speed)
+    return (
+        np.where(temp >= Config.ALERT_HEAT_TEMP, ALERT_HEAT, 0)
+        | np.where(temp <= Config.ALERT_COLD_TEMP, ALERT_COLD, 0)
+        | np.where(wind_speed >= Config.ALERT_WIND_SPEED, ALERT_WIND, 0)
+    ).astype(np.uint8)
+
+
+def describe_alerts(flags: int) -> str:
+    return ", ".join(label for flag, label in ALERT_LABELS.items() if flags & flag)
+
+
+class DashboardTable:
+    """Latest weather per city, one column per field, rows in input order.
+
+    Numeric columns are NaN until a city has loaded. ``snapshots`` keeps
+    the full snapshot of each row for the card texts.
+    """
+
+    def __init__(self, cities: Iterable[str]):
+        self.cities: List[str] = list(cities)
+        n = len(self.cities)
+        self.rows: Dict[str, int] = {city: i for i, city in enumerate(self.cities)}
+        self.names = np.array([city.casefold() for city in self.cities], dtype=object)
+        self.temp = np.full(n, np.nan, dtype=np.float32)
+        self.humidity = np.full(n, np.nan, dtype=np.float32)
+        self.wind_speed = np.full(n, np.nan, dtype=np.float32)
+        self.alerts = np.zeros(n, dtype=np.uint8)
+        self.loaded = np.zeros(n, dtype=bool)
+        self.snapshots: List[Optional[WeatherSnapshot]] = [None] * n
+        self.errors: List[Optional[str]] = [None] * n
+
+    def __len__(self) -> int:
+        return len(self.cities)
+
+    def set(self, row: int, result):
+        """Record a lookup result: a WeatherSnapshot or the exception raised."""
+        if isinstance(result, WeatherSnapshot):
+            self.snapshots[row] = result
+            self.errors[row] = None
+            self.temp[row] = result.temp
+            self.humidity[row] = result.humidity
+            self.wind_speed[row] = result.wind_speed
+            self.alerts[row] = alert_flags(result.temp, result.wind_speed)
+            if result.stale:
+                self.alerts[row] |= ALERT_ERROR
+        else:
+            self.errors[row] = str(result)
+            # Keep the last good values, but flag that they are not current
+            self.alerts[row] |= ALERT_ERROR
+        self.loaded[row] = True
+
+    def view(
+        self,
+        sort_by: str = "city",
+        descending: bool = False,
+        alerts_only: bool = False,
+        text: str = "",
+    ) -> np.ndarray:
+        """
+        Rows to show, in order.
+
+        Args:
+            sort_by: One of SORT_KEYS; cities not loaded yet sort last
+            descending: Reverse the order (still with unloaded cities last)
+            alerts_only: Only rows with an alert flag set
+            text: Only cities whose name contains this text
+
+        Returns:
+            int64 array of row numbers
+        """
+        if sort_by not in SORT_KEYS:
+            raise ValueError(f"Cannot sort by {sort_by!r}")
+        mask = np.ones(len(self), dtype=bool)
+        if alerts_only:
+            mask &= self.alerts != 0
+        if text:
+            needle = text.casefold()
+            mask &= np.fromiter((needle in name for name in self.names), bool, len(self))
+        rows = np.flatnonzero(mask)
+
+        if sort_by == "city":
+            order = np.argsort(self.names[rows], kind="stable")
+            return rows[order[::-1] if descending else order]
+        column = getattr(self, sort_by)[rows].astype(np.float64)
+        missing = np.isnan(column) | ~self.loaded[rows]
+        key = np.where(missing, 0.0, -column if descending else column)
+        return rows[np.lexsort((key, missing))]  # last key is the primary one
+
+
+class Dashboard:
+    """A grid of city cards fed by a concurrent batch fetch.
+
+    Only the grid rows in and near the visible part of the list exist as
+    controls: the rows above and below are stood in for by two spacers
+    of the same height, which is why grid rows have a fixed height. As
+    the grid scrolls, rows and cards leaving that window are dropped and
+    ones entering it are built by ``build_card``, so the number of
+    controls stays the same however many cities there are. Re-sorting or
+    filtering keeps the scroll position.
+
+    Handlers are async so that they run on the event loop, like ``load``,
+    rather than on a worker thread alongside it.
+    """
+
+    def __init__(self, page: ft.Page, cities: Iterable[str], columns: Optional[int] = None):
+        self.page = page
+        self.table = DashboardTable(cities)
+        self.columns = columns or Config.DASHBOARD_COLUMNS
+        self.row_height = Config.DASHBOARD_ROW_HEIGHT
+        self.margin_rows = max(1, math.ceil(Config.DASHBOARD_SCROLL_MARGIN / self.row_height))
+        self.order = np.arange(len(self.table))
+        self.cards: Dict[int, ft.Container] = {}  # table row -> card, in the window only
+        self.grid_rows: Dict[int, ft.Container] = {}  # grid row -> its control, same
+        self.first = self.last = 0  # grid rows built: first <= r < last
+        self.scroll_row = 0  # first visible grid row
+        self.visible_rows = Config.DASHBOARD_PAGE_ROWS
+        self.fetch_seconds = None
+        self.build_ui()
+        self.show_view()
+
+    def build_ui(self):
+        self.sort_dropdown = ft.Dropdown(
+            label="Sort by",
+            value="city",
+            options=[ft.dropdown.Option(key) for key in SORT_KEYS],
+            on_change=self.on_view_change,
+            width=160,
+        )
+        self.descending_switch = ft.Switch(label="Descending", on_change=self.on_view_change)
+        self.alerts_switch = ft.Switch(label="Alerts only", on_change=self.on_view_change)
+        self.filter_input = ft.TextField(
+            label="Filter cities", on_change=self.on_view_change, width=200
+        )
+        self.status_text = ft.Text("", size=12, italic=True)
+        self.top_spacer = ft.Container(height=0)
+        self.bottom_spacer = ft.Container(height=0)
+        self.grid = ft.ListView(
+            expand=True,
+            on_scroll=self.on_scroll,
+            on_scroll_interval=100,
+        )
+        self.page.add(
+            ft.Row(
+                [
+                    self.sort_dropdown,
+                    self.descending_switch,
+                    self.alerts_switch,
+                    self.filter_input,
+                    self.status_text,
+                ],
+                wrap=True,
+            ),
+            self.grid,
+        )
+
+    def build_card(self, row: int) -> ft.Container:
+        """Item builder: the card for one table row, created when it enters the window."""
+        card = ft.Container(
+            content=ft.Column(
+                [
+                    ft.Text(self.table.cities[row], size=14, weight=ft.FontWeight.BOLD),
+                    ft.Text("…", size=22, weight=ft.FontWeight.BOLD, color=ft.Colors.BLUE_900),
+                    ft.Text("", size=12, italic=True),
+                    ft.Text("", size=12, color=ft.Colors.RED_700),
+                ],
+                spacing=2,
+            ),
+            bgcolor=ft.Colors.BLUE_50,
+            border_radius=10,
+            padding=10,
+            expand=True,
+        )
+        self.fill_card(card, row)
+        return card
+
+    def fill_card(self, card: ft.Container, row: int):
+        _, temp_text, description_text, alert_text = card.content.controls
+        snapshot = self.table.snapshots[row]
+        if snapshot is not None:
+            temp = convert_temperature(snapshot.temp, Config.API_UNITS, Config.UNITS)
+            temp_text.value = f"{temp:.1f}{TEMPERATURE_SYMBOLS[Config.UNITS]}"
+            description_text.value = snapshot.description
+        elif self.table.errors[row]:
+            temp_text.value = "–"
+            description_text.value = self.table.errors[row]
+        alert_text.value = describe_alerts(int(self.table.alerts[row]))
+        card.bgcolor = ft.Colors.RED_50 if self.table.alerts[row] else ft.Colors.BLUE_50
+
+    def build_grid_row(self, r: int) -> ft.Container:
+        chunk = self.order[r * self.columns:(r + 1) * self.columns]
+        cards = []
+        for row in chunk:
+            row = int(row)
+            card = self.cards.get(row)
+            if card is None:
+                card = self.cards[row] = self.build_card(row)
+            cards.append(card)
+        return ft.Container(
+            ft.Row(cards), height=self.row_height, padding=ft.padding.only(bottom=8)
+        )
+
+    @property
+    def total_rows(self) -> int:
+        return -(-len(self.order) // self.columns)  # ceiling division
+
+    def window(self) -> Tuple[int, int]:
+        """Grid rows to build for the current scroll position."""
+        total = self.total_rows
+        first = min(max(0, self.scroll_row - self.margin_rows), total)
+        last = min(self.scroll_row + self.visible_rows + self.margin_rows, total)
+        return first, max(first, last)
+
+    def show_window(self):
+        """Build the grid rows in ``window()`` and drop the rest; the caller updates the page."""
+        first, last = self.window()
+        kept = {r: self.grid_rows[r] for r in range(first, last) if r in self.grid_rows}
+        keep_cards = {int(row) for row in self.order[first * self.columns:last * self.columns]}
+        self.cards = {row: card for row, card in self.cards.items() if row in keep_cards}
+        for r in range(first, last):
+            if r not in kept:
+                kept[r] = self.build_grid_row(r)
+        self.grid_rows = kept
+        self.first, self.last = first, last
+        self.top_spacer.height = first * self.row_height
+        self.bottom_spacer.height = (self.total_rows - last) * self.row_height
+        self.grid.controls = [
+            self.top_spacer, *(kept[r] for r in range(first, last)), self.bottom_spacer
+        ]
+
+    def near_window_edge(self) -> bool:
+        """Whether the visible rows have come within half the margin of an unbuilt row."""
+        slack = max(1, self.margin_rows // 2)
+        top, bottom = self.scroll_row, self.scroll_row + self.visible_rows
+        return (self.first > 0 and top - self.first < slack) or (
+            self.last < self.total_rows and self.last - bottom < slack
+        )
+
+    def view_order(self) -> np.ndarray:
+        return self.table.view(
+            sort_by=self.sort_dropdown.value or "city",
+            descending=bool(self.descending_switch.value),
+            alerts_only=bool(self.alerts_switch.value),
+            text=(self.filter_input.value or "").strip(),
+        )
+
+    def show_view(self, order: Optional[np.ndarray] = None):
+        """Re-sort and filter from the table and rebuild the rows at the scroll position."""
+        self.order = self.view_order() if order is None else order
+        self.grid_rows = {}  # their cards changed places
+        self.show_window()
+        self.update_status()
+
+    def update_status(self):
+        loaded = int(self.table.loaded.sum())
+        alerts = int(np.count_nonzero(self.table.alerts))
+        status = f"{len(self.order)} shown · {loaded}/{len(self.table)} loaded · {alerts} alerts"
+        if self.fetch_seconds is not None:
+            status += f" · fetched in {self.fetch_seconds:.1f} s"
+        self.status_text.value = status
+
+    async def on_view_change(self, e):
+        self.show_view()
+        self.page.update()
+
+    async def on_scroll(self, e: ft.OnScrollEvent):
+        self.scroll_row = int(e.pixels // self.row_height)
+        if e.viewport_dimension:
+            self.visible_rows = max(1, math.ceil(e.viewport_dimension / self.row_height))
+        if self.near_window_edge() and self.window() != (self.first, self.last):
+            self.show_window()
+            self.page.update()
+
+    async def load(self, service, concurrency: Optional[int] = None):
+        """
+        Fetch every city concurrently, filling cards as results arrive.
+
+        The page is updated at most every ``Config.DASHBOARD_UPDATE_INTERVAL``
+        seconds. Once everything has loaded the view is re-sorted, but only
+        if the order it shows has changed.
+        """
+        started = last_update = time.monotonic()
+        batch = service.iter_weather_many(self.table.cities, concurrency, background=True)
+        async for row, _, result in batch:
+            self.table.set(row, result)
+            card = self.cards.get(row)
+            if card is not None:
+                self.fill_card(card, row)
+            if time.monotonic() - last_update >= Config.DASHBOARD_UPDATE_INTERVAL:
+                last_update = time.monotonic()
+                self.update_status()
+                self.page.update()
+        self.fetch_seconds = time.monotonic() - started
+        order = self.view_order()
+        if np.array_equal(order, self.order):
+            self.update_status()
+        else:
+            self.show_view(order)
+        self.page.update()
+
+
+def read_cities(path: Path) -> List[str]:
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+async def main(page: ft.Page):
+    from main import acquire_shared_services, release_shared_services
+
+    page.title = f"{Config.APP_TITLE} - Dashboard"
+    page.padding = 20
+    page.window.width = Config.DASHBOARD_WIDTH
+    page.window.height = Config.DASHBOARD_HEIGHT
+    try:
+        Config.validate()
+        source = Path(sys.argv[1] if len(sys.argv) > 1 else Config.DASHBOARD_FILE)
+        cities = read_cities(source)
+    except (ValueError, OSError) as e:  # no API key, or no city list
+        show_error(page, str(e))
+        return
+    dashboard = Dashboard(page, cities)
+    page.update()
+
+    try:
+        services = await asyncio.to_thread(acquire_shared_services, Path("."))
+    except Exception as e:  # e.g. an unreadable database or city index
+        show_error(page, f"Could not start: {e}")
+        return
+    closed = False
+
+    async def close(e):
+        """Bound to both on_disconnect and on_close; only the first call does anything."""
+        nonlocal closed
+        if closed:
+            return
+        closed = True
+        await release_shared_services()  # flushes buffered observations
+
+    page.on_disconnect = close
+    page.on_close = close
+    await dashboard.load(services.service)
+
+
+def show_error(page: ft.Page, message: str):
+    page.controls.insert(0, ft.Text(f"❌ {message}", color=ft.Colors.RED_700))
+    page.update()
+
+if __name__ == "__main__":
+    ft.app(target=main)
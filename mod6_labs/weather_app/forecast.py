@@ -0,0 +1,252 @@
+"""Forecast time series stored as NumPy columns.
+
+A ``Forecast`` keeps one city's forecast points (OpenWeatherMap's 5 day /
+3 hour forecast) as contiguous arrays, one per field, instead of a list
+of dicts. ``ForecastTable`` concatenates many cities into shared columns
+so that daily aggregation, unit conversion and trend detection run as a
+handful of vectorized operations over every city at once.
+"""
+
+import copy
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from config import Config
+from units import IMPERIAL, METRIC, STANDARD, convert_speed, convert_temperature
+
+SECONDS_PER_DAY = 86400
+
+# Temperature change per hour above which a series is rising or falling
+# (0.1 °C/h is 2.4 °C over a day)
+TREND_THRESHOLDS = {METRIC: 0.1, STANDARD: 0.1, IMPERIAL: 0.18}
+
+RISING, STEADY, FALLING = 1, 0, -1
+TREND_LABELS = {RISING: "Warming", STEADY: "Steady", FALLING: "Cooling"}
+
+
+@dataclass(eq=False)
+class Forecast:
+    """Forecast points for one city, one NumPy column per field."""
+
+    __slots__ = (
+        "name", "country", "timezone", "times", "temp", "humidity",
+        "wind_speed", "pop", "units", "fetched_at",
+    )
+
+    name: str
+    country: str
+    timezone: int  # UTC offset in seconds, used to group points into local days
+    times: np.ndarray  # int64 unix seconds, ascending
+    temp: np.ndarray  # float32
+    humidity: np.ndarray  # float32, percent
+    wind_speed: np.ndarray  # float32
+    pop: np.ndarray  # float32 probability of precipitation, 0 to 1
+    units: str
+    fetched_at: float
+
+    @classmethod
+    def from_api(
+        cls, data: Dict, units: Optional[str] = None, fetched_at: Optional[float] = None
+    ) -> "Forecast":
+        """Build a forecast from an OpenWeatherMap forecast payload."""
+        entries = data.get("list") or []
+        n = len(entries)
+
+        def column(get, dtype=np.float32) -> np.ndarray:
+            return np.fromiter((get(e) for e in entries), dtype=dtype, count=n)
+
+        times = column(lambda e: e.get("dt", 0), np.int64)
+        order = np.argsort(times, kind="stable")
+        city = data.get("city", {})
+        return cls(
+            name=city.get("name", "Unknown"),
+            country=city.get("country", ""),
+            timezone=int(city.get("timezone", 0)),
+            times=times[order],
+            temp=column(lambda e: e.get("main", {}).get("temp", np.nan))[order],
+            humidity=column(lambda e: e.get("main", {}).get("humidity", np.nan))[order],
+            wind_speed=column(lambda e: e.get("wind", {}).get("speed", np.nan))[order],
+            pop=column(lambda e: e.get("pop", 0))[order],
+            units=units or Config.API_UNITS,
+            fetched_at=time.time() if fetched_at is None else fetched_at,
+        )
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the arrays."""
+        return sum(
+            a.nbytes for a in (self.times, self.temp, self.humidity, self.wind_speed, self.pop)
+        )
+
+    def converted(self, units: str) -> "Forecast":
+        """Return a copy with temperatures and wind speeds in ``units``."""
+        if units == self.units:
+            return self
+        return Forecast(
+            self.name, self.country, self.timezone, self.times,
+            convert_temperature(self.temp, self.units, units).astype(np.float32),
+            self.humidity,
+            convert_speed(self.wind_speed, self.units, units).astype(np.float32),
+            self.pop, units, self.fetched_at,
+        )
+
+    def daily(self) -> "DailyForecast":
+        """Per-day min/max/mean in the city's local time."""
+        return ForecastTable([self]).daily()
+
+    def trend(self, hours: float = 24) -> float:
+        """Least-squares temperature slope, in units per hour, over the next ``hours``."""
+        return float(ForecastTable([self]).trends(hours)[0])
+
+
+@dataclass(eq=False)
+class DailyForecast:
+    """Daily aggregates; row ``i`` is one day of city ``city[i]``."""
+
+    __slots__ = (
+        "city", "day", "temp_min", "temp_max", "temp_mean",
+        "humidity_mean", "wind_max", "pop_max",
+    )
+
+    city: np.ndarray  # index into the table's cities
+    day: np.ndarray  # datetime64[D], local date
+    temp_min: np.ndarray
+    temp_max: np.ndarray
+    temp_mean: np.ndarray
+    humidity_mean: np.ndarray
+    wind_max: np.ndarray
+    pop_max: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.day)
+
+    def for_city(self, index: int) -> "DailyForecast":
+        """The rows for one city of the table."""
+        rows = self.city == index
+        return DailyForecast(*(getattr(self, name)[rows] for name in self.__slots__))
+
+
+class ForecastTable:
+    """Forecasts for many cities concatenated into shared columns.
+
+    Points are stored city by city, each city in time order, so every
+    per-city or per-day group is a contiguous run and can be reduced
+    with ``ufunc.reduceat``.
+    """
+
+    def __init__(self, forecasts: Sequence[Forecast], units: Optional[str] = None):
+        units = units or (forecasts[0].units if forecasts else Config.API_UNITS)
+        forecasts = [f.converted(units) for f in forecasts]
+        self.units = units
+        self.names: List[str] = [f.name for f in forecasts]
+        lengths = np.array([len(f) for f in forecasts], dtype=np.int64)
+        self.starts = np.concatenate(([0], np.cumsum(lengths)[:-1])).astype(np.int64)
+        self.city = np.repeat(np.arange(len(forecasts), dtype=np.int32), lengths)
+        self.timezone = np.array([f.timezone for f in forecasts], dtype=np.int64)
+
+        def stack(name: str, dtype) -> np.ndarray:
+            if not forecasts:
+                return np.empty(0, dtype=dtype)
+            return np.concatenate([getattr(f, name) for f in forecasts]).astype(dtype, copy=False)
+
+        self.times = stack("times", np.int64)
+        self.temp = stack("temp", np.float32)
+        self.humidity = stack("humidity", np.float32)
+        self.wind_speed = stack("wind_speed", np.float32)
+        self.pop = stack("pop", np.float32)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(
+            a.nbytes for a in (
+                self.city, self.times, self.temp, self.humidity,
+                self.wind_speed, self.pop, self.starts, self.timezone,
+            )
+        )
+
+    def converted(self, units: str) -> "ForecastTable":
+        """Return a copy with every temperature and wind speed in ``units``."""
+        if units == self.units:
+            return self
+        table = copy.copy(self)
+        table.temp = convert_temperature(self.temp, self.units, units).astype(np.float32)
+        table.wind_speed = convert_speed(self.wind_speed, self.units, units).astype(np.float32)
+        table.units = units
+        return table
+
+    def daily(self) -> DailyForecast:
+        """Per-city, per-local-day aggregates for every city at once."""
+        n = len(self.times)
+        if n == 0:
+            empty = np.empty(0, dtype=np.float32)
+            return DailyForecast(
+                np.empty(0, dtype=np.int32), np.empty(0, dtype="datetime64[D]"),
+                empty, empty, empty, empty, empty, empty,
+            )
+        day = (self.times + self.timezone[self.city]) // SECONDS_PER_DAY
+        boundary = np.empty(n, dtype=bool)
+        boundary[0] = True
+        boundary[1:] = (self.city[1:] != self.city[:-1]) | (day[1:] != day[:-1])
+        starts = np.flatnonzero(boundary)
+        counts = np.diff(np.append(starts, n))
+        return DailyForecast(
+            city=self.city[starts],
+            day=day[starts].astype("datetime64[D]"),
+            temp_min=np.minimum.reduceat(self.temp, starts),
+            temp_max=np.maximum.reduceat(self.temp, starts),
+            temp_mean=np.add.reduceat(self.temp, starts) / counts,
+            humidity_mean=np.add.reduceat(self.humidity, starts) / counts,
+            wind_max=np.maximum.reduceat(self.wind_speed, starts),
+            pop_max=np.maximum.reduceat(self.pop, starts),
+        )
+
+    def trends(self, hours: float = 24) -> np.ndarray:
+        """
+        Least-squares temperature slope per city over its first ``hours``.
+
+        Returns:
+            float64 array of slopes in units per hour, 0 where a city has
+            fewer than two points in the window
+        """
+        cities = len(self.names)
+        if not len(self.times):
+            return np.zeros(cities)
+        first = self.times[self.starts[self.city]]
+        x = (self.times - first) / 3600.0
+        inside = x <= hours
+        city = self.city[inside]
+        x = x[inside]
+        y = self.temp[inside].astype(np.float64)
+
+        def total(weights=None) -> np.ndarray:
+            return np.bincount(city, weights=weights, minlength=cities)
+
+        n, sx, sy = total(), total(x), total(y)
+        sxx, sxy = total(x * x), total(x * y)
+        denominator = n * sxx - sx * sx
+        with np.errstate(divide="ignore", invalid="ignore"):
+            slope = (n * sxy - sx * sy) / denominator
+        return np.where(denominator > 0, slope, 0.0)
+
+    def trend_directions(self, hours: float = 24) -> np.ndarray:
+        """RISING, STEADY or FALLING per city."""
+        slopes = self.trends(hours)
+        threshold = TREND_THRESHOLDS.get(self.units, 0.1)
+        return np.select(
+            [slopes > threshold, slopes < -threshold], [RISING, FALLING], STEADY
+        ).astype(np.int8)
+
+
+def trend_label(forecast: Forecast, hours: float = 24) -> str:
+    """Describe the temperature trend of one forecast, e.g. ``"Warming"``."""
+    direction = ForecastTable([forecast]).trend_directions(hours)[0]
+    return TREND_LABELS[int(direction)]
@@ -0,0 +1,264 @@
+"""Local city index used to resolve names before calling the API.
+
+The index is a sorted binary file that is memory-mapped, so opening it
+costs almost nothing and only the pages touched by a lookup are read.
+Names are folded (accents removed, case-folded, punctuation collapsed)
+so that "Zurich", "zürich" and "ZÜRICH" are the same key.
+
+Build an index from the bundled sample or a GeoNames export:
+    python gazetteer.py data/cities.tsv data/cities.idx
+"""
+
+import csv
+import difflib
+import mmap
+import os
+import re
+import struct
+import sys
+import threading
+import unicodedata
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple, Union
+
+MAGIC = b"GAZ1"
+HEADER = struct.Struct("<4sI")  # magic, record count
+OFFSET = struct.Struct("<I")
+KEY_LENGTH = struct.Struct("<H")
+RECORD = struct.Struct("<IffI2sH")  # id, lat, lon, population, country, name length
+
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+@dataclass(frozen=True)
+class City:
+    """A city from the local index."""
+
+    __slots__ = ("id", "name", "country", "lat", "lon", "population")
+
+    id: int
+    name: str
+    country: str
+    lat: float
+    lon: float
+    population: int
+
+    @property
+    def query(self) -> str:
+        """Canonical ``q=`` value for the API, e.g. ``"London,GB"``."""
+        return f"{self.name},{self.country}"
+
+    def __str__(self) -> str:
+        return f"{self.name}, {self.country}"
+
+
+def fold(text: str) -> str:
+    """Fold a name for matching: strip accents, case and punctuation."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(_NON_WORD.sub(" ", stripped.casefold()).split())
+
+
+def read_source(path: Union[str, Path]) -> Iterator[Tuple[str, City]]:
+    """
+    Read (key, city) pairs from a city list.
+
+    Accepts the bundled format (id, name, country, lat, lon, population,
+    alternate names) or a GeoNames ``cities*.txt`` export. Every name and
+    alternate name becomes a key.
+    """
+    with open(path, encoding="utf-8", newline="") as f:
+        for row in csv.reader(f, delimiter="\t", quoting=csv.QUOTE_NONE):
+            if not row or row[0].startswith("#"):
+                continue
+            if len(row) >= 15:  # GeoNames: id, name, ascii, alternates, lat, lon, ...
+                city = City(int(row[0]), row[1], row[8], float(row[4]),
+                            float(row[5]), int(row[14] or 0))
+                names = [row[1], row[2], *row[3].split(",")]
+            else:
+                city = City(int(row[0]), row[1], row[2], float(row[3]),
+                            float(row[4]), int(row[5] or 0))
+                names = [row[1], *(row[6].split(",") if len(row) > 6 else [])]
+            for key in {fold(name) for name in names if name.strip()}:
+                if key:
+                    yield key, city
+
+
+def build_index(source: Union[str, Path], target: Union[str, Path]) -> int:
+    """
+    Write a sorted, memory-mappable index for a city list.
+
+    Returns:
+        Number of keys written
+    """
+    entries = sorted(
+        ((key.encode("utf-8"), city) for key, city in read_source(source)),
+        key=lambda entry: (entry[0], -entry[1].population),
+    )
+    records = bytearray()
+    offsets = bytearray()
+    for key, city in entries:
+        offsets += OFFSET.pack(len(records))
+        name = city.name.encode("utf-8")
+        records += KEY_LENGTH.pack(len(key)) + key
+        records += RECORD.pack(city.id, city.lat, city.lon, city.population,
+                               city.country.encode("ascii")[:2].ljust(2), len(name))
+        records += name
+    # Other sessions or processes may be mapping the old index: build the
+    # new one aside and rename it into place, so a reader sees one or the other
+    target = Path(target)
+    temporary = target.with_name(f".{target.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(temporary, "wb") as f:
+            f.write(HEADER.pack(MAGIC, len(entries)))
+            f.write(offsets)
+            f.write(records)
+        os.replace(temporary, target)
+    except BaseException:
+        temporary.unlink(missing_ok=True)
+        raise
+    return len(entries)
+
+
+class Gazetteer:
+    """Prefix-searchable city index backed by a memory-mapped file."""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self._count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} is not a city index")
+        self._records = HEADER.size + self._count * OFFSET.size
+
+    @classmethod
+    def load(
+        cls, source: Union[str, Path], index: Union[str, Path, None] = None
+    ) -> "Gazetteer":
+        """Open the index for ``source``, (re)building it if it is out of date."""
+        source = Path(source)
+        index = Path(index) if index else source.with_suffix(".idx")
+        if not index.exists() or index.stat().st_mtime < source.stat().st_mtime:
+            build_index(source, index)
+        return cls(index)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def close(self):
+        self._map.close()
+
+    def _offset(self, i: int) -> int:
+        return self._records + OFFSET.unpack_from(self._map, HEADER.size + i * OFFSET.size)[0]
+
+    def _key(self, i: int) -> bytes:
+        start = self._offset(i)
+        (length,) = KEY_LENGTH.unpack_from(self._map, start)
+        start += KEY_LENGTH.size
+        return self._map[start:start + length]
+
+    def _city(self, i: int) -> City:
+        start = self._offset(i)
+        (length,) = KEY_LENGTH.unpack_from(self._map, start)
+        start += KEY_LENGTH.size + length
+        city_id, lat, lon, population, country, name_length = RECORD.unpack_from(
+            self._map, start
+        )
+        start += RECORD.size
+        name = self._map[start:start + name_length].decode("utf-8")
+        return City(city_id, name, country.decode("ascii").strip(),
+                    round(lat, 4), round(lon, 4), population)
+
+    def _lower_bound(self, key: bytes) -> int:
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def lookup(self, name: str, country: Optional[str] = None) -> Optional[City]:
+        """
+        Find a city by exact (folded) name.
+
+        Args:
+            name: City name in any case or accenting
+            country: Optional ISO country code to choose between namesakes
+
+        Returns:
+            The most populous match, or None
+        """
+        key = fold(name).encode("utf-8")
+        i = self._lower_bound(key)
+        while i < self._count and self._key(i) == key:
+            city = self._city(i)
+            if country is None or city.country == country.upper():
+                return city
+            i += 1
+        return None
+
+    def prefix(self, text: str, limit: int = 10) -> List[City]:
+        """Return up to ``limit`` distinct cities whose names start with ``text``."""
+        key = fold(text).encode("utf-8")
+        cities, seen = [], set()
+        i = self._lower_bound(key)
+        while i < self._count and len(cities) < limit and self._key(i).startswith(key):
+            city = self._city(i)
+            if city.id not in seen:
+                seen.add(city.id)
+                cities.append(city)
+            i += 1
+        return cities
+
+    def resolve(self, query: str) -> Optional[City]:
+        """Resolve free text such as ``"london"`` or ``"London, CA"`` to a city."""
+        name, _, country = query.partition(",")
+        country = country.strip()
+        if len(country) != 2:
+            return self.lookup(query)
+        return self.lookup(name, country)
+
+    def suggest(self, query: str, limit: int = 3) -> List[City]:
+        """
+        Suggest known cities for a name that did not resolve.
+
+        Leading words are tried first ("Bolinao Pangasinan" suggests
+        Bolinao), then close spellings among names sharing a prefix.
+        """
+        words = fold(query.partition(",")[0]).split()
+        suggestions: List[City] = []
+        for n in range(len(words) - 1, 0, -1):
+            city = self.lookup(" ".join(words[:n]))
+            if city is not None:
+                suggestions.append(city)
+                break
+
+        folded = " ".join(words)
+        candidates = {}
+        for length in (3, 2, 1):
+            key = folded[:length].encode("utf-8")
+            i = self._lower_bound(key)
+            while i < self._count and len(candidates) < 200 and self._key(i).startswith(key):
+                candidates.setdefault(self._key(i).decode("utf-8"), i)
+                i += 1
+            if len(candidates) >= limit * 4:
+                break
+        for match in difflib.get_close_matches(folded, candidates, n=limit * 2, cutoff=0.6):
+            suggestions.append(self._city(candidates[match]))
+
+        unique, seen = [], set()
+        for city in suggestions:
+            if city.id not in seen:
+                seen.add(city.id)
+                unique.append(city)
+        return unique[:limit]
+
+
+if __name__ == "__main__":
+    source = sys.argv[1] if len(sys.argv) > 1 else "data/cities.tsv"
+    target = sys.argv[2] if len(sys.argv) > 2 else str(Path(source).with_suffix(".idx"))
+    print(f"Wrote {build_index(source, target)} keys to {target}")
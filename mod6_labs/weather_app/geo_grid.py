@@ -0,0 +1,115 @@
+"""Geohash grid helpers for snapping coordinates to cache cells."""
+
+import math
+from typing import List, Tuple
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_DECODE = {c: i for i, c in enumerate(_BASE32)}
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def encode(lat: float, lon: float, precision: int = 5) -> str:
+    """
+    Encode a point as a geohash.
+
+    Args:
+        lat: Latitude in degrees
+        lon: Longitude in degrees
+        precision: Number of characters; 5 is a cell of about 5 x 5 km,
+            6 about 1.2 x 0.6 km
+
+    Returns:
+        The geohash of the cell containing the point
+    """
+    lat_lo, lat_hi = -90.0, 90.0
+    lon_lo, lon_hi = -180.0, 180.0
+    chars = []
+    bits = 0
+    value = 0
+    even = True  # geohash interleaves bits starting with longitude
+    while len(chars) < precision:
+        if even:
+            mid = (lon_lo + lon_hi) / 2
+            if lon >= mid:
+                value = (value << 1) | 1
+                lon_lo = mid
+            else:
+                value <<= 1
+                lon_hi = mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if lat >= mid:
+                value = (value << 1) | 1
+                lat_lo = mid
+            else:
+                value <<= 1
+                lat_hi = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits = 0
+            value = 0
+    return "".join(chars)
+
+
+def decode(geohash: str) -> Tuple[float, float, float, float]:
+    """
+    Decode a geohash to its cell center.
+
+    Returns:
+        (lat, lon, lat_error, lon_error), where the errors are half the
+        cell height and width in degrees
+    """
+    lat_lo, lat_hi = -90.0, 90.0
+    lon_lo, lon_hi = -180.0, 180.0
+    even = True
+    for char in geohash:
+        value = _DECODE[char]
+        for shift in range(4, -1, -1):
+            bit = (value >> shift) & 1
+            if even:
+                mid = (lon_lo + lon_hi) / 2
+                if bit:
+                    lon_lo = mid
+                else:
+                    lon_hi = mid
+            else:
+                mid = (lat_lo + lat_hi) / 2
+                if bit:
+                    lat_lo = mid
+                else:
+                    lat_hi = mid
+            even = not even
+    return (
+        (lat_lo + lat_hi) / 2,
+        (lon_lo + lon_hi) / 2,
+        (lat_hi - lat_lo) / 2,
+        (lon_hi - lon_lo) / 2,
+    )
+
+
+def neighbors(geohash: str) -> List[str]:
+    """Return the (up to) eight cells surrounding a geohash cell."""
+    lat, lon, lat_err, lon_err = decode(geohash)
+    cells = []
+    for d_lat in (-1, 0, 1):
+        for d_lon in (-1, 0, 1):
+            if d_lat == 0 and d_lon == 0:
+                continue
+            n_lat = lat + d_lat * 2 * lat_err
+            if not -90 < n_lat < 90:
+                continue  # no cells beyond the poles
+            n_lon = (lon + d_lon * 2 * lon_err + 180) % 360 - 180
+            cells.append(encode(n_lat, n_lon, len(geohash)))
+    return cells
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two points in kilometres."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
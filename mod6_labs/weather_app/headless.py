@@ -0,0 +1,125 @@
+"""Run WeatherApp without a Flet client, for startup and UI benchmarks.
+
+``RecordingConnection`` processes page commands the way Flet's local
+socket server does and serializes every batch it would send to the
+client, but only records the batch count, size and send time.
+
+Measure startup of a fresh interpreter:
+    python headless.py [process start time]
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from importlib.metadata import version
+from typing import Dict, List, Optional, Tuple
+
+import flet as ft
+
+# The classes below are flet internals, not public API; they are only
+# known to work with the version pinned in requirements.txt.
+FLET_VERSION = "0.28.3"
+if version("flet") != FLET_VERSION:
+    raise ImportError(
+        f"headless.py needs flet=={FLET_VERSION} (installed: {version('flet')}); "
+        "it relies on private flet.core APIs. Install requirements.txt."
+    )
+
+from flet.core.local_connection import LocalConnection  # noqa: E402
+from flet.core.protocol import (  # noqa: E402
+    ClientActions,
+    ClientMessage,
+    CommandEncoder,
+    PageCommandResponsePayload,
+    PageCommandsBatchResponsePayload,
+)
+
+
+class RecordingConnection(LocalConnection):
+    """A page connection that counts what would be sent to the client."""
+
+    def __init__(self):
+        super().__init__()
+        self.batches: List[Tuple[float, int, int]] = []  # (time, bytes, commands)
+        self.first_paint_at: Optional[float] = None  # first batch adding controls
+
+    def _record(self, messages: List[ClientMessage], commands: int):
+        if not messages:
+            return
+        message = ClientMessage(ClientActions.PAGE_CONTROLS_BATCH, messages)
+        size = len(json.dumps(message, cls=CommandEncoder, separators=(",", ":")))
+        self.batches.append((time.time(), size, commands))
+
+    def send_command(self, session_id: str, command):
+        result, message = self._process_command(command)
+        self._record([message] if message else [], 1)
+        return PageCommandResponsePayload(result=result, error="")
+
+    def send_commands(self, session_id: str, commands):
+        results, messages = [], []
+        for command in commands:
+            result, message = self._process_command(command)
+            if command.name in ("add", "get"):
+                results.append(result)
+            if message:
+                messages.append(message)
+        self._record(messages, len(commands))
+        if self.first_paint_at is None and any(c.name == "add" for c in commands):
+            self.first_paint_at = time.time()
+        return PageCommandsBatchResponsePayload(results=results, error="")
+
+    @property
+    def bytes_sent(self) -> int:
+        return sum(size for _, size, _ in self.batches)
+
+    def reset(self):
+        self.batches.clear()
+        self.first_paint_at = None
+
+
+def headless_page(loop: Optional[asyncio.AbstractEventLoop] = None):
+    """Return (page, connection) for a page bound to ``loop``."""
+    connection = RecordingConnection()
+    page = ft.Page(connection, "headless", loop=loop or asyncio.get_running_loop())
+    return page, connection
+
+
+async def measure_startup(started: float) -> Dict:
+    """
+    Start WeatherApp on a headless page and time its first frame.
+
+    Args:
+        started: ``time.time()`` when the process was launched
+
+    Returns:
+        Milliseconds from ``started`` to the first frame showing the UI
+        and to the services being ready, and which of the modules meant
+        to load after the first frame ``import main`` pulled in
+    """
+    import main
+
+    deferred = ("weather_service", "weather_store", "gazetteer", "sqlite3", "dotenv")
+    heavy = sorted(name for name in deferred if name in sys.modules)
+    page, connection = headless_page()
+    # Flet calls a synchronous main() on a worker thread, as done here
+    app = await asyncio.to_thread(main.WeatherApp, page)
+    first_frame = connection.first_paint_at
+    await app.ready.wait()
+    ready = time.time()
+    await app.on_shutdown(None)
+    return {
+        "first_frame_ms": round((first_frame - started) * 1000, 1),
+        "ready_ms": round((ready - started) * 1000, 1),
+        "imported_by_main": heavy,
+        "frames": len(connection.batches),
+    }
+
+
+if __name__ == "__main__":
+    started = float(sys.argv[1]) if len(sys.argv) > 1 else time.time()
+    os.environ.setdefault("OPENWEATHER_API_KEY", "startup-benchmark")
+    os.chdir(tempfile.mkdtemp())  # history and cache files go to a scratch dir
+    print(json.dumps(asyncio.run(measure_startup(started))))
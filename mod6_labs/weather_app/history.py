@@ -0,0 +1,154 @@
+"""Search history ranked by frecency (how often and how recently a city was searched)."""
+
+import bisect
+import heapq
+import math
+import time
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from config import Config
+
+
+class HistoryEntry(NamedTuple):
+    """One searched city. Immutable, so a saved snapshot never changes under a writer."""
+
+    city: str  # as shown in the dropdown
+    count: int  # number of searches
+    last_used: float  # unix time of the latest search
+    rank: float  # log of the sum of exp(decay * t) over every search time t
+
+
+def _key(city: str) -> str:
+    return " ".join(city.casefold().split())
+
+
+def _log_add(a: float, b: float) -> float:
+    """log(exp(a) + exp(b)) without overflow."""
+    high, low = (a, b) if a >= b else (b, a)
+    return high + math.log1p(math.exp(low - high))
+
+
+class SearchHistory:
+    """Searched cities ranked by exponentially decaying use counts.
+
+    Each search is worth 1 when made and half as much every ``half_life``
+    seconds after. Rather than decaying every entry as time passes, each
+    entry keeps ``rank``, the log of its searches' weights measured against
+    a fixed origin: decay scales every entry by the same factor, so ranks
+    compare the same way at any moment and a repeat search updates one
+    entry in O(1). Names are also kept in a sorted list so that prefix
+    filtering is a binary search; the price is that a city's first search
+    inserts into that list, which is O(n) (a list insert, cheap at the
+    default 5,000 entries), and going past ``max_entries`` prunes with an
+    O(n log n) re-sort, amortized over the 10% of entries it drops.
+
+    Args:
+        entries: Entries to start with, e.g. from ``from_json``
+        half_life: Seconds for a search to lose half its weight
+        max_entries: When exceeded, the lowest ranked 10% are dropped
+    """
+
+    def __init__(
+        self,
+        entries: Iterable[HistoryEntry] = (),
+        half_life: Optional[float] = None,
+        max_entries: Optional[int] = None,
+    ):
+        self.half_life = half_life or Config.HISTORY_HALF_LIFE
+        self.max_entries = max_entries or Config.HISTORY_MAX_ENTRIES
+        self._decay = math.log(2) / self.half_life
+        self._entries: Dict[str, HistoryEntry] = {}
+        self._keys: List[str] = []  # sorted, for prefix ranges
+        for entry in entries:
+            self._entries[_key(entry.city)] = entry
+        self._keys = sorted(self._entries)
+
+    @classmethod
+    def from_json(cls, data, now: Optional[float] = None, **kwargs) -> "SearchHistory":
+        """
+        Build a history from ``to_json()`` output.
+
+        A plain list of names (the old format, most recent first) is also
+        accepted; each becomes one search, a second apart, in that order.
+        """
+        now = time.time() if now is None else now
+        history = cls(**kwargs)
+        entries = []
+        for i, item in enumerate(data if isinstance(data, list) else []):
+            if isinstance(item, str):
+                used = now - i
+                entries.append(HistoryEntry(item, 1, used, history._decay * used))
+            elif isinstance(item, list) and len(item) == 4:
+                city, count, last_used, rank = item
+                entries.append(HistoryEntry(str(city), int(count), float(last_used), float(rank)))
+        return cls(entries, history.half_life, history.max_entries)
+
+    def to_json(self) -> List[HistoryEntry]:
+        """A snapshot for saving; entries serialize as ``[city, count, last_used, rank]``."""
+        return list(self._entries.values())
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, city: str) -> bool:
+        return _key(city) in self._entries
+
+    def get(self, city: str) -> Optional[HistoryEntry]:
+        return self._entries.get(_key(city))
+
+    def record(self, city: str, now: Optional[float] = None) -> HistoryEntry:
+        """
+        Count a search for ``city`` (shown as given) and return its entry.
+
+        O(1) for a city already in the history, O(n) for a new one.
+        """
+        now = time.time() if now is None else now
+        key = _key(city)
+        weight = self._decay * now
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = HistoryEntry(city, 1, now, weight)
+            bisect.insort(self._keys, key)
+        else:
+            entry = HistoryEntry(city, entry.count + 1, now, _log_add(entry.rank, weight))
+        self._entries[key] = entry
+        if len(self._entries) > self.max_entries:
+            self._prune(int(self.max_entries * 0.9))
+        return entry
+
+    def remove(self, city: str) -> bool:
+        key = _key(city)
+        if self._entries.pop(key, None) is None:
+            return False
+        del self._keys[bisect.bisect_left(self._keys, key)]
+        return True
+
+    def clear(self):
+        self._entries.clear()
+        self._keys.clear()
+
+    def _prune(self, keep: int):
+        kept = heapq.nlargest(keep, self._entries.items(), key=lambda item: item[1].rank)
+        self._entries = dict(kept)
+        self._keys = sorted(self._entries)
+
+    def score(self, entry: HistoryEntry, now: Optional[float] = None) -> float:
+        """The entry's decayed search count at ``now``."""
+        now = time.time() if now is None else now
+        return math.exp(entry.rank - self._decay * now)
+
+    def top(self, limit: int = 10, prefix: str = "") -> List[HistoryEntry]:
+        """
+        The highest ranked entries, optionally only names starting with ``prefix``.
+
+        Returns:
+            Up to ``limit`` entries, best first
+        """
+        prefix = _key(prefix)
+        if prefix:
+            start = bisect.bisect_left(self._keys, prefix)
+            end = bisect.bisect_left(self._keys, prefix + "\U0010ffff", start)
+            candidates = (self._entries[key] for key in self._keys[start:end])
+        else:
+            candidates = self._entries.values()
+        return heapq.nlargest(limit, candidates, key=lambda entry: entry.rank)
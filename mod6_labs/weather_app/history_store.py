@@ -0,0 +1,116 @@
+"""Write-behind JSON persistence for the search history and the watchlist."""
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Optional, Union
+
+from config import Config
+
+
+class HistoryStore:
+    """Saves the search history (or another small JSON value, such as the
+    watchlist) to a JSON file without blocking the caller.
+
+    ``save()`` only records the latest value; a timer thread writes it
+    ``flush_interval`` seconds later, so a burst of searches costs one
+    write. Writes go to a temporary file that is then renamed over the
+    old one, so a crash leaves either the previous or the new history,
+    never a partial file. A file that cannot be parsed is moved aside to
+    ``<name>.corrupt`` and the history starts empty. Call ``close()`` on
+    shutdown to write anything still pending.
+
+    ``save()`` may be called from any thread. The value passed is written
+    later, so it must not be modified afterwards (pass a copy).
+    """
+
+    def __init__(self, path: Union[str, Path], flush_interval: Optional[float] = None):
+        self.path = Path(path)
+        self.flush_interval = (
+            Config.HISTORY_FLUSH_INTERVAL if flush_interval is None else flush_interval
+        )
+        self._lock = threading.Lock()  # guards the pending value and the timer
+        self._write_lock = threading.Lock()  # one write at a time, in order
+        self._pending: Any = None
+        self._dirty = False
+        self._timer: Optional[threading.Timer] = None
+        self.saves = 0
+        self.writes = 0
+        self.failures = 0
+        self.recovered = False  # a corrupt file was moved aside by load()
+
+    def load(self, default: Any = None) -> Any:
+        """
+        Read the saved history.
+
+        Returns:
+            The parsed JSON, or ``default`` if there is no file or it was
+            corrupt
+        """
+        try:
+            text = self.path.read_text(encoding="utf-8")
+        except FileNotFoundError:
+            return default
+        try:
+            return json.loads(text)
+        except ValueError:  # includes UnicodeDecodeError
+            self.path.replace(self.path.with_name(self.path.name + ".corrupt"))
+            self.recovered = True
+            return default
+
+    def save(self, data: Any):
+        """Schedule ``data`` to be written; replaces any value not yet written."""
+        with self._lock:
+            self._pending = data
+            self._dirty = True
+            self.saves += 1
+            if self._timer is None:
+                self._timer = threading.Timer(self.flush_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    @property
+    def dirty(self) -> bool:
+        return self._dirty
+
+    def flush(self) -> bool:
+        """
+        Write the pending value now. Blocking.
+
+        Returns:
+            True if something was written
+        """
+        with self._write_lock:
+            with self._lock:
+                if not self._dirty:
+                    return False
+                data, self._pending, self._dirty = self._pending, None, False
+                self._timer = None  # a save from here on starts a new timer
+            try:
+                self._write(data)
+            except (OSError, TypeError, ValueError):
+                self.failures += 1
+                with self._lock:
+                    if not self._dirty:  # retry with the next save or close()
+                        self._pending, self._dirty = data, True
+                return False
+            self.writes += 1
+            return True
+
+    def _write(self, data: Any):
+        encoded = json.dumps(data, separators=(",", ":")).encode("utf-8")
+        temporary = self.path.with_name(f".{self.path.name}.tmp")
+        with open(temporary, "wb") as f:
+            f.write(encoded)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, self.path)
+
+    def close(self) -> bool:
+        """Cancel the timer and write anything pending. Blocking."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        return self.flush()
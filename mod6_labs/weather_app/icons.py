@@ -0,0 +1,216 @@
+"""Local cache for OpenWeatherMap condition icons.
+
+OpenWeatherMap uses 18 icon codes (``01d`` to ``50n``), so every icon the
+app can show fits in well under a megabyte. Downloaded icons are written
+to a directory named by the SHA-256 of their bytes, with ``index.json``
+mapping codes to digests, and are kept in memory once read. An optional
+bundle directory of ``<code>@2x.png`` files shipped with the app is used
+before anything is downloaded.
+
+``image_source()`` never does I/O: it returns ``src_base64`` for an icon
+in memory and falls back to the remote URL otherwise, so rendering a
+result does not wait for an image.
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Union
+
+import httpx
+
+from config import Config
+
+ICON_CODES = tuple(
+    f"{group}{time_of_day}"
+    for group in ("01", "02", "03", "04", "09", "10", "11", "13", "50")
+    for time_of_day in "dn"
+)
+
+_CODE = re.compile(r"^\d\d[dn]$")
+
+
+def _check(code: str):
+    if not _CODE.match(code):
+        raise ValueError(f"Invalid icon code: {code!r}")
+
+
+class IconCache:
+    """Icon bytes in memory, backed by content-addressed files on disk.
+
+    Args:
+        directory: Where downloaded icons and their index are kept
+        url: Icon URL template with a ``{code}`` placeholder
+        bundle_dir: Directory of ``<code>@2x.png`` files to use first
+        client: HTTP client for downloads; one is created if omitted
+    """
+
+    def __init__(
+        self,
+        directory: Union[str, Path],
+        url: Optional[str] = None,
+        bundle_dir: Optional[Union[str, Path]] = None,
+        client: Optional[httpx.AsyncClient] = None,
+    ):
+        self.directory = Path(directory)
+        self.url = url or Config.ICON_URL
+        self.bundle_dir = Path(bundle_dir or Config.ICON_BUNDLE_DIR)
+        self._client = client
+        self._owns_client = client is None
+        self._index: Dict[str, str] = {}  # code -> SHA-256 of the PNG
+        self._bytes: Dict[str, bytes] = {}
+        self._base64: Dict[str, str] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._lock = threading.Lock()  # downloads are stored from worker threads
+        self.downloads = 0
+
+    @property
+    def _index_file(self) -> Path:
+        return self.directory / "index.json"
+
+    def _file(self, digest: str) -> Path:
+        return self.directory / f"{digest}.png"
+
+    def __contains__(self, code: str) -> bool:
+        return code in self._bytes
+
+    def load(self) -> int:
+        """
+        Read the bundled and downloaded icons into memory.
+
+        Blocking; call it off the UI thread (e.g. with ``asyncio.to_thread``).
+
+        Returns:
+            Number of icons available locally
+        """
+        try:
+            self._index = json.loads(self._index_file.read_text())
+        except (OSError, ValueError):
+            self._index = {}
+        for code in ICON_CODES:
+            data = self._read(code)
+            if data is not None:
+                self._remember(code, data)
+        return len(self._bytes)
+
+    def _read(self, code: str) -> Optional[bytes]:
+        bundled = self.bundle_dir / f"{code}@2x.png"
+        digest = self._index.get(code)
+        for path in (bundled, self._file(digest) if digest else None):
+            if path is None:
+                continue
+            try:
+                data = path.read_bytes()
+            except OSError:
+                continue
+            if path is bundled or hashlib.sha256(data).hexdigest() == digest:
+                return data
+        return None
+
+    def _remember(self, code: str, data: bytes):
+        self._bytes[code] = data
+        self._base64[code] = base64.b64encode(data).decode("ascii")
+
+    def get(self, code: str) -> Optional[bytes]:
+        """The PNG bytes of an icon, if held in memory."""
+        _check(code)
+        return self._bytes.get(code)
+
+    def remote_url(self, code: str) -> str:
+        _check(code)
+        return self.url.format(code=code)
+
+    def image_source(self, code: str) -> Dict[str, str]:
+        """
+        Keyword arguments for ``ft.Image`` showing an icon.
+
+        Returns:
+            ``{"src_base64": ...}`` if the icon is cached, else ``{"src": url}``
+        """
+        _check(code)
+        encoded = self._base64.get(code)
+        if encoded is not None:
+            return {"src_base64": encoded}
+        return {"src": self.remote_url(code)}
+
+    async def fetch(self, code: str) -> Optional[bytes]:
+        """
+        Return an icon, downloading and storing it if it is not cached.
+
+        Concurrent calls for the same code share one download. Network
+        errors are not raised: the icon stays remote and None is returned.
+        """
+        data = self.get(code)
+        if data is not None:
+            return data
+        future = self._inflight.get(code)
+        if future is None:
+            future = asyncio.ensure_future(self._download(code))
+            self._inflight[code] = future
+            future.add_done_callback(lambda _: self._inflight.pop(code, None))
+        return await asyncio.shield(future)
+
+    async def _download(self, code: str) -> Optional[bytes]:
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=Config.TIMEOUT)
+        try:
+            response = await self._client.get(self.remote_url(code))
+            response.raise_for_status()
+        except httpx.HTTPError:
+            return None
+        data = response.content
+        self.downloads += 1
+        try:
+            await asyncio.to_thread(self._store, code, data)
+        except OSError:
+            pass  # kept in memory for this session only
+        self._remember(code, data)
+        return data
+
+    def _store(self, code: str, data: bytes):
+        """Write the icon under its digest and record it in the index."""
+        digest = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            path = self._file(digest)
+            if not path.exists():  # identical icons share one file
+                _write_atomic(path, data)
+            self._index[code] = digest
+            _write_atomic(
+                self._index_file, json.dumps(self._index, sort_keys=True).encode("utf-8")
+            )
+
+    async def prefetch(self, codes: Iterable[str] = ICON_CODES, concurrency: int = 4) -> int:
+        """
+        Download every missing icon in ``codes``.
+
+        Returns:
+            Number of icons downloaded
+        """
+        missing = [code for code in codes if code not in self._bytes]
+        semaphore = asyncio.Semaphore(concurrency)
+        before = self.downloads
+
+        async def one(code: str):
+            async with semaphore:
+                await self.fetch(code)
+
+        await asyncio.gather(*(one(code) for code in missing))
+        return self.downloads - before
+
+    async def aclose(self):
+        """Close the HTTP client if this cache created it."""
+        if self._client is not None and self._owns_client:
+            await self._client.aclose()
+        self._client = None
+
+
+def _write_atomic(path: Path, data: bytes):
+    temporary = path.with_name(f".{path.name}.tmp")
+    temporary.write_bytes(data)
+    os.replace(temporary, path)
@@ -2,23 +2,212 @@
 """Weather Application using Flet v0.28.3"""
 
 import asyncio
+import threading
+import time
+from pathlib import Path
+from typing import Any, NamedTuple, Optional
 import flet as ft
-from weather_service import WeatherService
 from config import Config
-import json
-from pathlib import Path
+from history import SearchHistory
+from history_store import HistoryStore
+from models import WeatherSnapshot
+from search import Search, SearchController
+from units import IMPERIAL, METRIC, SPEED_SYMBOLS, TEMPERATURE_SYMBOLS, convert_snapshots
+
+# httpx, sqlite3 and the city index are imported in open_services(), after
+# the window has painted, so they do not delay the first frame.
+
+# Every session shares Config.API_KEY, so they share one token bucket too;
+# created on first use because the rate comes from the loaded config
+_rate_limiter = None
+
+
+def shared_rate_limiter():
+    global _rate_limiter
+    if _rate_limiter is None:
+        from rate_limiter import RateLimiter
+
+        _rate_limiter = RateLimiter(
+            rate=Config.RATE_LIMIT_PER_MINUTE / 60,
+            burst=Config.RATE_LIMIT_BURST,
+            policy=Config.RATE_LIMIT_POLICY,
+        )
+    return _rate_limiter
+
+
+class SharedServices(NamedTuple):
+    service: Any  # WeatherService
+    store: Any  # WeatherStore
+    observations: Any  # ObservationStore
+    metrics: Any  # Metrics, or None when disabled
+    metrics_file: Path
+
+
+# Sessions share one weather service too, so several asking for the same
+# city at once share one upstream request and one response cache. The
+# first session opens it and the last one to close releases it.
+_services: Optional[SharedServices] = None
+_service_users = 0
+_services_lock = threading.Lock()
+
+
+def acquire_shared_services(directory: Path) -> SharedServices:
+    """
+    Open the shared service and its stores, or return the open ones.
+
+    Blocking; every call must be matched by ``release_shared_services``.
+    """
+    global _services, _service_users
+    with _services_lock:
+        if _services is None:
+            _services = open_services(directory)
+        _service_users += 1
+        return _services
+
+
+async def release_shared_services():
+    """Close the shared service and its stores once no session uses them."""
+    global _services, _service_users
+    with _services_lock:
+        _service_users -= 1
+        if _service_users > 0:
+            return
+        services, _services = _services, None
+    await services.service.aclose()
+    services.store.close()
+    await asyncio.to_thread(services.observations.close)
+    if services.metrics is not None:
+        services.metrics_file.write_text(services.metrics.to_prometheus())
+
+
+def open_services(directory: Path) -> SharedServices:
+    from gazetteer import Gazetteer
+    from metrics import Metrics
+    from observation_store import ObservationStore
+    from weather_service import WeatherService
+    from weather_store import WeatherStore
+
+    gazetteer = Gazetteer.load(Config.GAZETTEER_SOURCE)
+    # One pooled HTTP client for the lifetime of the app, with responses
+    # persisted next to the search history for restarts and offline use
+    store = WeatherStore(directory / Config.CACHE_DB_FILE, max_bytes=Config.CACHE_DB_MAX_BYTES)
+    try:
+        observations = ObservationStore(directory / Config.OBSERVATIONS_DB_FILE)
+    except Exception:
+        store.close()
+        raise
+    metrics = Metrics() if Config.METRICS_ENABLED else None
+    service = WeatherService(
+        store=store,
+        observations=observations,
+        limiter=shared_rate_limiter(),
+        gazetteer=gazetteer,
+        metrics=metrics,
+    ).open()
+    return SharedServices(service, store, observations, metrics, directory / Config.METRICS_FILE)
 
 
 class WeatherApp:
-    """Main Weather Application class."""
+    """Main Weather Application class.
+
+    The page is built and painted first; configuration, history and the
+    weather service are loaded afterwards by ``start_services`` on a
+    worker thread. Searches made before that finishes wait for it.
+    """
 
     def __init__(self, page: ft.Page):
         self.page = page
-        self.weather_service = WeatherService()
         self.history_file = Path("search_history.json")
-        self.search_history = self.load_history()
+        self.watchlist_file = self.history_file.with_name(Config.WATCHLIST_FILE)
+        self.search_history = SearchHistory()
+        self.history_filter = ""  # text typed so far; the dropdown shows matches
+        self.history_chips = {}  # city -> chip, reused while the city stays listed
+        self.history_store = HistoryStore(self.history_file)
+        self.watchlist_store = HistoryStore(self.watchlist_file)
+        self.weather_service = None  # shared by every session; see acquire_shared_services
+        self.icons = None
+        self.icon_prefetch = None
+        self.watchlist = None
+        self.watchlist_rows = {}
+        self.current_city = None
+        self.current_snapshot = None  # in Config.API_UNITS, as fetched
+        self.current_forecast = None
+        self.forecast_task = None
+        self.units = Config.UNITS  # shown units; switching never refetches
+        self.ready = asyncio.Event()
+        self._closed = False  # on_shutdown has run
+        self.search = SearchController(
+            lookup=self.lookup_weather,
+            on_start=self.on_search_start,
+            on_result=self.on_search_result,
+            on_error=self.on_search_error,
+            accept=self.is_known_city,
+        )
         self.setup_page()
         self.build_ui()
+        self.page.run_task(self.start_services)
+
+    async def start_services(self):
+        """Load configuration, history and the weather service after first paint.
+
+        ``ready`` is set even if loading fails, so waiting searches and
+        shutdown still finish; the error is shown instead.
+        """
+        try:
+            try:
+                startup_error, watched = await asyncio.to_thread(self.load_services)
+            except Exception as e:  # e.g. an unreadable database or city index
+                await self.close_services()  # whatever was opened before the failure
+                startup_error, watched = f"Could not start: {e}", []
+            self.unit_button.text = TEMPERATURE_SYMBOLS.get(self.units, self.units)
+            self.update_history_column()
+            self.clear_history_button.visible = bool(self.search_history)
+            if startup_error:
+                self.city_input.disabled = True
+                self.set_error(startup_error)
+            else:
+                self.watchlist.add_many(watched)
+                self.refresh_watchlist_panel()
+                asyncio.create_task(self.watchlist.run())
+                if Config.ICON_PREFETCH:
+                    self.icon_prefetch = asyncio.create_task(self.icons.prefetch())
+            self.page.update()
+        finally:
+            self.ready.set()
+
+    def load_services(self):
+        """
+        Do the slow part of startup; runs on a worker thread.
+
+        Returns:
+            (configuration error message or None, watched cities)
+        """
+        Config.load()
+        self.units = Config.UNITS
+        self.search_history = self.load_history()
+        watched = self.load_watchlist()
+        try:
+            Config.validate()
+        except ValueError as e:
+            return str(e), watched
+
+        from icons import IconCache
+        from watchlist import Watchlist
+
+        # Shared with the other sessions: lookups, cache and stores
+        self.weather_service = acquire_shared_services(self.history_file.parent).service
+        # Condition icons are shown from memory; missing ones download once
+        self.icons = IconCache(self.history_file.with_name(Config.ICON_CACHE_DIR))
+        self.icons.load()
+        # Watched cities refresh in the background, behind interactive lookups
+        self.watchlist = Watchlist(
+            # Bypass the cache: a stale hit would revalidate out of sight of on_change
+            fetch=lambda city: self.weather_service.get_weather(
+                city, background=True, refresh=True
+            ),
+            on_change=self.on_watchlist_change,
+        )
+        return None, watched
 
     def setup_page(self):
         """Configure page settings."""
@@ -30,6 +219,9 @@ class WeatherApp:
         self.page.window.height = Config.APP_HEIGHT
         self.page.window.resizable = False
         self.page.window.center()
+        self.page.on_disconnect = self.on_shutdown
+        self.page.on_close = self.on_shutdown
+        self.page.on_app_lifecycle_state_change = self.on_lifecycle_change
 
     def build_ui(self):
         """Build the user interface."""
@@ -48,6 +240,13 @@ class WeatherApp:
             on_click=self.toggle_theme,
         )
 
+        # Unit button; converts what is on screen without new requests
+        self.unit_button = ft.TextButton(
+            TEMPERATURE_SYMBOLS[self.units],
+            tooltip="Switch units",
+            on_click=self.toggle_units,
+        )
+
         # City input field
         self.city_input = ft.TextField(
             label="Enter city name",
@@ -56,6 +255,7 @@ class WeatherApp:
             prefix_icon=ft.Icons.LOCATION_CITY,
             autofocus=True,
             on_submit=self.on_search,
+            on_change=self.on_city_typed,
             expand=True,
             on_focus=self.show_history_dropdown,
             on_blur=self.hide_history_dropdown,
@@ -72,14 +272,83 @@ class WeatherApp:
             spacing=5,
         )
 
+        # Watch toggle for the city on the weather card
+        self.watch_button = ft.IconButton(
+            icon=ft.Icons.STAR_BORDER,
+            tooltip="Watch this city",
+            on_click=self.toggle_watch,
+        )
+
+        # Weather card, built once; display_weather only changes its values
+        self.city_text = ft.Text(size=24, weight=ft.FontWeight.BOLD, color=ft.Colors.BLACK)
+        self.icon_image = ft.Image(width=100, height=100)
+        self.description_text = ft.Text(size=20, italic=True, color=ft.Colors.BLACK)
+        self.temp_text = ft.Text(size=48, weight=ft.FontWeight.BOLD, color=ft.Colors.BLUE_900)
+        self.feels_like_text = ft.Text(size=16, color=ft.Colors.BLACK)
+        self.status_text = ft.Text(size=12, italic=True, color=ft.Colors.ORANGE_800, visible=False)
+        humidity_card = self.create_info_card(ft.Icons.WATER_DROP, "Humidity", "")
+        wind_card = self.create_info_card(ft.Icons.AIR, "Wind Speed", "")
+        self.humidity_text = humidity_card.content.controls[2]
+        self.wind_text = wind_card.content.controls[2]
+
         # Weather display container
         self.weather_container = ft.Container(
+            content=ft.Column(
+                [
+                    ft.Row(
+                        [self.city_text, self.watch_button],
+                        alignment=ft.MainAxisAlignment.CENTER,
+                    ),
+                    ft.Row(
+                        [self.icon_image, self.description_text],
+                        alignment=ft.MainAxisAlignment.CENTER,
+                    ),
+                    self.temp_text,
+                    self.feels_like_text,
+                    self.status_text,
+                    ft.Divider(),
+                    ft.Row(
+                        [humidity_card, wind_card],
+                        alignment=ft.MainAxisAlignment.SPACE_EVENLY,
+                    ),
+                ],
+                spacing=10,
+                horizontal_alignment=ft.CrossAxisAlignment.CENTER,
+            ),
             visible=False,
             bgcolor=ft.Colors.BLUE_50,
             border_radius=10,
             padding=20,
         )
 
+        # Watched cities, kept current in the background
+        self.watchlist_column = ft.Column(controls=[], spacing=5)
+        self.watchlist_panel = ft.Container(
+            content=ft.Column(
+                [
+                    ft.Text("Watchlist", size=16, weight=ft.FontWeight.BOLD),
+                    self.watchlist_column,
+                ],
+                spacing=5,
+            ),
+            padding=10,
+            visible=False,
+        )
+
+        # Daily forecast strip below the weather card
+        self.forecast_strip = ft.Row(
+            controls=[self.create_forecast_day() for _ in range(Config.FORECAST_DAYS)],
+            alignment=ft.MainAxisAlignment.CENTER,
+            spacing=6,
+        )
+        self.forecast_trend = ft.Text("", size=12, italic=True)
+        self.forecast_panel = ft.Column(
+            [self.forecast_strip, self.forecast_trend],
+            horizontal_alignment=ft.CrossAxisAlignment.CENTER,
+            spacing=4,
+            visible=False,
+        )
+
         # Error message
         self.error_message = ft.Text("", color=ft.Colors.RED_700, visible=False)
 
@@ -91,7 +360,7 @@ class WeatherApp:
             "Clear History",
             on_click=self.clear_history,
             color=ft.Colors.BLUE,
-            visible=bool(self.search_history),
+            visible=False,
         )
         
 
@@ -135,13 +404,18 @@ class WeatherApp:
             ft.Column(
                 [
                     self.title,
-                    self.theme_button,
+                    ft.Row(
+                        [self.theme_button, self.unit_button],
+                        alignment=ft.MainAxisAlignment.CENTER,
+                    ),
                     ft.Divider(height=20, color=ft.Colors.TRANSPARENT),
                     input_and_history,  # input + history
                     ft.Divider(height=20, color=ft.Colors.TRANSPARENT),
                     self.loading,
                     self.error_message,
                     self.weather_container,
+                    self.forecast_panel,
+                    self.watchlist_panel,
                 ],
                 scroll=ft.ScrollMode.AUTO,
                 expand=True,
@@ -149,82 +423,162 @@ class WeatherApp:
             )
         )
 
-        # Populate initial history
-        self.update_history_column()
-
     def on_search(self, e):
         """Handle search button click or enter key press."""
         city = self.city_input.value.strip()
         if city:
-            self.add_to_history(city)
-            self.page.run_task(self.get_weather)
+            self.page.run_task(self.search_city, city)
         else:
             self.show_error("Please enter a city name")
 
-    async def get_weather(self):
-        """Fetch and display weather data."""
-        city = self.city_input.value.strip()
+    async def search_city(self, city: str):
+        """Record a search once history has loaded, then fetch its weather."""
+        await self.ready.wait()
+        self.add_to_history(city)
+        await self.get_weather(city)
+
+    async def get_weather(self, city: Optional[str] = None):
+        """Fetch and display weather for ``city`` (default: the input); the newest search wins."""
+        city = (self.city_input.value if city is None else city).strip()
         if not city:
             self.show_error("Please enter a city name")
             return
+        await self.ready.wait()
+        if self.weather_service is None:
+            return  # configuration or startup error already shown
+        self.search.submit(city)
+        await self.search.wait()
+
+    def on_city_typed(self, e):
+        self.page.run_task(self.on_city_text, self.city_input.value)
+
+    async def on_city_text(self, text: str):
+        """Filter the history dropdown and look up a known city once typing pauses."""
+        self.history_filter = text.strip()
+        self.update_history_column()
+        if Config.SEARCH_TYPEAHEAD and self.weather_service is not None:
+            self.search.type(text)
+        self.page.update()
+
+    def is_known_city(self, query: str) -> bool:
+        gazetteer = self.weather_service.gazetteer
+        return gazetteer is not None and gazetteer.resolve(query) is not None
+
+    async def lookup_weather(self, city: str, typeahead: bool) -> WeatherSnapshot:
+        # Typeahead lookups queue behind searches the user asked for
+        return await self.weather_service.get_weather(city, background=typeahead)
 
+    def on_search_start(self, search: Search):
         self.loading.visible = True
+        if not search.typeahead:
+            self.error_message.visible = False
+            self.weather_container.visible = False
+            self.forecast_panel.visible = False
+            self.current_forecast = None
+        self.page.update()
+
+    def on_search_result(self, search: Search, snapshot: WeatherSnapshot):
+        if search.query.title() != self.current_city:
+            self.forecast_panel.visible = False  # until this city's forecast arrives
+            self.current_forecast = None
+        self.current_city = search.query.title()
+        self.loading.visible = False
         self.error_message.visible = False
-        self.weather_container.visible = False
+        self.display_weather(snapshot)
+        self.forecast_task = self.page.run_task(self.show_forecast, search.query)
         self.page.update()
 
-        try:
-            weather_data = await self.weather_service.get_weather(city)
-            self.display_weather(weather_data)
-        except Exception as e:
-            self.show_error(str(e))
-        finally:
-            self.loading.visible = False
-            self.page.update()
+    def on_search_error(self, search: Search, error: Exception):
+        self.loading.visible = False
+        if not search.typeahead:  # a half-typed name is not worth an error
+            self.set_error(str(error))
+        self.page.update()
 
-    def display_weather(self, data: dict):
-        """Display weather information."""
-        city_name = data.get("name", "Unknown")
-        country = data.get("sys", {}).get("country", "")
-        temp = data.get("main", {}).get("temp", 0)
-        feels_like = data.get("main", {}).get("feels_like", 0)
-        humidity = data.get("main", {}).get("humidity", 0)
-        description = data.get("weather", [{}])[0].get("description", "").title()
-        icon_code = data.get("weather", [{}])[0].get("icon", "01d")
-        wind_speed = data.get("wind", {}).get("speed", 0)
-
-        self.weather_container.content = ft.Column(
-            [
-                ft.Text(f"{city_name}, {country}", size=24, weight=ft.FontWeight.BOLD, color=ft.Colors.BLACK),
-                ft.Row(
-                    [
-                        ft.Image(
-                            src=f"https://openweathermap.org/img/wn/{icon_code}@2x.png",
-                            width=100,
-                            height=100,
-                        ),
-                        ft.Text(description, size=20, italic=True, color=ft.Colors.BLACK),
-                    ],
-                    alignment=ft.MainAxisAlignment.CENTER,
-                ),
-                ft.Text(f"{temp:.1f}°C", size=48, weight=ft.FontWeight.BOLD, color=ft.Colors.BLUE_900),
-                ft.Text(f"Feels like {feels_like:.1f}°C", size=16, color=ft.Colors.BLACK),
-                ft.Divider(),
-                ft.Row(
-                    [
-                        self.create_info_card(ft.Icons.WATER_DROP, "Humidity", f"{humidity}%"),
-                        self.create_info_card(ft.Icons.AIR, "Wind Speed", f"{wind_speed} m/s"),
-                    ],
-                    alignment=ft.MainAxisAlignment.SPACE_EVENLY,
-                ),
-            ],
-            spacing=10,
-            horizontal_alignment=ft.CrossAxisAlignment.CENTER,
-        )
+    def display_weather(self, snapshot: WeatherSnapshot):
+        """Show a snapshot on the weather card; the caller updates the page."""
+        self.current_snapshot = snapshot
+        if snapshot.stale:
+            updated = time.strftime("%H:%M", time.localtime(snapshot.fetched_at))
+            status = f"Offline - showing data from {updated}"
+        else:
+            status = ""
+
+        self.city_text.value = f"{snapshot.name}, {snapshot.country}"
+        source = self.icon_source(snapshot.icon)
+        self.icon_image.src = source.get("src")
+        self.icon_image.src_base64 = source.get("src_base64")
+        self.description_text.value = snapshot.description.title()
+        self.status_text.value = status
+        self.status_text.visible = bool(status)
+        self.humidity_text.value = f"{snapshot.humidity}%"
+        self.fill_weather_values(self.in_display_units(snapshot))
+        self.update_watch_button()
         self.weather_container.visible = True
         self.clear_history_button.visible = True
+
+    def icon_source(self, code: str):
+        """Image arguments for an icon; a missing one is fetched for next time."""
+        source = self.icons.image_source(code)
+        if "src" in source:
+            self.page.run_task(self.icons.fetch, code)
+        return source
+
+    def in_display_units(self, snapshot: WeatherSnapshot) -> WeatherSnapshot:
+        return convert_snapshots([snapshot], Config.API_UNITS, self.units)[0]
+
+    def fill_weather_values(self, snapshot: WeatherSnapshot):
+        """Set the unit-dependent texts of the weather card (already converted)."""
+        symbol = TEMPERATURE_SYMBOLS[self.units]
+        self.temp_text.value = f"{snapshot.temp:.1f}{symbol}"
+        self.feels_like_text.value = f"Feels like {snapshot.feels_like:.1f}{symbol}"
+        self.wind_text.value = f"{snapshot.wind_speed:.1f} {SPEED_SYMBOLS[self.units]}"
+
+    async def show_forecast(self, city: str):
+        """Fetch the forecast for the displayed city and fill the strip."""
+        try:
+            forecast = await self.weather_service.get_forecast(city, background=True)
+        except Exception:
+            return  # the strip is optional; current conditions are shown
+        if city.title() != self.current_city:
+            return  # another city was searched meanwhile
+        self.current_forecast = forecast
+        self.fill_forecast_strip()
         self.page.update()
 
+    def fill_forecast_strip(self):
+        """Fill the strip from the current forecast in the shown units."""
+        from forecast import trend_label
+
+        forecast = self.current_forecast.converted(self.units)
+        daily = forecast.daily()
+        days = min(len(daily), Config.FORECAST_DAYS)
+        for i, day in enumerate(self.forecast_strip.controls):
+            day.visible = i < days
+            if day.visible:
+                weekday, high_low, rain = day.content.controls
+                weekday.value = daily.day[i].astype(object).strftime("%a")
+                high_low.value = f"{daily.temp_max[i]:.0f}° / {daily.temp_min[i]:.0f}°"
+                rain.value = f"{daily.pop_max[i]:.0%} rain"
+        self.forecast_trend.value = f"{trend_label(forecast)} over the next 24 hours"
+        self.forecast_panel.visible = days > 0
+
+    def create_forecast_day(self):
+        """Create one day of the forecast strip; fill_forecast_strip sets its texts."""
+        return ft.Container(
+            content=ft.Column(
+                [
+                    ft.Text("", size=12, weight=ft.FontWeight.BOLD),
+                    ft.Text("", size=12),
+                    ft.Text("", size=10, color=ft.Colors.BLUE_700),
+                ],
+                spacing=2,
+                horizontal_alignment=ft.CrossAxisAlignment.CENTER,
+            ),
+            padding=6,
+            border_radius=8,
+            bgcolor=ft.Colors.BLUE_50,
+        )
+
     def create_info_card(self, icon, label, value):
         """Create an info card for weather details."""
         return ft.Container(
@@ -245,10 +599,41 @@ class WeatherApp:
 
     def show_error(self, message: str):
         """Display error message."""
+        self.set_error(message)
+        self.page.update()
+
+    def set_error(self, message: str):
+        """Put the page in the error state; the caller updates the page."""
         self.error_message.value = f"❌ {message}"
         self.error_message.visible = True
         self.weather_container.visible = False
-        self.page.update()
+        self.forecast_panel.visible = False
+        self.current_forecast = None
+
+    async def on_shutdown(self, e):
+        """Save pending history and release pooled connections when the session ends.
+
+        Bound to both on_disconnect and on_close; only the first call does anything.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        await self.ready.wait()
+        await asyncio.to_thread(self.history_store.close)
+        await asyncio.to_thread(self.watchlist_store.close)
+        await self.close_services()
+
+    async def close_services(self):
+        """Stop and release whatever load_services opened; searches stop working."""
+        if self.watchlist is not None:
+            await self.watchlist.stop()
+        if self.icon_prefetch is not None:
+            self.icon_prefetch.cancel()
+        if self.icons is not None:
+            await self.icons.aclose()
+        if self.weather_service is not None:
+            await release_shared_services()
+        self.weather_service = self.watchlist = self.icons = None
 
     def toggle_theme(self, e):
         """Toggle light/dark theme."""
@@ -261,51 +646,61 @@ class WeatherApp:
         self.page.update()
 
     def load_history(self):
-        if self.history_file.exists():
-            with open(self.history_file, "r") as f:
-                return json.load(f)
-        return []
+        return SearchHistory.from_json(self.history_store.load([]))
 
     def save_history(self):
-        with open(self.history_file, "w") as f:
-            json.dump(self.search_history, f)
+        """Queue the history for a write-behind save off the UI thread."""
+        self.history_store.save(self.search_history.to_json())
 
     def add_to_history(self, city: str):
-        city = city.title()
-        if city in self.search_history:
-            self.search_history.remove(city)
-        self.search_history.insert(0, city)
-        self.search_history = self.search_history[:10]
+        self.search_history.record(city.title())
         self.save_history()
         self.update_history_column()
 
     def update_history_column(self):
-        """Update the recent searches panel below input."""
-        self.history_column.controls = [
-            ft.Row(
-                [
-                    ft.Container(
-                        content=ft.Text(city, size=14, color=ft.Colors.WHITE),
-                        padding=ft.Padding(5, 2, 5, 2),
-                        bgcolor=ft.Colors.BLUE_700,
-                        border_radius=10,
-                        on_click=lambda e, c=city: self.select_history_city(c),
-                    )
-                ],
-            )
-            for city in self.search_history
-        ]
-        self.page.update()
+        """Show the best ranked searches matching the input; the caller updates the page.
+
+        Chips are kept per city and reused, so the page update only carries
+        chips that were added, removed or moved.
+        """
+        entries = self.search_history.top(Config.HISTORY_DROPDOWN_SIZE, self.history_filter)
+        controls = []
+        for entry in entries:
+            chip = self.history_chips.get(entry.city)
+            if chip is None:
+                chip = self.history_chips[entry.city] = self.create_history_chip(entry.city)
+            controls.append(chip)
+        if len(self.history_chips) > 5 * Config.HISTORY_DROPDOWN_SIZE:
+            shown = {entry.city for entry in entries}
+            self.history_chips = {
+                city: chip for city, chip in self.history_chips.items() if city in shown
+            }
+        current = self.history_column.controls
+        if len(controls) != len(current) or any(a is not b for a, b in zip(controls, current)):
+            self.history_column.controls = controls
+
+    def create_history_chip(self, city: str):
+        return ft.Row(
+            [
+                ft.Container(
+                    content=ft.Text(city, size=14, color=ft.Colors.WHITE),
+                    padding=ft.Padding(5, 2, 5, 2),
+                    bgcolor=ft.Colors.BLUE_700,
+                    border_radius=10,
+                    on_click=lambda e: self.select_history_city(city),
+                )
+            ],
+        )
 
     def select_history_city(self, city):
         """Select a city from history."""
         self.city_input.value = city
-        self.page.update()
-        self.page.run_task(self.get_weather)
+        self.page.run_task(self.search_city, city)  # shown with the loading state
 
-    def clear_history(self, e):
+    async def clear_history(self, e):
         """Clear search history."""
-        self.search_history = []
+        self.search_history.clear()
+        self.history_chips.clear()
         self.save_history()
         self.update_history_column()
         self.clear_history_button.visible = False
@@ -324,22 +719,131 @@ class WeatherApp:
         self.history_dropdown.visible = False
         self.page.update()
 
-    def toggle_units(self, e):
-        if self.current_unit == "metric":
-            self.current_unit = "imperial"
-            self.current_temp = (self.current_temp * 9 / 5) + 32
-            self.unit_button.text = "°F"
+    def load_watchlist(self):
+        watched = self.watchlist_store.load([])
+        if not isinstance(watched, list):
+            return []
+        return [city for city in watched if isinstance(city, str)]
+
+    def save_watchlist(self):
+        """Queue the watchlist for a write-behind save, like the history."""
+        self.watchlist_store.save(list(self.watchlist))
+
+    async def on_lifecycle_change(self, e):
+        """Pause background refreshes while the window is hidden."""
+        if self.watchlist is None:
+            return
+        if e.state in (ft.AppLifecycleState.HIDE, ft.AppLifecycleState.PAUSE):
+            self.watchlist.pause()
+        elif e.state in (ft.AppLifecycleState.SHOW, ft.AppLifecycleState.RESUME):
+            self.watchlist.resume()
+
+    async def toggle_watch(self, e):
+        """Add the displayed city to the watchlist, or remove it.
+
+        Async, like every handler that touches the watchlist: it schedules
+        on the page's event loop, so it must not run on a worker thread.
+        """
+        city = self.current_city
+        if not city:
+            return
+        if city in self.watchlist:
+            self.watchlist.remove(city)
         else:
-            self.current_unit = "metric"
-            self.current_temp = (self.current_temp - 32) * 5 / 9
-            self.unit_button.text = "°C"
+            # Already on screen, so the first refresh can wait a full interval
+            self.watchlist.add(
+                city, delay=self.watchlist.interval, snapshot=self.current_snapshot
+            )
+        self.save_watchlist()
+        self.update_watch_button()
+        self.refresh_watchlist_panel()
+        self.page.update()
+
+    def update_watch_button(self):
+        watched = self.current_city in self.watchlist
+        self.watch_button.icon = ft.Icons.STAR if watched else ft.Icons.STAR_BORDER
+        self.watch_button.tooltip = "Stop watching" if watched else "Watch this city"
+
+    def refresh_watchlist_panel(self):
+        """Rebuild the watchlist rows after cities are added or removed.
+
+        The caller updates the page.
+        """
+        rows = {}
+        for city in self.watchlist:
+            row = self.watchlist_rows.get(city) or self.create_watchlist_row(city)
+            rows[city] = row
+        self.fill_watchlist_rows(rows)
+        self.watchlist_rows = rows
+        self.watchlist_column.controls = list(rows.values())
+        self.watchlist_panel.visible = bool(rows)
+
+    def create_watchlist_row(self, city: str):
+        return ft.Row(
+            [
+                ft.TextButton(
+                    city,
+                    on_click=lambda e, c=city: self.select_history_city(c),
+                    expand=True,
+                ),
+                ft.Text("…", size=14, weight=ft.FontWeight.BOLD, color=ft.Colors.BLUE_900),
+                ft.Text("", size=12, italic=True),
+                ft.IconButton(
+                    icon=ft.Icons.CLOSE,
+                    tooltip="Remove",
+                    icon_size=16,
+                    on_click=lambda e, c=city: self.page.run_task(self.unwatch, c),
+                ),
+            ],
+            vertical_alignment=ft.CrossAxisAlignment.CENTER,
+        )
+
+    def fill_watchlist_rows(self, rows):
+        """Fill rows (city -> row) from the watchlist, converting all at once."""
+        cities = [city for city in rows if self.watchlist.latest(city) is not None]
+        snapshots = convert_snapshots(
+            [self.watchlist.latest(city) for city in cities], Config.API_UNITS, self.units
+        )
+        for city, snapshot in zip(cities, snapshots):
+            self.fill_watchlist_row(rows[city], snapshot)
+
+    def fill_watchlist_row(self, row, snapshot):
+        """Set one row's texts from a snapshot already in the shown units."""
+        _, temp_text, status_text, _ = row.controls
+        temp_text.value = f"{snapshot.temp:.1f}{TEMPERATURE_SYMBOLS[self.units]}"
+        status_text.value = "offline" if snapshot.stale else snapshot.description
+
+    async def unwatch(self, city: str):
+        self.watchlist.remove(city)
+        self.save_watchlist()
+        self.update_watch_button()
         self.refresh_watchlist_panel()
-        self.update_display()
+        self.page.update()
 
-    def update_display(self):
-        if hasattr(self, "temp_text"):
-            self.temp_text.value = f"{self.current_temp:.1f}°{'C' if self.current_unit=='metric' else 'F'}"
-            self.page.update()
+    def on_watchlist_change(self, city: str, snapshot: WeatherSnapshot):
+        """Push a changed snapshot from the scheduler into the UI."""
+        row = self.watchlist_rows.get(city)
+        if row is not None:
+            self.fill_watchlist_row(row, self.in_display_units(snapshot))
+        if city == self.current_city and self.weather_container.visible:
+            self.display_weather(snapshot)
+        self.page.update()
+
+    def toggle_units(self, e):
+        """Switch between °C and °F.
+
+        Everything is fetched and cached in Config.API_UNITS, so this only
+        converts what is already on screen: no requests, one page update.
+        """
+        self.units = METRIC if self.units == IMPERIAL else IMPERIAL
+        self.unit_button.text = TEMPERATURE_SYMBOLS[self.units]
+        if self.current_snapshot is not None:
+            self.fill_weather_values(self.in_display_units(self.current_snapshot))
+        if self.watchlist is not None:
+            self.fill_watchlist_rows(self.watchlist_rows)
+        if self.current_forecast is not None:
+            self.fill_forecast_strip()
+        self.page.update()
 
 
 def main(page: ft.Page):
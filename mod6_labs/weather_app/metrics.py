@@ -0,0 +1,148 @@
+"""Low-overhead in-process metrics for the weather service.
+
+Counters and fixed-bucket histograms are kept in plain dicts keyed by
+metric name and labels. They can be dumped as JSON or in the Prometheus
+text exposition format. WeatherService only records into a ``Metrics``
+instance when one is passed in; without one, instrumentation is skipped.
+"""
+
+import json
+from bisect import bisect_left
+from typing import Dict, List, Sequence, Tuple
+
+# Seconds; covers a cache hit (sub-millisecond) up to a slow API call
+DEFAULT_BUCKETS = (
+    0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """Counts observations into fixed upper-bound buckets."""
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Sequence[float] = DEFAULT_BUCKETS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)  # last bucket is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile as the upper bound of the bucket reaching it."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= target:
+                return bound
+        return float("inf")
+
+    def to_dict(self) -> Dict:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "buckets": {str(b): c for b, c in zip(self.bounds + ("+Inf",), self.counts)},
+        }
+
+
+class Metrics:
+    """Registry of labelled counters and histograms."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS, prefix: str = "weather_"):
+        self.buckets = tuple(buckets)
+        self.prefix = prefix
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._histograms: Dict[str, Dict[Labels, Histogram]] = {}
+
+    def increment(self, name: str, amount: float = 1, **labels: str):
+        """Add to a counter."""
+        series = self._counters.setdefault(name, {})
+        key = tuple(sorted(labels.items()))
+        series[key] = series.get(key, 0) + amount
+
+    def observe(self, name: str, value: float, **labels: str):
+        """Record a value, usually a duration in seconds, into a histogram."""
+        series = self._histograms.setdefault(name, {})
+        key = tuple(sorted(labels.items()))
+        histogram = series.get(key)
+        if histogram is None:
+            histogram = series[key] = Histogram(self.buckets)
+        histogram.observe(value)
+
+    def counter(self, name: str, **labels: str) -> float:
+        """Current value of a counter (0 if never incremented)."""
+        return self._counters.get(name, {}).get(tuple(sorted(labels.items())), 0)
+
+    def histogram(self, name: str, **labels: str) -> Histogram:
+        """The histogram for a name and labels (empty if never observed)."""
+        found = self._histograms.get(name, {}).get(tuple(sorted(labels.items())))
+        return found or Histogram(self.buckets)
+
+    def reset(self):
+        self._counters.clear()
+        self._histograms.clear()
+
+    def to_dict(self) -> Dict:
+        def series(labels: Labels) -> str:
+            return ",".join(f"{k}={v}" for k, v in labels) or "_"
+
+        return {
+            "counters": {
+                name: {series(labels): value for labels, value in values.items()}
+                for name, values in self._counters.items()
+            },
+            "histograms": {
+                name: {series(labels): h.to_dict() for labels, h in values.items()}
+                for name, values in self._histograms.items()
+            },
+        }
+
+    def to_json(self, indent: int = 2) -> str:
+        return json.dumps(self.to_dict(), indent=indent)
+
+    def to_prometheus(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        lines: List[str] = []
+        for name, values in sorted(self._counters.items()):
+            full = self.prefix + name
+            lines.append(f"# TYPE {full} counter")
+            for labels, value in values.items():
+                lines.append(f"{full}{_format_labels(labels)} {value:g}")
+        for name, values in sorted(self._histograms.items()):
+            full = self.prefix + name
+            lines.append(f"# TYPE {full} histogram")
+            for labels, h in values.items():
+                cumulative = 0
+                for bound, count in zip(h.bounds + (float("inf"),), h.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                    lines.append(
+                        f"{full}_bucket{_format_labels(labels + (('le', le),))} {cumulative}"
+                    )
+                lines.append(f"{full}_sum{_format_labels(labels)} {h.sum:.6f}")
+                lines.append(f"{full}_count{_format_labels(labels)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape_label(str(v))}"' for k, v in labels) + "}"
+
+
+def _escape_label(value: str) -> str:
+    """Escape a label value as the text format requires: backslash, quote, newline."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -0,0 +1,262 @@
+"""Local stand-in for the OpenWeatherMap weather, forecast and icon endpoints.
+
+Used by the benchmarks and offline tests so that WeatherService can be
+exercised without an API key or network access. Latency, error rate and
+payload size are configurable so the same server can model a fast, slow
+or flaky upstream.
+"""
+
+import json
+import math
+import random
+import struct
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+# A latency model returns the delay, in seconds, for one response
+Latency = Callable[[random.Random], float]
+
+
+def fixed(seconds: float) -> Latency:
+    """Every response takes the same time."""
+    return lambda rng: seconds
+
+
+def uniform(low: float, high: float) -> Latency:
+    """Delays spread evenly between low and high seconds."""
+    return lambda rng: rng.uniform(low, high)
+
+
+def lognormal(median: float, sigma: float = 0.5) -> Latency:
+    """Long-tailed delays around a median, like a real network service."""
+    mu = math.log(median)
+    return lambda rng: rng.lognormvariate(mu, sigma)
+
+
+def make_payload(
+    city: str = "London", lat: float = 51.51, lon: float = -0.13, padding: int = 0
+) -> Dict:
+    """Build a response shaped like OpenWeatherMap's current weather JSON."""
+    payload = {
+        "coord": {"lon": lon, "lat": lat},
+        "weather": [
+            {"id": 803, "main": "Clouds", "description": "broken clouds", "icon": "04d"}
+        ],
+        "base": "stations",
+        "main": {
+            "temp": 15.2,
+            "feels_like": 14.6,
+            "temp_min": 13.9,
+            "temp_max": 16.4,
+            "pressure": 1012,
+            "humidity": 72,
+        },
+        "visibility": 10000,
+        "wind": {"speed": 4.1, "deg": 240},
+        "clouds": {"all": 75},
+        "dt": 1700000000,
+        "sys": {"country": "GB", "sunrise": 1699975000, "sunset": 1700008000},
+        "timezone": 0,
+        "id": 2643743,
+        "name": city,
+        "cod": 200,
+    }
+    if padding:
+        payload["padding"] = "x" * padding  # bulk up the body like larger payloads
+    return payload
+
+
+def make_forecast_payload(
+    city: str = "London", points: int = 40, start: int = 1700000000, step: int = 10800
+) -> Dict:
+    """Build a response shaped like OpenWeatherMap's 5 day / 3 hour forecast JSON."""
+    entries = []
+    for i in range(points):
+        hour = (start + i * step) // 3600 % 24
+        temp = round(12 + 0.05 * i + 4 * math.sin((hour - 9) / 24 * 2 * math.pi), 2)
+        entries.append({
+            "dt": start + i * step,
+            "main": {"temp": temp, "feels_like": temp - 0.8, "humidity": 60 + i % 25},
+            "weather": [{"id": 803, "description": "broken clouds", "icon": "04d"}],
+            "wind": {"speed": round(3 + (i % 7) * 0.4, 2), "deg": 240},
+            "pop": round((i % 10) / 10, 2),
+        })
+    return {
+        "cod": "200",
+        "cnt": points,
+        "list": entries,
+        "city": {"name": city, "country": "GB", "timezone": 0},
+    }
+
+
+def make_icon(code: str = "04d") -> bytes:
+    """Build a small solid-colour PNG standing in for the icon ``code``."""
+    size = 4
+    shade = sum(code.encode()) % 256
+    rows = b"".join(b"\x00" + bytes((shade, 128, 255 - shade)) * size for _ in range(size))
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        body = kind + data
+        return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body))
+
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", size, size, 8, 2, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(rows))
+        + chunk(b"IEND", b"")
+    )
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Request handler; keeps connections alive like the real API."""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.request_count += 1
+            failing = server.failures_left != 0
+            if server.failures_left > 0:
+                server.failures_left -= 1
+            failing = failing or server.rng.random() < server.error_rate
+            delay = server.latency(server.rng) if server.latency else 0.0
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        city = query.get("q", ["London"])[0]
+
+        if delay > 0:
+            time.sleep(delay)
+
+        if failing:
+            status = server.failure_status
+            body = {"cod": str(status), "message": "service unavailable"}
+        elif city.lower() in server.unknown_cities:
+            status, body = 404, {"cod": "404", "message": "city not found"}
+        elif url.path.startswith("/img/wn/"):
+            status, body = 200, make_icon(url.path.rsplit("/", 1)[-1].split("@")[0])
+        elif url.path.endswith("/forecast"):
+            status, body = 200, make_forecast_payload(city)
+        elif "lat" in query and "lon" in query:
+            status, body = 200, make_payload(
+                "Coordinates", float(query["lat"][0]), float(query["lon"][0]),
+                padding=server.payload_padding,
+            )
+        else:
+            status, body = 200, make_payload(city, padding=server.payload_padding)
+
+        if isinstance(body, bytes):
+            data, content_type = body, "image/png"
+        else:
+            data, content_type = json.dumps(body).encode("utf-8"), "application/json"
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        """Silence per-request logging."""
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256  # accept bursts of new connections without SYN drops
+
+
+class MockWeatherServer:
+    """Threaded local HTTP server answering like OpenWeatherMap.
+
+    Usage:
+        with MockWeatherServer(latency=lognormal(0.05), error_rate=0.01) as server:
+            service.base_url = server.url
+
+    Args:
+        latency: Delay model for each response (see fixed/uniform/lognormal)
+        error_rate: Fraction of requests answered with ``failure_status``
+        payload_padding: Extra bytes added to every successful body
+        seed: Seed for latency and error sampling, for repeatable runs
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: Optional[Latency] = None,
+        error_rate: float = 0.0,
+        payload_padding: int = 0,
+        seed: Optional[int] = None,
+    ):
+        self._httpd = _Server((host, port), _Handler)
+        self._httpd.lock = threading.Lock()
+        self._httpd.request_count = 0
+        self._httpd.unknown_cities = {"invalidcityxyz123"}
+        self._httpd.failures_left = 0
+        self._httpd.failure_status = 503
+        self._httpd.latency = latency
+        self._httpd.error_rate = error_rate
+        self._httpd.payload_padding = payload_padding
+        self._httpd.rng = random.Random(seed)
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        )
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/data/2.5/weather"
+
+    @property
+    def forecast_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/data/2.5/forecast"
+
+    @property
+    def icon_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/img/wn/{{code}}@2x.png"
+
+    @property
+    def request_count(self) -> int:
+        return self._httpd.request_count
+
+    def fail_next(self, count: int = 1, status: int = 503):
+        """
+        Answer the next ``count`` requests with an error status.
+
+        Args:
+            count: Number of requests to fail; -1 fails until ``recover()``
+            status: HTTP status code to answer with
+        """
+        with self._httpd.lock:
+            self._httpd.failures_left = count
+            self._httpd.failure_status = status
+
+    def recover(self):
+        """Stop failing requests."""
+        self.fail_next(0)
+
+    def set_latency(self, latency: Optional[Latency]):
+        """Change the delay model for subsequent requests."""
+        with self._httpd.lock:
+            self._httpd.latency = latency
+
+    def start(self) -> "MockWeatherServer":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "MockWeatherServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
@@ -0,0 +1,76 @@
+"""Typed weather data passed from the service to the UI."""
+
+import json
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, Optional, Union
+
+try:  # optional faster JSON decoder
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def decode_json(content: Union[bytes, str]) -> Dict:
+    """Decode a JSON body, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+@dataclass(frozen=True)
+class WeatherSnapshot:
+    """The fields of a current weather response that the app uses.
+
+    Parsed once at the service boundary; cached and stored copies keep
+    only these values instead of the whole API payload. Temperatures and
+    wind speed are in ``Config.API_UNITS``; see ``units.convert_snapshots``.
+    """
+
+    __slots__ = (
+        "name", "country", "temp", "feels_like", "humidity",
+        "description", "icon", "wind_speed", "timestamp",
+        "fetched_at", "stale",
+    )
+
+    name: str
+    country: str
+    temp: float
+    feels_like: float
+    humidity: int
+    description: str
+    icon: str
+    wind_speed: float
+    timestamp: int  # observation time reported by the API (unix seconds)
+    fetched_at: float  # when we received it (unix seconds)
+    stale: bool  # True when served from storage because the API was unreachable
+
+    @classmethod
+    def from_api(cls, data: Dict, fetched_at: Optional[float] = None) -> "WeatherSnapshot":
+        """Build a snapshot from an OpenWeatherMap current weather payload."""
+        main = data.get("main", {})
+        weather = (data.get("weather") or [{}])[0]
+        return cls(
+            name=data.get("name", "Unknown"),
+            country=data.get("sys", {}).get("country", ""),
+            temp=main.get("temp", 0),
+            feels_like=main.get("feels_like", 0),
+            humidity=main.get("humidity", 0),
+            description=weather.get("description", ""),
+            icon=weather.get("icon", "01d"),
+            wind_speed=data.get("wind", {}).get("speed", 0),
+            timestamp=data.get("dt", 0),
+            fetched_at=time.time() if fetched_at is None else fetched_at,
+            stale=False,
+        )
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> Optional["WeatherSnapshot"]:
+        """Rebuild a snapshot saved with ``to_dict``; None if the shape differs."""
+        try:
+            return cls(**data)
+        except TypeError:
+            return None
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
@@ -0,0 +1,308 @@
+"""Append-only SQLite history of fetched weather observations, with rollups."""
+
+import itertools
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+
+from config import Config
+from models import WeatherSnapshot
+
+HOUR = 3600
+DAY = 24 * HOUR
+RESOLUTIONS = {"hour": "hourly", "day": "daily"}  # resolution -> rollup table
+
+# (city, observed at, temp, feels_like, humidity, wind_speed)
+Row = Tuple[str, int, float, float, float, float]
+
+
+class Series(NamedTuple):
+    """Observations of one city over a time range, one NumPy array per column.
+
+    At ``"raw"`` resolution each point is one observation (``count`` 1, and
+    min, mean and max equal); otherwise each point is an hour or a day
+    starting at ``time``.
+    """
+
+    time: np.ndarray  # int64 unix seconds
+    count: np.ndarray
+    temp_mean: np.ndarray
+    temp_min: np.ndarray
+    temp_max: np.ndarray
+    humidity_mean: np.ndarray
+    wind_mean: np.ndarray
+    wind_max: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.time)
+
+
+def city_key(city: str) -> str:
+    return " ".join(city.casefold().split())
+
+
+def snapshot_city(snapshot: WeatherSnapshot) -> str:
+    """The name an observation is filed under, e.g. ``"London, GB"``."""
+    return f"{snapshot.name}, {snapshot.country}" if snapshot.country else snapshot.name
+
+
+_ROLLUP_COLUMNS = """
+    city INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    temp_sum REAL NOT NULL,
+    temp_min REAL NOT NULL,
+    temp_max REAL NOT NULL,
+    humidity_sum REAL NOT NULL,
+    wind_sum REAL NOT NULL,
+    wind_max REAL NOT NULL,
+    PRIMARY KEY (city, bucket)
+"""
+
+
+class ObservationStore:
+    """Every fetched observation, kept on disk for history charts.
+
+    Rows are only ever added. Each is keyed by city and the observation
+    time reported by the API, in a table clustered on that key, so
+    re-fetching an unchanged observation adds nothing and a city's time
+    range is one contiguous read. Hourly and daily rollups (count, sum,
+    min and max per bucket) are updated in the same transaction as the
+    rows they summarize, so a week of hourly points is 168 rows read
+    rather than every observation. Values are in ``Config.API_UNITS``.
+
+    ``add()`` only buffers; rows are written in batches by ``flush()``,
+    which the caller runs (on a worker thread) when ``add()`` says one is
+    due, and by ``close()``. The connection is shared between threads like
+    ``WeatherStore``'s. Several stores may write the same file (the app
+    opens one per session, the dashboard another); city ids are read back
+    from the table rather than assumed, and cached only once committed.
+
+    Args:
+        path: SQLite database file
+        batch_size: Buffered rows that make a flush due
+        flush_interval: Seconds after which buffered rows make a flush due
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        batch_size: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+    ):
+        self.path = Path(path)
+        self.batch_size = batch_size or Config.OBSERVATIONS_BATCH_SIZE
+        self.flush_interval = (
+            Config.OBSERVATIONS_FLUSH_INTERVAL if flush_interval is None else flush_interval
+        )
+        self._lock = threading.Lock()  # guards the connection and the city ids
+        self._buffer_lock = threading.Lock()
+        self._buffer: List[Row] = []
+        self._buffered_at = 0.0
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            f"""
+            CREATE TABLE IF NOT EXISTS cities (
+                id INTEGER PRIMARY KEY,
+                name TEXT NOT NULL UNIQUE
+            );
+            CREATE TABLE IF NOT EXISTS observations (
+                city INTEGER NOT NULL,
+                observed_at INTEGER NOT NULL,
+                temp REAL NOT NULL,
+                feels_like REAL NOT NULL,
+                humidity REAL NOT NULL,
+                wind_speed REAL NOT NULL,
+                PRIMARY KEY (city, observed_at)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS hourly ({_ROLLUP_COLUMNS}) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS daily ({_ROLLUP_COLUMNS}) WITHOUT ROWID;
+            CREATE TEMP TABLE incoming (
+                city INTEGER NOT NULL,
+                observed_at INTEGER NOT NULL,
+                temp REAL NOT NULL,
+                feels_like REAL NOT NULL,
+                humidity REAL NOT NULL,
+                wind_speed REAL NOT NULL,
+                PRIMARY KEY (city, observed_at)
+            ) WITHOUT ROWID;
+            """
+        )
+        self._city_ids: Dict[str, int] = dict(
+            self._conn.execute("SELECT name, id FROM cities")
+        )
+        self.written = 0  # rows added by this instance
+        self.duplicates = 0  # rows already stored, skipped
+
+    def add(self, snapshot: WeatherSnapshot) -> bool:
+        """
+        Buffer a freshly fetched snapshot.
+
+        Returns:
+            True when a ``flush()`` is due
+        """
+        row = (
+            snapshot_city(snapshot), int(snapshot.timestamp), float(snapshot.temp),
+            float(snapshot.feels_like), float(snapshot.humidity), float(snapshot.wind_speed),
+        )
+        with self._buffer_lock:
+            if not self._buffer:
+                self._buffered_at = time.monotonic()
+            self._buffer.append(row)
+            return (
+                len(self._buffer) >= self.batch_size
+                or time.monotonic() - self._buffered_at >= self.flush_interval
+            )
+
+    def flush(self) -> int:
+        """Write the buffered rows. Blocking; returns the number of new rows."""
+        with self._buffer_lock:
+            rows, self._buffer = self._buffer, []
+        return self.ingest(rows) if rows else 0
+
+    def ingest(self, rows: Iterable[Row]) -> int:
+        """
+        Write rows directly, ``batch_size`` per transaction. Blocking.
+
+        Returns:
+            The number of rows that were not already stored
+        """
+        added = 0
+        rows = iter(rows)
+        while True:
+            batch = list(itertools.islice(rows, self.batch_size))
+            if not batch:
+                return added
+            added += self._write(batch)
+
+    def _write(self, rows: List[Row]) -> int:
+        with self._lock:
+            added_ids: Dict[str, int] = {}
+            with self._conn:
+                added = self._insert(rows, added_ids)
+            self._city_ids.update(added_ids)  # only once committed
+        self.written += added
+        self.duplicates += len(rows) - added
+        return added
+
+    def _insert(self, rows: List[Row], added_ids: Dict[str, int]) -> int:
+        """Insert rows in the open transaction; fills ``added_ids`` with new city ids."""
+        ids = {}  # names as given in this batch -> city id
+        for city in {row[0] for row in rows}:
+            key = city_key(city)
+            city_id = self._city_ids.get(key) or added_ids.get(key)
+            if city_id is None:
+                # Another store on the same file may have added the city already
+                self._conn.execute("INSERT OR IGNORE INTO cities (name) VALUES (?)", (key,))
+                city_id = added_ids[key] = self._city_id(key)
+            ids[city] = city_id
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO incoming VALUES (?, ?, ?, ?, ?, ?)",
+            ((ids[city], *values) for city, *values in rows),
+        )
+        self._conn.execute(
+            "DELETE FROM incoming WHERE EXISTS (SELECT 1 FROM observations o "
+            "WHERE o.city = incoming.city AND o.observed_at = incoming.observed_at)"
+        )
+        added = self._conn.execute(
+            "INSERT INTO observations SELECT * FROM incoming"
+        ).rowcount
+        for table, seconds in (("hourly", HOUR), ("daily", DAY)):
+            # WHERE true: lets SQLite parse the upsert after a SELECT
+            self._conn.execute(
+                f"""
+                INSERT INTO {table}
+                SELECT city, observed_at / {seconds} * {seconds}, COUNT(*),
+                       SUM(temp), MIN(temp), MAX(temp),
+                       SUM(humidity), SUM(wind_speed), MAX(wind_speed)
+                FROM incoming WHERE true GROUP BY 1, 2
+                ON CONFLICT (city, bucket) DO UPDATE SET
+                    count = count + excluded.count,
+                    temp_sum = temp_sum + excluded.temp_sum,
+                    temp_min = MIN(temp_min, excluded.temp_min),
+                    temp_max = MAX(temp_max, excluded.temp_max),
+                    humidity_sum = humidity_sum + excluded.humidity_sum,
+                    wind_sum = wind_sum + excluded.wind_sum,
+                    wind_max = MAX(wind_max, excluded.wind_max)
+                """
+            )
+        self._conn.execute("DELETE FROM incoming")
+        return added
+
+    def series(
+        self,
+        city: str,
+        start: float,
+        end: Optional[float] = None,
+        resolution: str = "hour",
+    ) -> Series:
+        """
+        Observations of ``city`` with ``start <= time < end``.
+
+        Args:
+            city: Name as filed, e.g. ``"London, GB"`` (see ``snapshot_city``)
+            start: Unix seconds; at hour or day resolution, the bucket
+                containing ``start`` is included
+            end: Unix seconds, default now
+            resolution: ``"raw"``, ``"hour"`` or ``"day"``
+
+        Returns:
+            A Series in time order; empty if the city was never recorded
+        """
+        end = time.time() if end is None else end
+        if resolution == "raw":
+            sql = (
+                "SELECT observed_at, 1, temp, temp, temp, humidity, wind_speed, wind_speed "
+                "FROM observations WHERE city = ? AND observed_at >= ? AND observed_at < ? "
+                "ORDER BY observed_at"
+            )
+        elif resolution in RESOLUTIONS:
+            seconds = HOUR if resolution == "hour" else DAY
+            start = int(start) // seconds * seconds
+            sql = (
+                "SELECT bucket, count, temp_sum / count, temp_min, temp_max, "
+                "humidity_sum / count, wind_sum / count, wind_max "
+                f"FROM {RESOLUTIONS[resolution]} WHERE city = ? AND bucket >= ? AND bucket < ? "
+                "ORDER BY bucket"
+            )
+        else:
+            raise ValueError(f"Unknown resolution {resolution!r}")
+        with self._lock:
+            city_id = self._city_id(city_key(city))
+            rows = [] if city_id is None else self._conn.execute(
+                sql, (city_id, int(start), end)
+            ).fetchall()
+        columns = np.array(rows, dtype=np.float64).reshape(-1, len(Series._fields))
+        return Series(
+            columns[:, 0].astype(np.int64),
+            columns[:, 1].astype(np.int64),
+            *(columns[:, i] for i in range(2, len(Series._fields))),
+        )
+
+    def _city_id(self, key: str) -> Optional[int]:
+        """The id of a city, including one another store on the file recorded."""
+        city_id = self._city_ids.get(key)
+        if city_id is None:
+            row = self._conn.execute("SELECT id FROM cities WHERE name = ?", (key,)).fetchone()
+            city_id = None if row is None else row[0]
+        return city_id
+
+    def cities(self) -> List[str]:
+        with self._lock:
+            return [name for name, in self._conn.execute("SELECT name FROM cities ORDER BY name")]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM observations").fetchone()[0]
+
+    def close(self):
+        """Write anything buffered and close the database. Blocking."""
+        self.flush()
+        with self._lock:
+            self._conn.close()
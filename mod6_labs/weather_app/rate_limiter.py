@@ -0,0 +1,159 @@
+"""Client-side token bucket rate limiter with a priority lane."""
+
+import asyncio
+import heapq
+import itertools
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+class RateLimitExceeded(Exception):
+    """Raised by a rejecting limiter when no token is available."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Rate limit reached, retry in {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+class RateLimiter:
+    """Token bucket shared by every request made with one API key.
+
+    Tokens refill at ``rate`` per second up to ``burst``. With the
+    ``"wait"`` policy, callers without a token queue until one is
+    available, interactive callers ahead of background ones; with the
+    ``"reject"`` policy they get ``RateLimitExceeded`` straight away.
+    ``block_for`` empties the bucket for a while, e.g. after a 429.
+    """
+
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+    WAIT = "wait"
+    REJECT = "reject"
+
+    def __init__(self, rate: float, burst: int, policy: str = WAIT):
+        if rate <= 0 or burst < 1:
+            raise ValueError("rate must be positive and burst at least 1")
+        if policy not in (self.WAIT, self.REJECT):
+            raise ValueError(f"Unknown rate limit policy: {policy}")
+        self.rate = rate
+        self.burst = burst
+        self.policy = policy
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._wakeup: Optional[asyncio.TimerHandle] = None
+        self.acquired = 0
+        self.waited = 0
+        self.rejected = 0
+        self.throttled = 0
+
+    def _refill(self):
+        now = time.monotonic()
+        start = max(self._updated, self._blocked_until)
+        if now > start:
+            self._tokens = min(self.burst, self._tokens + (now - start) * self.rate)
+        self._updated = now
+
+    def time_until_token(self) -> float:
+        """Seconds until the next token is available."""
+        self._refill()
+        blocked = max(0.0, self._blocked_until - time.monotonic())
+        if self._tokens >= 1:
+            return blocked
+        return blocked + (1 - self._tokens) / self.rate
+
+    def _queue_ahead(self, priority: int) -> bool:
+        """True if a live waiter has the same or a higher priority."""
+        return any(p <= priority and not f.done() for p, _, f in self._waiters)
+
+    def try_acquire(self, priority: int = INTERACTIVE) -> bool:
+        """Take a token without waiting. Returns False if none is available."""
+        self._refill()
+        if time.monotonic() < self._blocked_until or self._tokens < 1:
+            return False
+        if self._queue_ahead(priority):
+            return False
+        self._tokens -= 1
+        self.acquired += 1
+        return True
+
+    async def acquire(self, priority: int = INTERACTIVE):
+        """
+        Take a token, waiting or rejecting according to the policy.
+
+        Args:
+            priority: INTERACTIVE requests are served before BACKGROUND ones
+
+        Raises:
+            RateLimitExceeded: If the policy is "reject" and no token is free
+        """
+        if self.try_acquire(priority):
+            return
+        if self.policy == self.REJECT:
+            self.rejected += 1
+            raise RateLimitExceeded(self.time_until_token())
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        self.waited += 1
+        self._schedule_wakeup()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The token was handed over just as we were cancelled
+                self._tokens += 1
+            self._schedule_wakeup()
+            raise
+
+    def _schedule_wakeup(self):
+        if self._wakeup is not None:
+            self._wakeup.cancel()
+            self._wakeup = None
+        while self._waiters and self._waiters[0][2].done():
+            heapq.heappop(self._waiters)
+        if self._waiters:
+            loop = asyncio.get_running_loop()
+            self._wakeup = loop.call_later(self.time_until_token(), self._release_waiters)
+
+    def _release_waiters(self):
+        """Hand tokens to waiters in priority order, then re-arm the timer."""
+        self._wakeup = None
+        self._refill()
+        while self._waiters and time.monotonic() >= self._blocked_until:
+            future = self._waiters[0][2]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            if self._tokens < 1:
+                break
+            heapq.heappop(self._waiters)
+            self._tokens -= 1
+            self.acquired += 1
+            future.set_result(None)
+        if self._waiters:
+            self._schedule_wakeup()
+
+    def block_for(self, seconds: float):
+        """Stop issuing tokens for ``seconds``, e.g. after an HTTP 429."""
+        self.throttled += 1
+        self._tokens = 0.0
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+        self._updated = time.monotonic()
+        if self._waiters:
+            self._schedule_wakeup()
+
+    def stats(self) -> Dict:
+        """Return token and queue counters."""
+        self._refill()
+        return {
+            "tokens": round(self._tokens, 2),
+            "queued": sum(1 for _, _, f in self._waiters if not f.done()),
+            "acquired": self.acquired,
+            "waited": self.waited,
+            "rejected": self.rejected,
+            "throttled": self.throttled,
+        }
@@ -0,0 +1,117 @@
+"""Retry and circuit breaker helpers for calls to the weather API."""
+
+import random
+import time
+from typing import Callable, Dict
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter.
+
+    Attempt ``n`` (0-based) waits a random time between 0 and
+    ``min(max_delay, base_delay * 2 ** n)`` before the next try.
+    """
+
+    def __init__(
+        self,
+        attempts: int = 3,
+        base_delay: float = 0.2,
+        max_delay: float = 2.0,
+        rng: Callable[[float, float], float] = random.uniform,
+    ):
+        if attempts < 1:
+            raise ValueError("attempts must be at least 1")
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._rng = rng
+
+    def delay(self, attempt: int) -> float:
+        """Return how long to sleep after failed attempt number ``attempt``."""
+        ceiling = min(self.max_delay, self.base_delay * (2 ** attempt))
+        return self._rng(0, ceiling)
+
+
+class CircuitBreaker:
+    """Fails fast after repeated upstream failures.
+
+    closed     requests flow normally; consecutive failures are counted
+    open       requests are rejected until ``reset_timeout`` has passed
+    half_open  one trial request is let through; success closes the
+               circuit, failure opens it again
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._state = self.CLOSED
+        self._trial_in_progress = False
+        self.failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        """Current state, moving from open to half_open once the cool-down ends."""
+        if self._state == self.OPEN and self._clock() - self.opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._trial_in_progress = False
+        return self._state
+
+    def retry_after(self) -> float:
+        """Seconds until an open circuit lets a trial request through."""
+        if self.state != self.OPEN:
+            return 0.0
+        return max(0.0, self.reset_timeout - (self._clock() - self.opened_at))
+
+    def allow_request(self) -> bool:
+        """Return True if a request may be sent now."""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self._trial_in_progress:
+            self._trial_in_progress = True
+            return True
+        self.rejected += 1
+        return False
+
+    def abandon_trial(self):
+        """Let another trial through if the current one was cancelled."""
+        self._trial_in_progress = False
+
+    def record_success(self):
+        self.failures = 0
+        self._state = self.CLOSED
+        self._trial_in_progress = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self._state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self._open()
+
+    def _open(self):
+        self._state = self.OPEN
+        self._trial_in_progress = False
+        self.opened_at = self._clock()
+        self.times_opened += 1
+
+    def stats(self) -> Dict:
+        """Return the breaker state and counters."""
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+            "retry_after": round(self.retry_after(), 3),
+        }
@@ -0,0 +1,120 @@
+"""In-memory TTL + LRU cache for weather API responses."""
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+@dataclass
+class CacheEntry:
+    """A cached value and the time it was stored."""
+
+    __slots__ = ("value", "stored_at")
+
+    value: Any
+    stored_at: float
+
+
+class ResponseCache:
+    """Bounded cache with a freshness TTL and least-recently-used eviction.
+
+    Entries younger than ``ttl`` are fresh. Entries older than ``ttl`` but
+    younger than ``ttl + stale_ttl`` are stale: they are still returned so
+    the caller can show them immediately while it refreshes in the
+    background. Anything older is dropped.
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        max_entries: int,
+        stale_ttl: float = 0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def get(self, key: Hashable) -> Optional[CacheEntry]:
+        """
+        Look up a key and mark it as recently used.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            The entry (fresh or stale), or None on a miss
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        age = self._clock() - entry.stored_at
+        if self.is_expired(entry):
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        if age > self.ttl:
+            self.stale_hits += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def peek(self, key: Hashable) -> Optional[CacheEntry]:
+        """Return an entry without touching counters or LRU order."""
+        return self._entries.get(key)
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        """Return True if the entry is still within the TTL."""
+        return self._clock() - entry.stored_at <= self.ttl
+
+    def is_expired(self, entry: CacheEntry) -> bool:
+        """Return True if the entry is past the stale window too."""
+        return self._clock() - entry.stored_at > self.ttl + self.stale_ttl
+
+    def set(self, key: Hashable, value: Any, age: float = 0):
+        """
+        Store a value, evicting the least recently used entry if full.
+
+        Args:
+            key: Cache key
+            value: Value to store
+            age: How old the value already is, in seconds
+        """
+        self._entries[key] = CacheEntry(value, self._clock() - age)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """Remove every entry. Counters are kept."""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss/eviction counters and the current size."""
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+        }
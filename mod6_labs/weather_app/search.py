@@ -0,0 +1,133 @@
+"""Latest-wins search pipeline for the city input."""
+
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional
+
+from config import Config
+
+
+@dataclass(frozen=True)
+class Search:
+    """One query handed to the lookup; ``seq`` orders searches."""
+
+    seq: int
+    query: str
+    typeahead: bool
+
+
+class SearchController:
+    """Runs the lookup for the newest query only.
+
+    ``submit()`` (Enter, the search button, a history chip) starts a lookup
+    at once; ``type()`` (typeahead) waits until typing has paused for
+    ``debounce`` seconds. Starting a lookup cancels the one in progress,
+    and a result is only delivered if no newer search started meanwhile,
+    so a slow old response can never replace a newer one. Typing never
+    cancels a submitted search: text that starts no lookup leaves the
+    search in progress alone, and typeahead waits until a submitted
+    search has finished. Must be called from the event loop.
+
+    Args:
+        lookup: Coroutine function ``(query, typeahead) -> result``
+        on_start: Called with the Search when its lookup starts
+        on_result: Called with ``(search, result)`` for the newest search
+        on_error: Called with ``(search, exception)`` for the newest search
+        debounce: Seconds of quiet before a typeahead lookup
+        min_chars: Shortest query that starts a typeahead lookup
+        accept: Optional check a typeahead query must pass, e.g. that the
+            city is in the local index, so partial names are not sent
+    """
+
+    def __init__(
+        self,
+        lookup: Callable[[str, bool], Awaitable[Any]],
+        on_start: Callable[[Search], None],
+        on_result: Callable[[Search, Any], None],
+        on_error: Callable[[Search, Exception], None],
+        debounce: Optional[float] = None,
+        min_chars: Optional[int] = None,
+        accept: Optional[Callable[[str], bool]] = None,
+    ):
+        self.lookup = lookup
+        self.on_start = on_start
+        self.on_result = on_result
+        self.on_error = on_error
+        self.debounce = Config.SEARCH_DEBOUNCE if debounce is None else debounce
+        self.min_chars = min_chars or Config.TYPEAHEAD_MIN_CHARS
+        self.accept = accept
+        self._seq = 0
+        self._current: Optional[Search] = None
+        self._task: Optional[asyncio.Task] = None
+        self.lookups = 0  # lookups started
+        self.cancelled = 0  # lookups superseded before they finished
+        self.dropped = 0  # results that arrived after a newer search
+
+    @property
+    def pending(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def submit(self, query: str) -> asyncio.Task:
+        """Look up ``query`` now, replacing any earlier search."""
+        return self._start(query.strip(), typeahead=False, delay=0.0)
+
+    def type(self, query: str) -> Optional[asyncio.Task]:
+        """
+        Look up ``query`` once typing pauses, replacing any earlier search.
+
+        Returns:
+            The scheduled task, or None if the query is too short, not
+            accepted, or a submitted search is in progress; the search in
+            progress then carries on
+        """
+        query = query.strip()
+        current = self._current
+        if current is not None and self.pending:
+            if current.query == query:
+                return self._task  # same text again, e.g. a key and its undo
+            if not current.typeahead:
+                return None  # the user asked for that one; let it finish
+        if len(query) < self.min_chars or (self.accept and not self.accept(query)):
+            return None
+        return self._start(query, typeahead=True, delay=self.debounce)
+
+    def cancel(self):
+        """Cancel the search in progress; its result will not be delivered."""
+        self._seq += 1
+        self._current = None
+        if self.pending:
+            self._task.cancel()
+
+    async def wait(self):
+        """Wait until the newest search has finished or been replaced."""
+        while self.pending:
+            task = self._task
+            await asyncio.wait({task})
+
+    def _start(self, query: str, typeahead: bool, delay: float) -> asyncio.Task:
+        self.cancel()
+        search = Search(self._seq, query, typeahead)
+        self._current = search
+        self._task = asyncio.create_task(self._run(search, delay))
+        return self._task
+
+    async def _run(self, search: Search, delay: float):
+        if delay:
+            await asyncio.sleep(delay)  # a newer keystroke cancels this
+        self.lookups += 1
+        self.on_start(search)
+        try:
+            result = await self.lookup(search.query, search.typeahead)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        except Exception as e:
+            if search.seq == self._seq:
+                self.on_error(search, e)
+            else:
+                self.dropped += 1
+            return
+        if search.seq != self._seq:
+            self.dropped += 1
+            return
+        self.on_result(search, result)
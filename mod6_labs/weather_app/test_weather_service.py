@@ -1,62 +1,1239 @@
 # test_weather_service.py
-"""Simple tests for weather service."""
+"""Tests for the weather service.
+
+Run with ``pytest``. Every test is offline: the upstream is either the
+local stand-in server in mock_server.py or an httpx.MockTransport.
+"""
 
 import asyncio
-from weather_service import WeatherService, WeatherServiceError
-
-
-async def test_valid_city():
-    """Test fetching weather for a valid city."""
-    service = WeatherService()
-    try:
-        data = await service.get_weather("London")
-        print(f"✅ Successfully fetched weather for {data['name']}")
-        print(f"   Temperature: {data['main']['temp']}°C")
-        return True
-    except Exception as e:
-        print(f"❌ Test failed: {e}")
-        return False
-
-
-async def test_invalid_city():
-    """Test handling of invalid city."""
-    service = WeatherService()
-    try:
-        await service.get_weather("InvalidCityXYZ123")
-        print("❌ Should have raised an error")
-        return False
-    except WeatherServiceError as e:
-        print(f"✅ Correctly handled error: {e}")
-        return True
-
-
-async def test_empty_city():
-    """Test handling of empty city name."""
-    service = WeatherService()
-    try:
-        await service.get_weather("")
-        print("❌ Should have raised an error")
-        return False
-    except WeatherServiceError as e:
-        print(f"✅ Correctly handled error: {e}")
-        return True
-
-
-async def run_tests():
-    """Run all tests."""
-    print("Running Weather Service Tests\n")
-    print("=" * 50)
-    
-    results = []
-    results.append(await test_valid_city())
-    results.append(await test_invalid_city())
-    results.append(await test_empty_city())
-    
-    print("\n" + "=" * 50)
-    passed = sum(results)
-    total = len(results)
-    print(f"\nTests Passed: {passed}/{total}")
+import json
+import os
+import time
+
+os.environ.setdefault("OPENWEATHER_API_KEY", "test-key")
+
+import httpx
+import pytest
+import geo_grid
+import numpy as np
+from config import Config
+from forecast import RISING, Forecast, ForecastTable
+from gazetteer import Gazetteer
+from history import SearchHistory
+from history_store import HistoryStore
+from icons import ICON_CODES, IconCache
+from metrics import Metrics
+from models import WeatherSnapshot
+from mock_server import MockWeatherServer, fixed, make_forecast_payload, make_icon, make_payload
+from rate_limiter import RateLimiter
+from response_cache import ResponseCache
+from search import SearchController
+from resilience import CircuitBreaker, RetryPolicy
+from weather_service import (
+    CircuitOpenError,
+    CityNotFoundError,
+    RateLimitedError,
+    WeatherService,
+    WeatherServiceError,
+    WeatherServiceNetworkError,
+)
+from watchlist import Watchlist
+from weather_store import WeatherStore
+
+# Tests should not be throttled unless they say so
+Config.RATE_LIMIT_PER_MINUTE = 60_000_000
+Config.RATE_LIMIT_BURST = 1_000_000
+
+
+def fast_retry(attempts: int = 3) -> RetryPolicy:
+    return RetryPolicy(attempts=attempts, base_delay=0.001, max_delay=0.001)
+
+
+@pytest.fixture
+def server():
+    with MockWeatherServer() as server:
+        yield server
+
+
+def lookup(server, city, **kwargs):
+    """Run one get_weather against the mock server."""
+    kwargs.setdefault("retry", fast_retry())
+
+    async def run():
+        async with WeatherService(**kwargs) as service:
+            service.base_url = server.url
+            return await service.get_weather(city)
+
+    return asyncio.run(run())
+
+
+def test_valid_city(server):
+    data = lookup(server, "London")
+    assert data.name == "London"
+    assert data.temp == 15.2
+    assert data.description == "broken clouds"
+
+
+def test_invalid_city(server):
+    with pytest.raises(CityNotFoundError, match="not found"):
+        lookup(server, "InvalidCityXYZ123")
+    assert server.request_count == 1
+
+
+def test_empty_city(server):
+    with pytest.raises(WeatherServiceError, match="cannot be empty"):
+        lookup(server, "")
+    assert server.request_count == 0
+
+
+@pytest.mark.parametrize(
+    "status, error, message",
+    [
+        (401, WeatherServiceError, "Invalid API key"),
+        (429, RateLimitedError, "Too many requests"),
+        (400, WeatherServiceError, "Error fetching weather data: 400"),
+        (500, WeatherServiceError, "currently unavailable"),
+        (503, WeatherServiceError, "currently unavailable"),
+    ],
+)
+def test_http_status_error_mapping(server, status, error, message):
+    server.fail_next(-1, status=status)
+    with pytest.raises(error, match=message):
+        lookup(server, "London")
+
+
+def test_timeout_maps_to_network_error(server):
+    server.set_latency(fixed(0.5))
+
+    async def run():
+        async with WeatherService(retry=fast_retry(1)) as service:
+            service.base_url = server.url
+            service.client.timeout = httpx.Timeout(0.05)
+            await service.get_weather("London")
+
+    with pytest.raises(WeatherServiceNetworkError, match="timed out"):
+        asyncio.run(run())
+
+
+def test_connection_refused_maps_to_network_error(server):
+    url = server.url
+    server.stop()
+
+    async def run():
+        async with WeatherService(retry=fast_retry(2)) as service:
+            service.base_url = url
+            await service.get_weather("London")
+
+    with pytest.raises(WeatherServiceNetworkError, match="Network error"):
+        asyncio.run(run())
+
+
+def test_malformed_body_maps_to_service_error():
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, text="<html>"))
+
+    async def run():
+        async with WeatherService(transport=transport) as service:
+            await service.get_weather("London")
+
+    with pytest.raises(WeatherServiceError, match="unexpected error"):
+        asyncio.run(run())
+
+
+def counting_transport(status: int = 200, delay: float = 0.05):
+    """Return a slow fake upstream and the list of requests it received."""
+    requests = []
+
+    async def handler(request):
+        requests.append(request)
+        await asyncio.sleep(delay)
+        if status != 200:
+            return httpx.Response(status, json={"message": "error"})
+        return httpx.Response(200, json=make_payload(request.url.params["q"]))
+
+    return httpx.MockTransport(handler), requests
+
+
+def test_cache_serves_fresh_then_stale_then_expires():
+    now = [0.0]
+    cache = ResponseCache(ttl=10, max_entries=4, stale_ttl=5, clock=lambda: now[0])
+    cache.set("oslo", "snapshot")
+
+    now[0] = 10
+    entry = cache.get("oslo")
+    assert entry.value == "snapshot" and cache.is_fresh(entry)
+    now[0] = 15  # past the TTL, within the stale window
+    entry = cache.get("oslo")
+    assert entry.value == "snapshot" and not cache.is_fresh(entry)
+    now[0] = 15.1
+    assert cache.get("oslo") is None and "oslo" not in cache
+    assert cache.get("lima") is None
+    assert cache.stats() == {"hits": 1, "stale_hits": 1, "misses": 2, "evictions": 0, "size": 0}
+
+
+def test_cache_evicts_the_least_recently_used_entry():
+    cache = ResponseCache(ttl=10, max_entries=2, clock=lambda: 0.0)
+    cache.set("oslo", 1)
+    cache.set("lima", 2)
+    cache.get("oslo")  # now the most recently used
+    cache.set("rome", 3)
+    assert "lima" not in cache and "oslo" in cache and "rome" in cache
+    assert cache.peek("oslo").value == 1
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["hits"] == 1  # peek counts nothing
+
+
+def test_service_cache_is_bounded_and_revalidates_stale_entries(monkeypatch):
+    monkeypatch.setattr(Config, "CACHE_MAX_ENTRIES", 2)
+    now = [0.0]
+    transport, requests = counting_transport(delay=0)
+
+    async def run():
+        cache = ResponseCache(
+            ttl=Config.CACHE_TTL,
+            max_entries=Config.CACHE_MAX_ENTRIES,
+            stale_ttl=Config.CACHE_STALE_TTL,
+            clock=lambda: now[0],
+        )
+        async with WeatherService(transport=transport, cache=cache) as service:
+            for city in ("Oslo", "Lima", "Rome", "Rome"):
+                await service.get_weather(city)
+            await service.get_weather("Oslo")  # evicted: fetched again
+            now[0] = Config.CACHE_TTL + 1
+            stale = await service.get_weather("Oslo")  # served now, refreshed behind
+            await asyncio.gather(*service._refreshing.values())
+            return stale, service.cache.stats()
+
+    stale, stats = asyncio.run(run())
+    assert stale.name == "Oslo"
+    assert [r.url.params["q"] for r in requests] == ["Oslo", "Lima", "Rome", "Oslo", "Oslo"]
+    assert (stats["hits"], stats["stale_hits"], stats["size"]) == (1, 1, 2)
+    assert stats["evictions"] == 2
+
+
+def test_concurrent_lookups_share_one_request():
+    """N concurrent callers for one city produce one upstream request."""
+    transport, requests = counting_transport()
+
+    async def run():
+        async with WeatherService(transport=transport) as service:
+            results = await asyncio.gather(
+                *(service.get_weather("London") for _ in range(20))
+            )
+            assert not service._in_flight
+            return results
+
+    results = asyncio.run(run())
+    assert len(requests) == 1
+    assert all(data is results[0] for data in results)
+
+
+def test_concurrent_lookups_normalize_city_names():
+    transport, requests = counting_transport()
+
+    async def run():
+        async with WeatherService(transport=transport) as service:
+            await asyncio.gather(
+                service.get_weather("London"),
+                service.get_weather("  london "),
+                service.get_weather("LONDON"),
+                service.get_weather("Paris"),
+            )
+
+    asyncio.run(run())
+    assert len(requests) == 2
+
+
+def test_concurrent_lookup_errors_reach_every_waiter():
+    transport, requests = counting_transport(status=404)
+
+    async def run():
+        async with WeatherService(transport=transport) as service:
+            return await asyncio.gather(
+                *(service.get_weather("Nowhere") for _ in range(10)),
+                return_exceptions=True,
+            )
+
+    results = asyncio.run(run())
+    assert len(requests) == 1
+    assert all(isinstance(result, WeatherServiceError) for result in results)
+    assert all("not found" in str(result) for result in results)
+
+
+def test_cancelled_waiter_does_not_cancel_shared_request():
+    transport, requests = counting_transport(delay=0.1)
+
+    async def run():
+        async with WeatherService(transport=transport) as service:
+            impatient = asyncio.create_task(service.get_weather("London"))
+            patient = asyncio.create_task(service.get_weather("London"))
+            await asyncio.sleep(0.02)
+            impatient.cancel()
+            return await patient
+
+    data = asyncio.run(run())
+    assert data.name == "London"
+    assert len(requests) == 1
+
+
+def test_get_weather_many_bounds_concurrency_and_isolates_errors():
+    active, peak = [0], [0]
+
+    async def handler(request):
+        active[0] += 1
+        peak[0] = max(peak[0], active[0])
+        await asyncio.sleep(0.01)
+        active[0] -= 1
+        city = request.url.params.get("q", "Coordinates")
+        if city == "Nowhere":
+            return httpx.Response(404, json={"message": "city not found"})
+        return httpx.Response(200, json=make_payload(city))
+
+    async def run():
+        transport = httpx.MockTransport(handler)
+        async with WeatherService(transport=transport) as service:
+            cities = [f"City {i}" for i in range(30)]
+            return await service.get_weather_many(
+                cities + ["Nowhere", (14.6, 121.0)], concurrency=4
+            )
+
+    results = asyncio.run(run())
+    assert peak[0] <= 4
+    assert [data.name for data in results[:30]] == [f"City {i}" for i in range(30)]
+    assert isinstance(results[30], WeatherServiceError)
+    assert results[31].name == "Coordinates"
+
+
+def test_store_serves_stale_data_when_offline(tmp_path):
+    online = [True]
+
+    def handler(request):
+        if not online[0]:
+            raise httpx.ConnectError("unreachable")
+        return httpx.Response(200, json=make_payload(request.url.params["q"]))
+
+    async def lookup():
+        store = WeatherStore(tmp_path / "weather_cache.db")
+        service = WeatherService(transport=httpx.MockTransport(handler), store=store)
+        service.cache.ttl = 0  # force the next lookup past the store
+        async with service:
+            return await service.get_weather("London")
+
+    fresh = asyncio.run(lookup())
+    online[0] = False
+    stale = asyncio.run(lookup())
+    assert fresh.stale is False
+    assert stale.stale is True
+    assert stale.name == "London"
+    assert stale.fetched_at == fresh.fetched_at
+
+
+def test_store_errors_do_not_fail_lookups(server, tmp_path):
+    import sqlite3
+
+    class LockedStore(WeatherStore):
+        def put(self, *args, **kwargs):
+            raise sqlite3.OperationalError("database is locked")
+
+    async def run():
+        store = LockedStore(tmp_path / "weather_cache.db")
+        async with WeatherService(store=store, retry=fast_retry()) as service:
+            service.base_url = server.url
+            return [r async for r in service.iter_weather_many(["London", "Paris", "Oslo"])]
+
+    results = asyncio.run(run())
+    assert sorted(snapshot.name for _, _, snapshot in results) == ["London", "Oslo", "Paris"]
+
+
+def test_store_tracks_its_size_without_rescanning(tmp_path):
+    store = WeatherStore(tmp_path / "weather_cache.db", max_bytes=2000)
+    for i in range(40):
+        store.put(f"city {i % 25}", make_payload(f"City {i}"), "metric", fetched_at=i)
+    (total,) = store._conn.execute("SELECT SUM(LENGTH(payload)) FROM responses").fetchone()
+    assert store.size_bytes() == total <= 2000 and len(store) < 25
+    assert WeatherStore(tmp_path / "weather_cache.db").size_bytes() == total
+    store.close()
+
+
+def test_transient_server_errors_are_retried(server):
+    server.fail_next(2, status=503)
+    data = lookup(server, "London", retry=fast_retry(3))
+    assert data.name == "London"
+    assert server.request_count == 3
+
+
+def test_client_errors_are_not_retried(server):
+    with pytest.raises(CityNotFoundError):
+        lookup(server, "InvalidCityXYZ123", retry=fast_retry(3))
+    assert server.request_count == 1
+
+
+def test_circuit_breaker_fails_fast_then_recovers(server):
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, clock=lambda: now[0])
+    server.fail_next(-1, status=500)
+
+    async def attempt(service, city):
+        try:
+            return await service.get_weather(city)
+        except WeatherServiceError as e:
+            return e
+
+    async def run():
+        async with WeatherService(retry=fast_retry(2), breaker=breaker) as service:
+            service.base_url = server.url
+            first = await attempt(service, "Paris")
+            second = await attempt(service, "Rome")
+            assert breaker.state == CircuitBreaker.OPEN
+            sent = server.request_count
+            rejected = await attempt(service, "Oslo")
+            assert isinstance(rejected, CircuitOpenError)
+            assert server.request_count == sent  # nothing was sent
+
+            server.recover()
+            now[0] = 31.0
+            assert breaker.state == CircuitBreaker.HALF_OPEN
+            recovered = await attempt(service, "Oslo")
+            return first, second, recovered
+
+    first, second, recovered = asyncio.run(run())
+    assert "unavailable" in str(first) and "unavailable" in str(second)
+    assert recovered.name == "Oslo"
+    assert breaker.stats()["state"] == CircuitBreaker.CLOSED
+    assert breaker.times_opened == 1
+
+
+def test_rate_limiter_reject_policy_fails_without_request():
+    transport, requests = counting_transport(delay=0)
+    limiter = RateLimiter(rate=0.01, burst=2, policy=RateLimiter.REJECT)
+
+    async def run():
+        async with WeatherService(transport=transport, limiter=limiter) as service:
+            await service.get_weather("Paris")
+            await service.get_weather("Rome")
+            await service.get_weather("Oslo")
+
+    with pytest.raises(RateLimitedError):
+        asyncio.run(run())
+    assert len(requests) == 2
+    assert limiter.stats()["rejected"] == 1
+
+
+def test_rate_limiter_serves_interactive_before_background():
+    order = []
+
+    async def handler(request):
+        order.append(request.url.params["q"])
+        return httpx.Response(200, json=make_payload(request.url.params["q"]))
+
+    async def run():
+        limiter = RateLimiter(rate=50, burst=1)
+        transport = httpx.MockTransport(handler)
+        async with WeatherService(transport=transport, limiter=limiter) as service:
+            await service.get_weather("First")  # uses the only token
+            background = [
+                asyncio.create_task(service.get_weather(f"Bg {i}", background=True))
+                for i in range(3)
+            ]
+            await asyncio.sleep(0)
+            interactive = asyncio.create_task(service.get_weather("Click"))
+            await asyncio.gather(interactive, *background)
+
+    asyncio.run(run())
+    assert order[:2] == ["First", "Click"]
+
+
+def test_too_many_requests_blocks_limiter_for_retry_after():
+    def handler(request):
+        return httpx.Response(429, headers={"Retry-After": "30"})
+
+    async def run():
+        limiter = RateLimiter(rate=100, burst=10)
+        transport = httpx.MockTransport(handler)
+        async with WeatherService(transport=transport, limiter=limiter) as service:
+            with pytest.raises(RateLimitedError):
+                await service.get_weather("London")
+            assert service.breaker.state == CircuitBreaker.CLOSED
+            return limiter
+
+    limiter = asyncio.run(run())
+    assert limiter.stats()["throttled"] == 1
+    assert limiter.time_until_token() > 29
+
+
+def coordinates_transport():
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        lat, lon = float(request.url.params["lat"]), float(request.url.params["lon"])
+        return httpx.Response(200, json=make_payload("Coordinates", lat, lon))
+
+    return httpx.MockTransport(handler), requests
+
+
+def test_nearby_coordinates_share_one_cell():
+    transport, requests = coordinates_transport()
+
+    async def run():
+        async with WeatherService(transport=transport, geo_precision=5) as service:
+            first = await service.get_weather_by_coordinates(14.59950, 120.98420)
+            jitter = await service.get_weather_by_coordinates(14.59957, 120.98431)
+            return first, jitter
+
+    first, jitter = asyncio.run(run())
+    assert first is jitter
+    assert len(requests) == 1
+
+
+def test_adjacent_fresh_cell_answers_within_tolerance():
+    transport, requests = coordinates_transport()
+    cell = geo_grid.encode(14.5995, 120.9842, 5)
+    lat, lon, lat_err, lon_err = geo_grid.decode(cell)
+    # Just across the northern edge of the cell
+    north = (lat + lat_err + 0.001, lon)
+
+    async def run(tolerance):
+        service = WeatherService(
+            transport=transport, geo_precision=5, geo_tolerance_km=tolerance
+        )
+        async with service:
+            await service.get_weather_by_coordinates(lat, lon)
+            await service.get_weather_by_coordinates(*north)
+
+    asyncio.run(run(tolerance=10))
+    assert len(requests) == 1
+    asyncio.run(run(tolerance=0))
+    assert len(requests) == 3
+
+
+def test_gazetteer_resolves_spelling_variants_to_one_request(tmp_path):
+    transport, requests = counting_transport(delay=0)
+    gazetteer = Gazetteer.load(Config.GAZETTEER_SOURCE, tmp_path / "cities.idx")
+
+    async def run():
+        async with WeatherService(transport=transport, gazetteer=gazetteer) as service:
+            for name in ("Zurich", "zürich", "ZÜRICH", "Zürich, CH"):
+                await service.get_weather(name)
+
+    asyncio.run(run())
+    assert [r.url.params["q"] for r in requests] == ["Zürich,CH"]
+
+
+def test_gazetteer_rebuild_replaces_the_index_under_open_readers(tmp_path):
+    from gazetteer import build_index
+
+    index = tmp_path / "cities.idx"
+    reader = Gazetteer.load(Config.GAZETTEER_SOURCE, index)
+    count = build_index(Config.GAZETTEER_SOURCE, index)  # e.g. the source changed
+    assert reader.resolve("Zurich") is not None  # still reads the old file
+    assert len(Gazetteer(index)) == count
+    assert [path.name for path in tmp_path.iterdir()] == ["cities.idx"]
+    reader.close()
+
+
+def test_strict_gazetteer_rejects_unknown_city_with_suggestions(tmp_path):
+    transport, requests = counting_transport(delay=0)
+    gazetteer = Gazetteer.load(Config.GAZETTEER_SOURCE, tmp_path / "cities.idx")
+
+    async def run():
+        service = WeatherService(
+            transport=transport, gazetteer=gazetteer, strict_cities=True
+        )
+        async with service:
+            await service.get_weather("Bolinao Pangasinan")
+
+    with pytest.raises(CityNotFoundError) as error:
+        asyncio.run(run())
+    assert [city.name for city in error.value.suggestions][:1] == ["Bolinao"]
+    assert not requests
+
+
+def test_metrics_record_cache_retries_phases_and_errors(server):
+    server.fail_next(1, status=503)
+    metrics = Metrics()
+
+    async def run():
+        async with WeatherService(retry=fast_retry(3), metrics=metrics) as service:
+            service.base_url = server.url
+            await service.get_weather("London")
+            await service.get_weather("London")
+            with pytest.raises(CityNotFoundError):
+                await service.get_weather("InvalidCityXYZ123")
+
+    asyncio.run(run())
+    assert metrics.counter("cache_total", source="memory") == 1
+    assert metrics.counter("cache_total", source="miss") == 2
+    assert metrics.counter("retries_total", reason="503") == 1
+    assert metrics.counter("errors_total", kind="city", error="CityNotFoundError") == 1
+    assert metrics.histogram("lookup_seconds", kind="city", outcome="ok").count == 2
+    assert metrics.histogram("http_phase_seconds", phase="connect_tcp").count >= 1
+    assert metrics.histogram("http_phase_seconds", phase="receive_response_headers").count == 3
+
+    text = metrics.to_prometheus()
+    assert '# TYPE weather_cache_total counter' in text
+    assert 'weather_lookup_seconds_bucket{kind="city",outcome="ok",le="+Inf"} 2' in text
+    assert '"retries_total"' in metrics.to_json()
+
+
+def test_metrics_escape_label_values_for_prometheus():
+    metrics = Metrics()
+    metrics.increment("lookups_total", city='Fort "Old" Town\\East\nSide')
+    assert 'weather_lookups_total{city="Fort \\"Old\\" Town\\\\East\\nSide"} 1' in (
+        metrics.to_prometheus()
+    )
+
+
+def test_watchlist_pushes_only_changed_snapshots():
+    temps = iter([20.0, 20.0, 21.5, 21.5])
+    fetched, pushed = [], []
+
+    async def fetch(city):
+        fetched.append(city)
+        payload = make_payload(city)
+        payload["main"]["temp"] = next(temps)
+        return WeatherSnapshot.from_api(payload)
+
+    async def run():
+        watchlist = Watchlist(fetch, lambda city, s: pushed.append(s.temp), interval=0.02)
+        watchlist.add("London")
+        runner = asyncio.create_task(watchlist.run())
+        while len(fetched) < 4:
+            await asyncio.sleep(0.005)
+        await watchlist.stop()
+        await runner
+
+    asyncio.run(run())
+    assert pushed == [20.0, 21.5]
+
+
+def test_refresh_bypasses_a_fresh_cache_entry(server):
+    async def run():
+        async with WeatherService(retry=fast_retry()) as service:
+            service.base_url = server.url
+            first = await service.get_weather("London")
+            await service.get_weather("London")
+            cached_requests = server.request_count
+            counters = service.cache.stats()
+            refreshed = await service.get_weather("London", background=True, refresh=True)
+            assert service.cache.stats() == counters  # refreshes are not lookups
+            again = await service.get_weather("London")
+            return first, cached_requests, refreshed, again
+
+    first, cached_requests, refreshed, again = asyncio.run(run())
+    assert cached_requests == 1 and server.request_count == 2
+    assert refreshed.fetched_at > first.fetched_at and again is refreshed
+
+
+def test_watchlist_pauses_and_spreads_overdue_refreshes():
+    fetched = []
+
+    async def fetch(city):
+        fetched.append((city, asyncio.get_running_loop().time()))
+        return WeatherSnapshot.from_api(make_payload(city))
+
+    async def run():
+        watchlist = Watchlist(fetch, lambda city, s: None, interval=0.05, jitter=0.5)
+        watchlist.pause()
+        watchlist.add_many([f"City {i}" for i in range(20)])
+        runner = asyncio.create_task(watchlist.run())
+        await asyncio.sleep(0.1)
+        assert not fetched
+        watchlist.resume()
+        while len(fetched) < 20:
+            await asyncio.sleep(0.002)
+        await watchlist.stop()
+        await runner
+
+    asyncio.run(run())
+    times = [t for _, t in fetched[:20]]
+    assert len({city for city, _ in fetched}) == 20
+    assert max(times) - min(times) > 0.01  # not one burst on resume
+
+
+def test_forecast_is_fetched_once_and_stored_as_columns(server):
+    async def run():
+        async with WeatherService(retry=fast_retry()) as service:
+            service.forecast_url = server.forecast_url
+            first = await service.get_forecast("London")
+            second = await service.get_forecast("london")
+            return first, second
+
+    first, second = asyncio.run(run())
+    assert second is first
+    assert server.request_count == 1
+    assert len(first) == 40
+    assert first.temp.dtype == np.float32 and first.temp.flags["C_CONTIGUOUS"]
+    assert np.all(np.diff(first.times) == 10800)
+
+
+def test_forecast_table_daily_and_trends_match_per_point_math():
+    payloads = [make_forecast_payload(f"City {i}", start=1700000000 + i * 3600) for i in range(3)]
+    payloads[1]["city"]["timezone"] = 8 * 3600
+    table = ForecastTable([Forecast.from_api(p, units="metric") for p in payloads])
+    daily = table.daily()
+
+    for index, payload in enumerate(payloads):
+        offset = payload["city"]["timezone"]
+        by_day = {}
+        for entry in payload["list"]:
+            by_day.setdefault((entry["dt"] + offset) // 86400, []).append(entry["main"]["temp"])
+        rows = daily.for_city(index)
+        assert [d.astype(int) for d in rows.day] == sorted(by_day)
+        assert np.allclose(rows.temp_min, [min(v) for _, v in sorted(by_day.items())])
+        assert np.allclose(rows.temp_max, [max(v) for _, v in sorted(by_day.items())])
+        assert np.allclose(rows.temp_mean, [sum(v) / len(v) for _, v in sorted(by_day.items())])
+
+    # The mock forecast warms 0.05 °C per point on top of a daily cycle
+    assert np.all(table.trends(hours=120) > 0)
+    imperial = ForecastTable([Forecast.from_api(payloads[0], units="metric")], units="imperial")
+    assert np.isclose(imperial.temp[0], payloads[0]["list"][0]["main"]["temp"] * 9 / 5 + 32)
+    warming = make_forecast_payload()
+    for i, entry in enumerate(warming["list"]):
+        entry["main"]["temp"] = 10 + i  # +1 °C every 3 hours
+    assert list(ForecastTable([Forecast.from_api(warming)]).trend_directions()) == [RISING]
+
+
+def test_missing_api_key_is_shown_in_the_ui(tmp_path, monkeypatch):
+    from headless import headless_page
+    import main
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(Config, "API_KEY", "")
+
+    async def run():
+        page, connection = headless_page()
+        app = await asyncio.to_thread(main.WeatherApp, page)
+        assert connection.first_paint_at is not None  # painted before loading
+        await app.ready.wait()
+        return app
+
+    app = asyncio.run(run())
+    assert app.weather_service is None
+    assert app.city_input.disabled
+    assert "OPENWEATHER_API_KEY not found" in app.error_message.value
+
+
+def test_icons_download_once_and_are_served_from_disk(server, tmp_path):
+    async def run(cache):
+        first = await asyncio.gather(*(cache.fetch("10d") for _ in range(5)))
+        downloaded = await cache.prefetch()
+        await cache.aclose()
+        return first, downloaded
+
+    cache = IconCache(tmp_path / "icons", url=server.icon_url, bundle_dir=tmp_path / "none")
+    assert cache.image_source("10d") == {"src": server.icon_url.format(code="10d")}
+    first, downloaded = asyncio.run(run(cache))
+    assert all(data == make_icon("10d") for data in first)
+    assert downloaded == len(ICON_CODES) - 1
+    assert server.request_count == len(ICON_CODES)
+
+    # A new session reads every icon from disk
+    reloaded = IconCache(tmp_path / "icons", url=server.icon_url, bundle_dir=tmp_path / "none")
+    assert reloaded.load() == len(ICON_CODES)
+    assert "src_base64" in reloaded.image_source("10d")
+    assert len(list((tmp_path / "icons").glob("*.png"))) == len({make_icon(c) for c in ICON_CODES})
+    assert server.request_count == len(ICON_CODES)
+
+
+def test_history_store_batches_bursts_and_writes_atomically(tmp_path):
+    path = tmp_path / "search_history.json"
+    store = HistoryStore(path, flush_interval=0.05)
+    for i in range(100):
+        store.save([f"City {i}"])
+    assert store.writes == 0 and not path.exists()  # nothing written on the caller
+    time.sleep(0.2)
+    assert store.writes == 1
+    store.save(["Last"])
+    store.close()
+    assert json.loads(path.read_text()) == ["Last"]
+    assert store.writes == 2
+    assert [p.name for p in tmp_path.iterdir()] == [path.name]  # no temp file left
+
+
+def test_history_store_recovers_from_a_corrupt_file(tmp_path):
+    path = tmp_path / "search_history.json"
+    path.write_text('["London", "Par')  # cut off mid-write
+    store = HistoryStore(path)
+    assert store.load([]) == []
+    assert store.recovered
+    assert (tmp_path / "search_history.json.corrupt").exists()
+    store.save(["Paris"])
+    store.close()
+    assert HistoryStore(path).load([]) == ["Paris"]
+
+
+def test_history_ranks_by_frecency_and_filters_by_prefix():
+    day = 24 * 3600
+    now = 1_700_000_000
+    history = SearchHistory(half_life=7 * day)
+    for _ in range(5):
+        history.record("Lisbon", now - 30 * day)  # often, but a month ago
+    history.record("Lima", now - 1 * day)
+    for _ in range(3):
+        history.record("London", now - 2 * day)
+    history.record("Tokyo", now)
+    history.record("los angeles", now - 3 * day)
+    history.record("Los Angeles", now - 3 * day)  # same city, any case
+
+    assert [e.city for e in history.top()] == [
+        "London", "Los Angeles", "Tokyo", "Lima", "Lisbon"
+    ]
+    assert [e.city for e in history.top(prefix="lo")] == ["London", "Los Angeles"]
+    assert [e.city for e in history.top(2, prefix="L")] == ["London", "Los Angeles"]
+    assert history.get("LONDON").count == 3
+    assert history.score(history.get("Tokyo"), now) == pytest.approx(1.0)
+
+    restored = SearchHistory.from_json(json.loads(json.dumps(history.to_json())))
+    assert restored.top() == history.top()
+    old_format = SearchHistory.from_json(["Paris", "Oslo"])  # most recent first
+    assert [e.city for e in old_format.top()] == ["Paris", "Oslo"]
+
+
+def test_history_drops_lowest_ranked_when_full():
+    history = SearchHistory(max_entries=100)
+    for i in range(150):
+        history.record(f"City {i}", now=1_700_000_000 + i)
+    assert len(history) <= 100
+    assert "City 149" in history and "City 0" not in history
+    assert [e.city for e in history.top(1, prefix="city 14")] == ["City 149"]
+
+
+def recording_search(delays, **kwargs):
+    """A SearchController over a fake lookup that sleeps ``delays[query]``."""
+    looked_up, delivered = [], []
+
+    async def lookup(query, typeahead):
+        looked_up.append((query, typeahead))
+        await asyncio.sleep(delays.get(query, 0.01))
+        return query.upper()
+
+    controller = SearchController(
+        lookup,
+        on_start=lambda search: None,
+        on_result=lambda search, result: delivered.append(result),
+        on_error=lambda search, error: delivered.append(error),
+        **kwargs,
+    )
+    return controller, looked_up, delivered
+
+
+def test_newer_search_cancels_slower_older_one():
+    async def run():
+        controller, looked_up, delivered = recording_search({"Oslo": 0.2, "Lima": 0.01})
+        controller.submit("Oslo")
+        await asyncio.sleep(0.02)  # Oslo's request is in flight
+        controller.submit("Lima")
+        await controller.wait()
+        await asyncio.sleep(0.25)  # Oslo would have answered by now
+        return controller, looked_up, delivered
+
+    controller, looked_up, delivered = asyncio.run(run())
+    assert looked_up == [("Oslo", False), ("Lima", False)]
+    assert delivered == ["LIMA"]
+    assert controller.cancelled == 1
+
+
+def test_typeahead_debounces_and_skips_unknown_prefixes():
+    known = {"London", "Lima"}
+
+    async def run():
+        controller, looked_up, delivered = recording_search(
+            {}, debounce=0.05, min_chars=3, accept=known.__contains__
+        )
+        for text in ["L", "Lo", "Lon", "Lond", "Londo", "London"]:
+            controller.type(text)
+            await asyncio.sleep(0.01)  # faster than the debounce
+        await controller.wait()
+        controller.type("Lond")  # backspacing looks nothing up
+        await asyncio.sleep(0.1)
+        return controller, looked_up, delivered
+
+    controller, looked_up, delivered = asyncio.run(run())
+    assert looked_up == [("London", True)]
+    assert delivered == ["LONDON"]
+
+
+def test_typing_never_cancels_a_submitted_search():
+    async def run():
+        controller, looked_up, delivered = recording_search(
+            {"Oslo": 0.1}, debounce=0.01, min_chars=3, accept={"Lima"}.__contains__
+        )
+        controller.submit("Oslo")
+        await asyncio.sleep(0.02)  # Oslo's request is in flight
+        assert controller.type("L") is None  # too short: starts nothing
+        assert controller.type("Lima") is None  # known, but Oslo was asked for
+        await controller.wait()
+        return controller, looked_up, delivered
+
+    controller, looked_up, delivered = asyncio.run(run())
+    assert looked_up == [("Oslo", False)]
+    assert delivered == ["OSLO"]
+    assert controller.cancelled == 0
+
+
+@pytest.fixture
+def app_config(server, tmp_path, monkeypatch):
+    """Point a headless WeatherApp at the mock server, with files in tmp_path."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(Config, "API_KEY", "test")
+    monkeypatch.setattr(Config, "BASE_URL", server.url)
+    monkeypatch.setattr(Config, "FORECAST_URL", server.forecast_url)
+    monkeypatch.setattr(Config, "ICON_URL", server.icon_url)
+    monkeypatch.setattr(Config, "ICON_PREFETCH", False)
+    monkeypatch.setattr(Config, "UNITS", "metric")
+    return server
+
+
+async def start_app():
+    from headless import headless_page
+    import main
+
+    page, connection = headless_page()
+    app = await asyncio.to_thread(main.WeatherApp, page)
+    await app.ready.wait()
+    return app, connection
+
+
+async def search(app, city: str):
+    app.city_input.value = city
+    await app.search_city(city)
+    await asyncio.wrap_future(app.forecast_task)
+
+
+async def click(app, control):
+    """Deliver a click the way Flet does: sync handlers go to a worker thread."""
+    from flet.core.event import Event
+
+    await app.page.on_event_async(Event(control.uid, "click", ""))
+
+
+def test_switching_units_makes_no_requests_and_one_update(app_config):
+    server = app_config
+
+    async def run():
+        app, connection = await start_app()
+        await search(app, "London")
+        await click(app, app.watch_button)
+        assert "London" in app.watchlist  # handled on the loop, not a worker thread
+        requests, batches = server.request_count, len(connection.batches)
+        app.toggle_units(None)
+        result = server.request_count - requests, len(connection.batches) - batches
+        await app.on_shutdown(None)
+        return app, result
+
+    app, (requests, batches) = asyncio.run(run())
+    assert (requests, batches) == (0, 1)
+    assert app.temp_text.value == "59.4°F"  # 15.2 °C
+    assert app.wind_text.value == "9.2 mph"  # 4.1 m/s
+    assert app.watchlist_rows["London"].controls[1].value == "59.4°F"
+    assert app.forecast_panel.visible and app.current_forecast.units == "metric"
+
+
+def test_search_updates_the_card_in_place_once_per_transition(app_config):
+    async def run():
+        app, connection = await start_app()
+        await search(app, "London")
+        card, strip = app.weather_container.content, list(app.forecast_strip.controls)
+        connection.reset()
+        app.city_input.value = "Paris"
+        await app.get_weather()
+        updates = len(connection.batches)
+        await asyncio.wrap_future(app.forecast_task)
+        await app.on_shutdown(None)
+        return app, card, strip, updates
+
+    app, card, strip, updates = asyncio.run(run())
+    assert updates == 2  # loading, then the result
+    assert app.weather_container.content is card
+    assert app.forecast_strip.controls == strip
+    assert app.city_text.value.startswith("Paris")
+    assert app.icon_image.src_base64  # downloaded for London, reused for Paris
+
+
+def test_sessions_share_one_service_and_its_requests(app_config):
+    server = app_config
+    server.set_latency(fixed(0.1))
+
+    async def run():
+        (first, _), (second, _) = await asyncio.gather(start_app(), start_app())
+        shared = first.weather_service is second.weather_service
+        await asyncio.gather(
+            first.weather_service.get_weather("Oslo"), second.weather_service.get_weather("Oslo")
+        )
+        await first.on_shutdown(None)
+        still_open = second.weather_service._client is not None
+        await second.on_shutdown(None)
+        return shared, still_open
+
+    shared, still_open = asyncio.run(run())
+    assert shared and still_open
+    assert server.request_count == 1
+
+
+def test_shutdown_runs_once_for_disconnect_and_close(app_config):
+    async def run():
+        app, _ = await start_app()
+        stops = []
+        stop = app.watchlist.stop
+        app.watchlist.stop = lambda: stops.append(1) or stop()
+        await asyncio.gather(app.page.on_disconnect(None), app.page.on_close(None))
+        return stops
+
+    assert asyncio.run(run()) == [1]
+
+
+def test_corrupt_watchlist_is_moved_aside_and_saves_are_atomic(app_config, tmp_path):
+    (tmp_path / Config.WATCHLIST_FILE).write_text('["Lon')  # truncated by a crash
+
+    async def run():
+        app, _ = await start_app()
+        watched_at_start = list(app.watchlist)
+        await search(app, "London")
+        await click(app, app.watch_button)
+        await app.on_shutdown(None)
+        return app, watched_at_start
+
+    app, watched_at_start = asyncio.run(run())
+    assert app.error_message.visible is False
+    assert watched_at_start == []
+    assert (tmp_path / (Config.WATCHLIST_FILE + ".corrupt")).read_text() == '["Lon'
+    assert json.loads((tmp_path / Config.WATCHLIST_FILE).read_text()) == ["London"]
+    assert not list(tmp_path.glob(".*.tmp"))
+
+
+def test_startup_failure_is_shown_and_does_not_hang(app_config, monkeypatch):
+    def broken_index(source):
+        raise OSError("city index unreadable")
+
+    monkeypatch.setattr(Gazetteer, "load", broken_index)
+
+    async def run():
+        app, _ = await start_app()
+        await asyncio.wait_for(app.search_city("London"), 5)
+        await asyncio.wait_for(app.on_shutdown(None), 5)
+        return app
+
+    app = asyncio.run(run())
+    assert app.weather_service is None
+    assert app.city_input.disabled
+    assert "city index unreadable" in app.error_message.value
+    assert app_config.request_count == 0
+
+
+def test_search_fetches_the_city_it_records_even_if_the_input_changed(app_config):
+    async def run():
+        app, _ = await start_app()
+        app.city_input.value = "London"  # edited after Paris was submitted
+        await app.search_city("Paris")
+        await app.on_shutdown(None)
+        return app
+
+    app = asyncio.run(run())
+    assert app.current_city == "Paris"
+    assert [entry.city for entry in app.search_history.top(1)] == ["Paris"]
+
+
+def test_history_chips_are_reused_across_updates(app_config):
+    def chips(app):
+        return {row.controls[0].content.value: row for row in app.history_column.controls}
+
+    async def run():
+        app, connection = await start_app()
+        for city in ["Lima", "Oslo", "Lima"]:
+            await search(app, city)
+        before = chips(app)
+        connection.reset()
+        app.update_history_column()
+        app.page.update()
+        unchanged = len(connection.batches)
+        await search(app, "Tokyo")
+        after = chips(app)
+        await app.on_shutdown(None)
+        return before, unchanged, after
+
+    before, unchanged, after = asyncio.run(run())
+    assert unchanged == 0  # nothing to send
+    assert list(after) == ["Lima", "Tokyo", "Oslo"]
+    assert after["Lima"] is before["Lima"] and after["Oslo"] is before["Oslo"]
+
+
+def test_dashboard_keeps_a_bounded_window_and_sorts_without_refetching(app_config, monkeypatch):
+    from dashboard import ALERT_HEAT, Dashboard
+    from flet.core.event import Event
+    from headless import headless_page
+
+    server = app_config
+    monkeypatch.setattr(Config, "ALERT_HEAT_TEMP", 15.0)  # the mock reports 15.2 °C
+    cities = [f"Site {i:03d}" for i in range(300)] + ["InvalidCityXYZ123"]
+
+    async def scroll(dashboard, row):
+        data = {"t": "update", "p": row * Config.DASHBOARD_ROW_HEIGHT, "vd": 600}
+        await dashboard.page.on_event_async(Event(dashboard.grid.uid, "onScroll", json.dumps(data)))
+
+    async def run():
+        page, connection = headless_page()
+        dashboard = Dashboard(page, cities, columns=5)
+        page.update()
+        built_before_load = len(dashboard.cards)
+        await scroll(dashboard, 30)
+        dashboard.sort_dropdown.value = "temp"  # changed while loading
+        await dashboard.on_view_change(None)
+        async with WeatherService(retry=fast_retry()) as service:
+            service.base_url = server.url
+            await dashboard.load(service, concurrency=16)
+        after_load = dashboard.scroll_row, dashboard.first, dashboard.sort_dropdown.value
+        await scroll(dashboard, 58)
+        at_bottom = len(dashboard.cards), int(dashboard.order[0]) in dashboard.cards
+        requests = server.request_count
+        dashboard.descending_switch.value = True
+        await dashboard.on_view_change(None)
+        by_temp = [int(row) for row in dashboard.order]
+        dashboard.alerts_switch.value = True
+        dashboard.filter_input.value = "site 01"
+        await dashboard.on_view_change(None)
+        return dashboard, built_before_load, after_load, at_bottom, requests, by_temp
+
+    dashboard, built_before_load, after_load, at_bottom, requests, by_temp = asyncio.run(run())
+    table = dashboard.table
+    window = (5 + 2 * dashboard.margin_rows) * 5  # 600 px visible = 5 rows, plus margins
+    assert built_before_load == 8 * 5  # the first screen and the margin below it
+    assert after_load == (30, 30 - dashboard.margin_rows, "temp")  # load kept the view
+    assert requests == server.request_count == len(cities)  # sorting did not refetch
+    assert table.loaded.all() and table.errors[-1] and np.isnan(table.temp[-1])
+    assert by_temp[:3] == [0, 1, 2] and by_temp[-1] == len(cities) - 1  # no data sorts last
+    assert [table.cities[row] for row in dashboard.order] == [f"Site {i:03d}" for i in range(10, 20)]
+    assert all(table.alerts[row] & ALERT_HEAT for row in dashboard.order)
+    assert at_bottom[0] <= window and not at_bottom[1]  # cards scrolled past were dropped
+    assert set(dashboard.cards) <= set(dashboard.order.tolist())
+
+
+def test_dashboard_shows_startup_errors_and_closes_once(app_config, tmp_path, monkeypatch):
+    import dashboard
+    import main
+    from headless import headless_page
+    from observation_store import ObservationStore
+
+    cities = tmp_path / "cities.txt"
+
+    async def open_dashboard():
+        page, _ = headless_page()
+        await dashboard.main(page)
+        return page
+
+    async def run():
+        monkeypatch.setattr("sys.argv", ["dashboard.py", str(cities)])
+        missing = (await open_dashboard()).controls[0].value
+        cities.write_text("Oslo\nLima\n")
+        page = await open_dashboard()
+        await asyncio.gather(page.on_disconnect(None), page.on_close(None))
+        return missing
+
+    missing = asyncio.run(run())
+    assert missing.startswith("❌") and "cities.txt" in missing
+    assert main._services is None and main._service_users == 0  # released once
+    observations = ObservationStore(tmp_path / Config.OBSERVATIONS_DB_FILE)
+    assert len(observations) == 2  # flushed on close
+    observations.close()
+
+
+def test_cli_streams_results_and_resumes_after_interruption(app_config, tmp_path, monkeypatch):
+    import cli
+
+    server = app_config
+    server.set_latency(fixed(0.01))
+    monkeypatch.setattr(Config, "CLI_CHECKPOINT_INTERVAL", 0.0)
+    lines = [f"Town {i:03d}" for i in range(60)]
+    lines[5], lines[6], lines[7] = "# comment", "", "51.5,-0.12"
+    lines[8] = "InvalidCityXYZ123"
+    source = tmp_path / "cities.txt"
+    source.write_text("\n".join(lines) + "\n")
+    output, checkpoint = tmp_path / "out.ndjson", tmp_path / "out.ckpt"
+    argv = [str(source), "-o", str(output), "--checkpoint", str(checkpoint), "-c", "4"]
+
+    async def interrupt():
+        task = asyncio.create_task(cli.run(cli.build_parser().parse_args(argv)))
+        while not output.exists() or len(output.read_text().splitlines()) < 20:
+            await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(interrupt())
+    saved = json.loads(checkpoint.read_text())
+    assert saved["below"] >= 20 and len(saved["done"]) < 4  # only out-of-order lines
+
+    assert cli.main(argv) == 0
+    records = [json.loads(line) for line in output.read_text().splitlines()]
+    assert sorted(r["line"] for r in records) == [i + 1 for i in range(60) if i not in (5, 6)]
+    assert server.request_count <= len(records) + 4  # only the lookups cut off were redone
+    by_line = {r["line"]: r for r in records}
+    assert by_line[8]["name"] == "Coordinates" and by_line[8]["query"] == "51.5,-0.12"
+    assert by_line[9]["ok"] is False and by_line[9]["error"]
+    assert by_line[1]["ok"] is True and by_line[1]["units"] == "metric"
+    assert not checkpoint.exists()  # finished runs start over
+
+
+def test_observation_store_dedupes_and_rolls_up_by_hour_and_day(server, tmp_path):
+    import sqlite3
+    from observation_store import DAY, HOUR, ObservationStore
+
+    store = ObservationStore(tmp_path / "history.db", batch_size=50)
+    start = 1_700_006_400  # midnight UTC
+    rows = [("Oslo, NO", start + i * 600, float(i % 7), 0.0, 50.0, float(i % 5)) for i in range(300)]
+    assert store.ingest(rows) == 300
+    assert store.ingest(rows[:60] + [("oslo,  no", start, 99.0, 0.0, 0.0, 0.0)]) == 0  # duplicates
+
+    raw = store.series("Oslo, NO", start, start + 2 * DAY, "raw")
+    hourly = store.series("OSLO, NO", start + 1, start + 2 * DAY, "hour")
+    daily = store.series("Oslo, NO", start, start + 2 * DAY, "day")
+    assert len(raw) == 288 and store.series("Oslo, NO", start, start + HOUR, "raw").time[-1] == start + 3000
+    assert len(hourly) == 48 and hourly.time[0] == start and (hourly.count == 6).all()
+    assert list(daily.count) == [144, 144]
+    first_day = raw.time < start + DAY
+    assert np.isclose(daily.temp_mean[0], raw.temp_mean[first_day].mean())
+    assert daily.wind_max[1] == raw.wind_max[~first_day].max()
+    assert len(store.series("Nowhere", start, start + DAY)) == 0
+
+    # Fetched snapshots are recorded once per observation time
+    async def fetch():
+        observations = ObservationStore(tmp_path / "fetched.db", flush_interval=0)
+        async with WeatherService(retry=fast_retry(), observations=observations) as service:
+            service.base_url = server.url
+            await service.get_weather("Paris")
+            service.cache.clear()
+            await service.get_weather("Paris")
+        observations.close()
+        return observations
+
+    observations = asyncio.run(fetch())
+    assert (observations.written, observations.duplicates) == (1, 1)
+    store.close()
+
+    # A failing write is logged, not raised into the lookup or the batch
+    class FullDisk(ObservationStore):
+        def flush(self):
+            raise sqlite3.OperationalError("database or disk is full")
+
+    async def batch():
+        failing = FullDisk(tmp_path / "full.db", flush_interval=0)
+        async with WeatherService(retry=fast_retry(), observations=failing) as service:
+            service.base_url = server.url
+            return [r async for r in service.iter_weather_many(["Oslo", "Rome"])]
+
+    assert len(asyncio.run(batch())) == 2
+
+
+def test_observation_stores_sharing_a_file_reuse_city_ids(tmp_path):
+    from observation_store import ObservationStore
 
+    path = tmp_path / "shared.db"
+    first, second = ObservationStore(path), ObservationStore(path)
+    assert first.ingest([("Oslo, NO", 1_700_000_000, 1.0, 0.0, 50.0, 2.0)]) == 1
+    assert second.ingest([("oslo, no", 1_700_000_600, 3.0, 0.0, 50.0, 4.0)]) == 1
+    assert first.cities() == second.cities() == ["oslo, no"]
+    assert len(first.series("Oslo, NO", 1_700_000_000, 1_700_001_000, "raw")) == 2
+    first.close()
+    second.close()
 
 if __name__ == "__main__":
-    asyncio.run(run_tests())
\ No newline at end of file
+    raise SystemExit(pytest.main([__file__]))
@@ -0,0 +1,83 @@
+"""Unit systems used by the OpenWeatherMap API and conversions between them.
+
+The service always fetches in ``Config.API_UNITS``; everything shown in
+another unit system is converted here, locally. The conversions are
+plain arithmetic, so they work on single floats and, element-wise, on
+NumPy arrays.
+"""
+
+import dataclasses
+from typing import List, Sequence, TypeVar
+
+T = TypeVar("T")
+
+METRIC = "metric"  # °C, m/s
+IMPERIAL = "imperial"  # °F, mph
+STANDARD = "standard"  # K, m/s
+
+UNIT_SYSTEMS = (METRIC, IMPERIAL, STANDARD)
+
+TEMPERATURE_SYMBOLS = {METRIC: "°C", IMPERIAL: "°F", STANDARD: "K"}
+SPEED_SYMBOLS = {METRIC: "m/s", IMPERIAL: "mph", STANDARD: "m/s"}
+
+MPH_PER_MPS = 2.2369362920544
+
+
+def _check(units: str):
+    if units not in UNIT_SYSTEMS:
+        raise ValueError(f"Unknown unit system: {units}")
+
+
+def convert_temperature(value, from_units: str, to_units: str):
+    """Convert a temperature (or an array of them) between unit systems."""
+    _check(from_units)
+    _check(to_units)
+    if from_units == to_units:
+        return value
+    if from_units == IMPERIAL:
+        celsius = (value - 32) * (5 / 9)
+    elif from_units == STANDARD:
+        celsius = value - 273.15
+    else:
+        celsius = value
+    if to_units == IMPERIAL:
+        return celsius * (9 / 5) + 32
+    if to_units == STANDARD:
+        return celsius + 273.15
+    return celsius
+
+
+def convert_speed(value, from_units: str, to_units: str):
+    """Convert a wind speed (or an array of them) between unit systems."""
+    _check(from_units)
+    _check(to_units)
+    if (from_units == IMPERIAL) == (to_units == IMPERIAL):
+        return value  # metric and standard both use m/s
+    if to_units == IMPERIAL:
+        return value * MPH_PER_MPS
+    return value / MPH_PER_MPS
+
+
+def convert_snapshots(snapshots: Sequence[T], from_units: str, to_units: str) -> List[T]:
+    """
+    Convert the temperature, feels-like and wind speed of many snapshots.
+
+    Args:
+        snapshots: WeatherSnapshot-like dataclasses in ``from_units``
+        from_units: Unit system of the snapshots
+        to_units: Unit system to return
+
+    Returns:
+        Converted copies, in order (the same objects if no conversion is needed)
+    """
+    if from_units == to_units:
+        return list(snapshots)
+    return [
+        dataclasses.replace(
+            s,
+            temp=convert_temperature(s.temp, from_units, to_units),
+            feels_like=convert_temperature(s.feels_like, from_units, to_units),
+            wind_speed=convert_speed(s.wind_speed, from_units, to_units),
+        )
+        for s in snapshots
+    ]
@@ -0,0 +1,222 @@
+"""Background refresh scheduler for watched cities."""
+
+import asyncio
+import heapq
+import itertools
+import random
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from config import Config
+from models import WeatherSnapshot
+from weather_service import WeatherServiceError
+
+
+@dataclass
+class WatchedCity:
+    """Schedule and last pushed snapshot for one watched city."""
+
+    __slots__ = ("city", "interval", "seq", "snapshot", "failures")
+
+    city: str
+    interval: float
+    seq: int  # matches the live heap entry; older entries are skipped
+    snapshot: Optional[WeatherSnapshot]
+    failures: int
+
+
+def _observation(snapshot: WeatherSnapshot) -> Tuple:
+    """The parts of a snapshot the UI shows; ``fetched_at`` alone is not a change."""
+    return (
+        snapshot.name, snapshot.country, snapshot.temp, snapshot.feels_like,
+        snapshot.humidity, snapshot.description, snapshot.icon,
+        snapshot.wind_speed, snapshot.timestamp, snapshot.stale,
+    )
+
+
+class Watchlist:
+    """Keeps a set of cities current by refreshing each on its own interval.
+
+    A single task sleeps until the earliest city is due. Each refresh is
+    rescheduled ``interval`` seconds after it finishes, scaled by a random
+    factor in ``1 ± jitter`` so that cities added together drift apart
+    instead of refreshing in lockstep. ``on_change`` is called only when
+    the fetched weather differs from what was last pushed.
+
+    ``pause()`` stops refreshes (e.g. while the window is hidden);
+    ``resume()`` spreads overdue cities over ``jitter * interval`` rather
+    than fetching them all at once.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[str], Awaitable[WeatherSnapshot]],
+        on_change: Callable[[str, WeatherSnapshot], None],
+        interval: Optional[float] = None,
+        jitter: Optional[float] = None,
+        rng: Optional[random.Random] = None,
+    ):
+        self.fetch = fetch
+        self.on_change = on_change
+        self.interval = interval or Config.WATCHLIST_INTERVAL
+        self.jitter = Config.WATCHLIST_JITTER if jitter is None else jitter
+        if not 0 <= self.jitter < 1:
+            raise ValueError("jitter must be in [0, 1)")
+        self._rng = rng or random.Random()
+        self._cities: Dict[str, WatchedCity] = {}
+        self._due: List[Tuple[float, int, str]] = []
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._refreshing: Set[asyncio.Task] = set()
+        self._paused = False
+        self._stopped = False
+        self.refreshes = 0
+
+    def __contains__(self, city: str) -> bool:
+        return city in self._cities
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._cities)
+
+    def __len__(self) -> int:
+        return len(self._cities)
+
+    @property
+    def paused(self) -> bool:
+        return self._paused
+
+    def latest(self, city: str) -> Optional[WeatherSnapshot]:
+        """The last snapshot pushed for a watched city."""
+        watched = self._cities.get(city)
+        return watched.snapshot if watched else None
+
+    def add(
+        self,
+        city: str,
+        interval: Optional[float] = None,
+        delay: float = 0.0,
+        snapshot: Optional[WeatherSnapshot] = None,
+    ) -> bool:
+        """
+        Start watching a city.
+
+        Args:
+            city: City name as passed to ``fetch``
+            interval: Seconds between refreshes (defaults to the list's)
+            delay: Seconds before the first refresh
+            snapshot: Weather already on screen, so an identical first
+                refresh is not pushed again
+
+        Returns:
+            False if the city was already watched
+        """
+        if city in self._cities:
+            return False
+        watched = WatchedCity(city, interval or self.interval, 0, snapshot, 0)
+        self._cities[city] = watched
+        self._schedule(watched, delay)
+        return True
+
+    def add_many(self, cities: List[str]):
+        """Watch several cities, spreading their first refreshes over the jitter window."""
+        for city in cities:
+            self.add(city, delay=self._rng.uniform(0, self.jitter * self.interval))
+
+    def remove(self, city: str) -> bool:
+        """Stop watching a city. Its heap entry is dropped lazily."""
+        return self._cities.pop(city, None) is not None
+
+    def pause(self):
+        """Stop refreshing until ``resume()``; refreshes in progress finish."""
+        self._paused = True
+
+    def resume(self):
+        """Restart refreshes, spreading out any that fell due while paused."""
+        if not self._paused:
+            return
+        self._paused = False
+        now = time.monotonic()
+        overdue = []
+        while self._due and self._due[0][0] <= now:
+            overdue.append(heapq.heappop(self._due))
+        for _, seq, city in overdue:
+            watched = self._cities.get(city)
+            if watched is not None and watched.seq == seq:
+                self._schedule(
+                    watched, self._rng.uniform(0, self.jitter * watched.interval)
+                )
+        self._wakeup.set()
+
+    def _next_delay(self, watched: WatchedCity) -> float:
+        delay = watched.interval * (1 + self._rng.uniform(-self.jitter, self.jitter))
+        # Back off on repeated failures, up to four intervals
+        return delay * min(4, 2 ** watched.failures)
+
+    def _schedule(self, watched: WatchedCity, delay: float):
+        watched.seq = next(self._seq)
+        heapq.heappush(self._due, (time.monotonic() + delay, watched.seq, watched.city))
+        self._wakeup.set()
+
+    def _pop_due(self) -> List[WatchedCity]:
+        now = time.monotonic()
+        due = []
+        while self._due and self._due[0][0] <= now:
+            _, seq, city = heapq.heappop(self._due)
+            watched = self._cities.get(city)
+            if watched is not None and watched.seq == seq:
+                due.append(watched)
+        return due
+
+    def _time_until_due(self) -> Optional[float]:
+        while self._due:
+            _, seq, city = self._due[0]
+            watched = self._cities.get(city)
+            if watched is not None and watched.seq == seq:
+                return max(0.0, self._due[0][0] - time.monotonic())
+            heapq.heappop(self._due)  # removed or rescheduled
+        return None
+
+    async def run(self):
+        """Refresh watched cities until ``stop()`` is called."""
+        self._stopped = False
+        while not self._stopped:
+            self._wakeup.clear()
+            timeout = None if self._paused else self._time_until_due()
+            if timeout is None or timeout > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            for watched in self._pop_due():
+                task = asyncio.create_task(self._refresh(watched))
+                self._refreshing.add(task)
+                task.add_done_callback(self._refreshing.discard)
+
+    async def _refresh(self, watched: WatchedCity):
+        self.refreshes += 1
+        try:
+            snapshot = await self.fetch(watched.city)
+        except WeatherServiceError:
+            watched.failures += 1
+            snapshot = None
+        else:
+            watched.failures = 0
+        if self._cities.get(watched.city) is not watched:
+            return  # removed while the request was in flight
+        self._schedule(watched, self._next_delay(watched))
+        if snapshot is None:
+            return
+        if watched.snapshot is None or _observation(snapshot) != _observation(watched.snapshot):
+            watched.snapshot = snapshot
+            self.on_change(watched.city, snapshot)
+
+    async def stop(self):
+        """Stop the scheduler and cancel refreshes in progress."""
+        self._stopped = True
+        self._wakeup.set()
+        tasks = list(self._refreshing)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -1,9 +1,36 @@
 # weather_service.py
 """Weather API service layer."""
 
+import asyncio
+import dataclasses
+import logging
+import sqlite3
+import time
 import httpx
-from typing import Dict, Optional
+from email.utils import parsedate_to_datetime
+from typing import (
+    AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
+)
 from config import Config
+import geo_grid
+from forecast import Forecast
+from gazetteer import City, Gazetteer
+from metrics import Metrics
+from observation_store import ObservationStore
+from models import WeatherSnapshot, decode_json
+from rate_limiter import RateLimiter, RateLimitExceeded
+from resilience import CircuitBreaker, RetryPolicy
+from response_cache import CacheEntry, ResponseCache
+from weather_store import WeatherStore
+
+
+# A city name or a (lat, lon) pair
+Location = Union[str, Tuple[float, float]]
+BatchResult = Union[WeatherSnapshot, "WeatherServiceError"]
+# Performs one upstream request at the given rate limiter priority
+Fetch = Callable[[int], Awaitable[WeatherSnapshot]]
+
+logger = logging.getLogger(__name__)
 
 
 class WeatherServiceError(Exception):
@@ -11,105 +38,826 @@ class WeatherServiceError(Exception):
     pass
 
 
+class WeatherServiceNetworkError(WeatherServiceError):
+    """The API could not be reached (timeout or network failure)."""
+    pass
+
+
+class CircuitOpenError(WeatherServiceNetworkError):
+    """The circuit breaker is open, so the request was not sent."""
+    pass
+
+
+class CityNotFoundError(WeatherServiceError):
+    """The city is unknown; ``suggestions`` lists close known cities."""
+    
+    def __init__(self, city: str, suggestions: Optional[List[City]] = None):
+        self.city = city
+        self.suggestions = suggestions or []
+        if self.suggestions:
+            names = ", ".join(str(s) for s in self.suggestions)
+            message = f"City '{city}' not found. Did you mean {names}?"
+        else:
+            message = f"City '{city}' not found. Please check the spelling."
+        super().__init__(message)
+
+
+class RateLimitedError(WeatherServiceError):
+    """The request was held back to stay within the API quota."""
+    pass
+
+
+# Transient failures that are safe to retry for an idempotent GET
+RETRYABLE_ERRORS = (httpx.TimeoutException, httpx.ConnectError)
+
+
+def retry_after_seconds(response: httpx.Response, default: float = 60.0) -> float:
+    """Read a Retry-After header given in seconds or as an HTTP date."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return default
+
+
 class WeatherService:
-    """Service for fetching weather data from OpenWeatherMap API."""
+    """Service for fetching weather data from OpenWeatherMap API.
     
-    def __init__(self):
+    The service owns one long-lived ``httpx.AsyncClient`` so that
+    connections to the API are pooled and kept alive between lookups.
+    Use it as an async context manager, or call ``open()`` and
+    ``aclose()`` explicitly.
+    
+    City lookups are cached in memory; a stale entry is returned at once
+    while a fresh copy is fetched in the background. Concurrent lookups
+    for the same city share a single upstream request.
+    
+    Pass a ``Metrics`` registry to record lookup latency, cache sources,
+    retries, error classes and per-phase HTTP timings. Without one the
+    hot path only pays for an ``is None`` check.
+    
+    Pass an ``ObservationStore`` to keep every fetched observation for
+    history charts.
+    """
+    
+    def __init__(
+        self,
+        limits: Optional[httpx.Limits] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        cache: Optional[ResponseCache] = None,
+        store: Optional[WeatherStore] = None,
+        retry: Optional[RetryPolicy] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        limiter: Optional[RateLimiter] = None,
+        geo_precision: Optional[int] = None,
+        geo_tolerance_km: Optional[float] = None,
+        gazetteer: Optional[Gazetteer] = None,
+        strict_cities: Optional[bool] = None,
+        metrics: Optional[Metrics] = None,
+        observations: Optional[ObservationStore] = None,
+    ):
+        Config.load()
         self.api_key = Config.API_KEY
         self.base_url = Config.BASE_URL
+        self.forecast_url = Config.FORECAST_URL
         self.timeout = Config.TIMEOUT
+        self.limits = limits or httpx.Limits(
+            max_connections=Config.MAX_CONNECTIONS,
+            max_keepalive_connections=Config.MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=Config.KEEPALIVE_EXPIRY,
+        )
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        if cache is None:
+            cache = ResponseCache(
+                ttl=Config.CACHE_TTL,
+                max_entries=Config.CACHE_MAX_ENTRIES,
+                stale_ttl=Config.CACHE_STALE_TTL,
+            )
+        self.cache = cache
+        self.forecast_cache = ResponseCache(
+            ttl=Config.FORECAST_TTL,
+            max_entries=Config.CACHE_MAX_ENTRIES,
+            stale_ttl=Config.CACHE_STALE_TTL,
+        )
+        self.store = store
+        self.geo_precision = geo_precision or Config.GEO_PRECISION
+        if geo_tolerance_km is None:
+            geo_tolerance_km = Config.GEO_NEIGHBOR_TOLERANCE_KM
+        self.geo_tolerance_km = geo_tolerance_km
+        self.gazetteer = gazetteer
+        if strict_cities is None:
+            strict_cities = Config.GAZETTEER_STRICT
+        self.strict_cities = strict_cities
+        self.retry = retry or RetryPolicy(
+            attempts=Config.RETRY_ATTEMPTS,
+            base_delay=Config.RETRY_BASE_DELAY,
+            max_delay=Config.RETRY_MAX_DELAY,
+        )
+        self.breaker = breaker or CircuitBreaker(
+            failure_threshold=Config.BREAKER_FAILURE_THRESHOLD,
+            reset_timeout=Config.BREAKER_RESET_TIMEOUT,
+        )
+        self.limiter = limiter or RateLimiter(
+            rate=Config.RATE_LIMIT_PER_MINUTE / 60,
+            burst=Config.RATE_LIMIT_BURST,
+            policy=Config.RATE_LIMIT_POLICY,
+        )
+        self.metrics = metrics
+        self.observations = observations
+        self._refreshing: Dict[Tuple[str, str], asyncio.Task] = {}
+        self._in_flight: Dict[Tuple[str, str], asyncio.Future] = {}
+        self._writes: Set[asyncio.Task] = set()  # best-effort store writes
+    
+    def open(self) -> "WeatherService":
+        """Create the shared HTTP client if it is not already open."""
+        if self._client is None or self._client.is_closed:
+            hooks = {"request": [self._trace_request]} if self.metrics else {}
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=self.limits,
+                transport=self._transport,
+                event_hooks=hooks,
+            )
+        return self
+    
+    async def aclose(self):
+        """Close the shared HTTP client and its pooled connections."""
+        tasks = [*self._refreshing.values(), *self._in_flight.values()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        # Let pending store writes finish; the caller closes the store next
+        await asyncio.gather(*self._writes, return_exceptions=True)
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
+    async def __aenter__(self) -> "WeatherService":
+        return self.open()
     
-    async def get_weather(self, city: str) -> Dict:
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """The shared HTTP client, opened on first use."""
+        return self.open()._client
+    
+    @staticmethod
+    def cache_key(city: str) -> Tuple[str, str]:
+        """Normalize a city name into a cache key."""
+        return " ".join(city.split()).casefold(), Config.API_UNITS
+    
+    def cache_stats(self) -> Dict[str, int]:
+        """Return cache hit, miss and eviction counters."""
+        return self.cache.stats()
+    
+    def breaker_stats(self) -> Dict:
+        """Return the circuit breaker state and counters."""
+        return self.breaker.stats()
+    
+    def limiter_stats(self) -> Dict:
+        """Return the rate limiter's token and queue counters."""
+        return self.limiter.stats()
+    
+    async def _trace_request(self, request: httpx.Request):
+        """
+        Request hook that times each connection and HTTP phase.
+        
+        httpcore reports ``<phase>.started`` / ``<phase>.complete`` events
+        through the ``trace`` extension: ``connect_tcp`` (which includes
+        the DNS lookup), ``start_tls``, ``send_request_headers``,
+        ``receive_response_headers`` (time to first byte) and
+        ``receive_response_body``. Phases are skipped on a reused
+        connection, so connect counts also show pool effectiveness.
+        """
+        metrics = self.metrics
+        started: Dict[str, float] = {}
+        
+        async def trace(event: str, info: Dict):
+            name, _, stage = event.rpartition(".")
+            if stage == "started":
+                started[name] = time.perf_counter()
+            elif stage in ("complete", "failed") and name in started:
+                elapsed = time.perf_counter() - started.pop(name)
+                phase = name.rpartition(".")[2]
+                if stage == "complete":
+                    metrics.observe("http_phase_seconds", elapsed, phase=phase)
+                else:
+                    metrics.increment("http_phase_failures_total", phase=phase)
+        
+        request.extensions["trace"] = trace
+    
+    async def _request(
+        self,
+        params: Dict,
+        priority: int = RateLimiter.INTERACTIVE,
+        url: Optional[str] = None,
+    ) -> httpx.Response:
+        """
+        Send a GET to the API with retries, guarded by the circuit breaker.
+        
+        Args:
+            params: Query parameters
+            priority: Rate limiter lane for this request
+            url: Endpoint to call; defaults to current weather
+            
+        Returns:
+            The final response, which may still be a 5xx after retries
+            
+        Raises:
+            CircuitOpenError: If the breaker is rejecting requests
+            RateLimitedError: If the limiter rejects the request
+            httpx.HTTPError: If the last attempt failed in transport
+        """
+        metrics = self.metrics
+        if not self.breaker.allow_request():
+            if metrics is not None:
+                metrics.increment("breaker_rejections_total")
+            raise CircuitOpenError(
+                "Weather service is temporarily unavailable. "
+                f"Retrying in {self.breaker.retry_after():.0f}s."
+            )
+        
+        try:
+            for attempt in range(self.retry.attempts):
+                final = attempt == self.retry.attempts - 1
+                await self.limiter.acquire(priority)
+                started = time.perf_counter() if metrics is not None else 0.0
+                try:
+                    response = await self.client.get(url or self.base_url, params=params)
+                except RETRYABLE_ERRORS as e:
+                    if metrics is not None:
+                        self._record_upstream(started, type(e).__name__, final)
+                    if final:
+                        self.breaker.record_failure()
+                        raise
+                except httpx.HTTPError as e:
+                    if metrics is not None:
+                        self._record_upstream(started, type(e).__name__, True)
+                    self.breaker.record_failure()
+                    raise
+                else:
+                    if metrics is not None:
+                        self._record_upstream(
+                            started, str(response.status_code),
+                            final or response.status_code < 500,
+                        )
+                    if response.status_code == 429:
+                        self.limiter.block_for(retry_after_seconds(response))
+                    if response.status_code < 500:
+                        self.breaker.record_success()
+                        return response
+                    if final:
+                        self.breaker.record_failure()
+                        return response
+                await asyncio.sleep(self.retry.delay(attempt))
+        except RateLimitExceeded as e:
+            self.breaker.abandon_trial()
+            if metrics is not None:
+                metrics.increment("rate_limit_rejections_total")
+            raise RateLimitedError(
+                f"Too many requests. Please try again in {e.retry_after:.0f}s."
+            )
+        except asyncio.CancelledError:
+            self.breaker.abandon_trial()
+            raise
+    
+    def _record_upstream(self, started: float, outcome: str, final: bool):
+        """Record one upstream attempt, and a retry if another follows."""
+        self.metrics.observe(
+            "upstream_seconds", time.perf_counter() - started, outcome=outcome
+        )
+        if not final:
+            self.metrics.increment("retries_total", reason=outcome)
+    
+    async def _timed(self, kind: str, lookup: Awaitable[WeatherSnapshot]) -> WeatherSnapshot:
+        """Await a public lookup, recording its latency and error class."""
+        started = time.perf_counter()
+        outcome = "ok"
+        try:
+            return await lookup
+        except WeatherServiceError as e:
+            outcome = type(e).__name__
+            self.metrics.increment("errors_total", kind=kind, error=outcome)
+            raise
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            raise
+        finally:
+            self.metrics.observe(
+                "lookup_seconds", time.perf_counter() - started,
+                kind=kind, outcome=outcome,
+            )
+    
+    async def get_weather(
+        self, city: str, background: bool = False, refresh: bool = False
+    ) -> WeatherSnapshot:
         """
         Fetch weather data for a given city.
         
+        Fresh cached data is returned without a request. Stale cached
+        data is returned immediately and refreshed in the background.
+        
         Args:
             city: Name of the city
+            background: Queue behind interactive lookups when rate limited
+            refresh: Skip the cache and store and ask the API (scheduled
+                refreshes, which need the new value itself)
             
         Returns:
-            Dictionary containing weather data
+            WeatherSnapshot with the current weather
             
         Raises:
             WeatherServiceError: If the request fails
         """
+        if self.metrics is not None:
+            return await self._timed("city", self._get_weather(city, background, refresh))
+        return await self._get_weather(city, background, refresh)
+    
+    async def _get_weather(
+        self, city: str, background: bool, refresh: bool = False
+    ) -> WeatherSnapshot:
+        query = self._resolve(city)
+        key = self.cache_key(query)
+        try:
+            return await self._lookup(
+                key, lambda priority: self._fetch_city(query, priority), background, refresh
+            )
+        except CityNotFoundError:
+            raise self._not_found(city) from None
+    
+    def _resolve(self, city: str) -> str:
+        """Turn user input into the ``q=`` value to request."""
         if not city:
             raise WeatherServiceError("City name cannot be empty")
+        if self.gazetteer is not None:
+            place = self.gazetteer.resolve(city)
+            if place is not None:
+                return place.query
+            if self.strict_cities:
+                raise self._not_found(city)
+        return city
+    
+    def _not_found(self, city: str) -> CityNotFoundError:
+        """Build a not-found error with suggestions from the local index."""
+        suggestions = self.gazetteer.suggest(city) if self.gazetteer else []
+        return CityNotFoundError(city, suggestions)
+    
+    async def _lookup(
+        self,
+        key: Tuple[str, str],
+        fetch: Fetch,
+        background: bool = False,
+        refresh: bool = False,
+    ) -> WeatherSnapshot:
+        """
+        Serve a lookup from the cache, the store or the API, in that order.
+        
+        Args:
+            key: Cache key for the lookup
+            fetch: Callable taking a rate limiter priority and returning
+                the upstream coroutine
+            background: Queue behind interactive lookups when rate limited
+            refresh: Go to the API even if a cached copy is fresh; a
+                cached copy is still served, marked stale, when offline
+            
+        Returns:
+            WeatherSnapshot with the current weather
+        """
+        metrics = self.metrics
+        if refresh:
+            # peek: scheduled refreshes must not count as cache hits or misses
+            entry = self.cache.peek(key)
+            if entry is not None and self.cache.is_expired(entry):
+                entry = None
+            return await self._refresh_now(key, fetch, background, entry)
+        entry = self.cache.get(key)
+        if entry is not None:
+            fresh = self.cache.is_fresh(entry)
+            if not fresh:
+                self._refresh_in_background(key, fetch)
+            if metrics is not None:
+                metrics.increment("cache_total", source="memory" if fresh else "stale")
+            return entry.value
+        
+        stored = await self._load_stored(key)
+        if stored is not None:
+            age = max(0.0, time.time() - stored.fetched_at)
+            if age <= self.cache.ttl:
+                self.cache.set(key, stored, age=age)
+                if metrics is not None:
+                    metrics.increment("cache_total", source="store")
+                return stored
+        
+        if metrics is not None:
+            metrics.increment("cache_total", source="miss")
+        priority = RateLimiter.BACKGROUND if background else RateLimiter.INTERACTIVE
+        try:
+            return await self._single_flight(
+                key, lambda: self._fetch_and_cache(key, fetch, priority)
+            )
+        except WeatherServiceNetworkError:
+            if stored is None:
+                raise
+            if metrics is not None:
+                metrics.increment("cache_total", source="offline")
+            return dataclasses.replace(stored, stale=True)
+    
+    async def _refresh_now(
+        self,
+        key: Tuple[str, str],
+        fetch: Fetch,
+        background: bool,
+        entry: Optional[CacheEntry],
+    ) -> WeatherSnapshot:
+        if self.metrics is not None:
+            self.metrics.increment("cache_total", source="refresh")
+        priority = RateLimiter.BACKGROUND if background else RateLimiter.INTERACTIVE
+        try:
+            return await self._single_flight(
+                key, lambda: self._fetch_and_cache(key, fetch, priority)
+            )
+        except WeatherServiceNetworkError:
+            if entry is None:
+                raise
+            return dataclasses.replace(entry.value, stale=True)
+    
+    async def _load_stored(self, key: Tuple[str, str]) -> Optional[WeatherSnapshot]:
+        """Read a snapshot from the persistent store."""
+        if self.store is None:
+            return None
+        stored = await asyncio.to_thread(self.store.get, "|".join(key))
+        if stored is None:
+            return None
+        data, _, _ = stored
+        return WeatherSnapshot.from_dict(data)
+    
+    async def _single_flight(
+        self,
+        key: Tuple[str, str],
+        fetch: Callable[[], Awaitable[WeatherSnapshot]],
+    ) -> WeatherSnapshot:
+        """
+        Run ``fetch`` once per key, sharing the result with concurrent callers.
         
+        Args:
+            key: Cache key identifying the request
+            fetch: Zero-argument callable returning the upstream coroutine
+            
+        Returns:
+            The shared result; errors are raised to every waiter
+        """
+        future = self._in_flight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(fetch())
+            self._in_flight[key] = future
+            future.add_done_callback(lambda f: self._forget_in_flight(key, f))
+        # Shield so one caller being cancelled does not cancel the others
+        return await asyncio.shield(future)
+    
+    def _forget_in_flight(self, key: Tuple[str, str], future: asyncio.Future):
+        if self._in_flight.get(key) is future:
+            del self._in_flight[key]
+        if not future.cancelled():
+            future.exception()  # mark retrieved even if every waiter left
+    
+    async def _fetch_and_cache(
+        self, key: Tuple[str, str], fetch: Fetch, priority: int
+    ) -> WeatherSnapshot:
+        snapshot = await fetch(priority)
+        self.cache.set(key, snapshot)
+        if self.store is not None:
+            # The lookup has succeeded; a disk problem must not fail it
+            self._write_behind(self._store_snapshot(key, snapshot))
+        if self.observations is not None and self.observations.add(snapshot):
+            self._write_behind(self._flush_observations())
+        return snapshot
+    
+    def _write_behind(self, write: Awaitable[None]):
+        """Run a best-effort write without holding up the lookup; ``aclose()`` waits for it."""
+        task = asyncio.ensure_future(write)
+        self._writes.add(task)
+        task.add_done_callback(self._writes.discard)
+    
+    async def _store_snapshot(self, key: Tuple[str, str], snapshot: WeatherSnapshot):
+        try:
+            await asyncio.to_thread(
+                self.store.put, "|".join(key), snapshot.to_dict(), key[1],
+                snapshot.fetched_at,
+            )
+        except sqlite3.Error:
+            logger.warning("Could not store weather for %r", key[0], exc_info=True)
+            if self.metrics is not None:
+                self.metrics.increment("store_errors_total", store="responses")
+    
+    async def _flush_observations(self):
+        try:
+            await asyncio.to_thread(self.observations.flush)
+        except sqlite3.Error:
+            logger.warning("Could not record observations", exc_info=True)
+            if self.metrics is not None:
+                self.metrics.increment("store_errors_total", store="observations")
+    
+    def _refresh_in_background(self, key: Tuple[str, str], fetch: Fetch):
+        """Re-fetch a stale entry without making the caller wait."""
+        if key in self._refreshing:
+            return
+        
+        async def refresh():
+            try:
+                await self._single_flight(
+                    key,
+                    lambda: self._fetch_and_cache(key, fetch, RateLimiter.BACKGROUND),
+                )
+            except WeatherServiceError:
+                pass  # keep serving the stale copy
+        
+        task = asyncio.create_task(refresh())
+        self._refreshing[key] = task
+        task.add_done_callback(lambda t: self._refreshing.pop(key, None))
+    
+    async def _fetch_city(
+        self, city: str, priority: int = RateLimiter.INTERACTIVE
+    ) -> WeatherSnapshot:
+        """Request current weather for a city from the API."""
+        # Parse JSON response once, keeping only the fields we use
+        return WeatherSnapshot.from_api(await self._get_city_json(city, priority))
+    
+    async def _get_city_json(
+        self, city: str, priority: int, url: Optional[str] = None
+    ) -> Dict:
+        """Request a city from the API and map failures to service errors."""
         # Build request parameters
         params = {
             "q": city,
             "appid": self.api_key,
-            "units": Config.UNITS,
+            "units": Config.API_UNITS,
         }
         
         try:
-            # Make async HTTP request
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(self.base_url, params=params)
-                
-                # Check for HTTP errors
-                if response.status_code == 404:
-                    raise WeatherServiceError(
-                        f"City '{city}' not found. Please check the spelling."
-                    )
-                elif response.status_code == 401:
-                    raise WeatherServiceError(
-                        "Invalid API key. Please check your configuration."
-                    )
-                elif response.status_code >= 500:
-                    raise WeatherServiceError(
-                        "Weather service is currently unavailable. "
-                        "Please try again later."
-                    )
-                elif response.status_code != 200:
-                    raise WeatherServiceError(
-                        f"Error fetching weather data: {response.status_code}"
-                    )
-                
-                # Parse JSON response
-                data = response.json()
-                return data
+            # Make async HTTP request over the pooled client
+            response = await self._request(params, priority, url)
+            
+            # Check for HTTP errors
+            if response.status_code == 404:
+                raise CityNotFoundError(city)
+            elif response.status_code == 401:
+                raise WeatherServiceError(
+                    "Invalid API key. Please check your configuration."
+                )
+            elif response.status_code == 429:
+                raise RateLimitedError(
+                    "Too many requests. Please wait a moment and try again."
+                )
+            elif response.status_code >= 500:
+                raise WeatherServiceError(
+                    "Weather service is currently unavailable. "
+                    "Please try again later."
+                )
+            elif response.status_code != 200:
+                raise WeatherServiceError(
+                    f"Error fetching weather data: {response.status_code}"
+                )
+            
+            return decode_json(response.content)
                 
         except httpx.TimeoutException:
-            raise WeatherServiceError(
+            raise WeatherServiceNetworkError(
                 "Request timed out. Please check your internet connection."
             )
         except httpx.NetworkError:
-            raise WeatherServiceError(
+            raise WeatherServiceNetworkError(
                 "Network error. Please check your internet connection."
             )
         except httpx.HTTPError as e:
             raise WeatherServiceError(f"HTTP error occurred: {str(e)}")
+        except WeatherServiceError:
+            raise
         except Exception as e:
             raise WeatherServiceError(f"An unexpected error occurred: {str(e)}")
     
+    async def get_forecast(self, city: str, background: bool = False) -> Forecast:
+        """
+        Fetch the 5 day / 3 hour forecast for a city.
+        
+        Forecasts are cached for ``Config.FORECAST_TTL``; if the API is
+        unreachable, an expired cached forecast is returned instead.
+        
+        Args:
+            city: Name of the city
+            background: Queue behind interactive lookups when rate limited
+            
+        Returns:
+            Forecast with one NumPy column per field
+            
+        Raises:
+            WeatherServiceError: If the request fails and nothing is cached
+        """
+        query = self._resolve(city)
+        key = self.cache_key(query)
+        entry = self.forecast_cache.get(key)
+        if entry is not None and self.forecast_cache.is_fresh(entry):
+            return entry.value
+        
+        priority = RateLimiter.BACKGROUND if background else RateLimiter.INTERACTIVE
+        
+        async def fetch() -> Forecast:
+            data = await self._get_city_json(query, priority, self.forecast_url)
+            forecast = Forecast.from_api(data, units=key[1])
+            self.forecast_cache.set(key, forecast)
+            return forecast
+        
+        try:
+            return await self._single_flight(("forecast|" + key[0], key[1]), fetch)
+        except CityNotFoundError:
+            raise self._not_found(city) from None
+        except WeatherServiceNetworkError:
+            if entry is None:
+                raise
+            return entry.value
+    
+    def coordinates_key(self, lat: float, lon: float) -> Tuple[str, str]:
+        """Snap coordinates to their geohash cell and return its cache key."""
+        return "@" + geo_grid.encode(lat, lon, self.geo_precision), Config.API_UNITS
+    
     async def get_weather_by_coordinates(
         self, 
         lat: float, 
-        lon: float
-    ) -> Dict:
+        lon: float,
+        background: bool = False,
+    ) -> WeatherSnapshot:
         """
         Fetch weather data by coordinates.
         
+        Coordinates are snapped to a geohash cell, so nearby lookups share
+        one cached response. When the cell itself is not cached, a fresh
+        neighbouring cell within ``geo_tolerance_km`` is used instead.
+        
         Args:
             lat: Latitude
             lon: Longitude
+            background: Queue behind interactive lookups when rate limited
             
         Returns:
-            Dictionary containing weather data
+            WeatherSnapshot with the current weather
         """
+        if self.metrics is not None:
+            return await self._timed(
+                "coordinates", self._get_weather_by_coordinates(lat, lon, background)
+            )
+        return await self._get_weather_by_coordinates(lat, lon, background)
+    
+    async def _get_weather_by_coordinates(
+        self, lat: float, lon: float, background: bool
+    ) -> WeatherSnapshot:
+        key = self.coordinates_key(lat, lon)
+        if key not in self.cache:
+            nearby = self._nearest_fresh_cell(lat, lon, key)
+            if nearby is not None:
+                if self.metrics is not None:
+                    self.metrics.increment("cache_total", source="neighbor")
+                return nearby
+        
+        cell = key[0][1:]
+        return await self._lookup(
+            key, lambda priority: self._fetch_cell(cell, priority), background
+        )
+    
+    def _nearest_fresh_cell(
+        self, lat: float, lon: float, key: Tuple[str, str]
+    ) -> Optional[WeatherSnapshot]:
+        """Return fresh data from the closest neighbouring cell in tolerance."""
+        best, best_distance = None, self.geo_tolerance_km
+        for cell in geo_grid.neighbors(key[0][1:]):
+            neighbor_key = ("@" + cell, key[1])
+            entry = self.cache.peek(neighbor_key)
+            if entry is None or not self.cache.is_fresh(entry):
+                continue
+            c_lat, c_lon, _, _ = geo_grid.decode(cell)
+            distance = geo_grid.haversine_km(lat, lon, c_lat, c_lon)
+            if distance <= best_distance:
+                best, best_distance = neighbor_key, distance
+        if best is None:
+            return None
+        return self.cache.get(best).value
+    
+    async def _fetch_cell(
+        self, cell: str, priority: int = RateLimiter.INTERACTIVE
+    ) -> WeatherSnapshot:
+        """Request current weather for the center of a geohash cell."""
+        lat, lon, _, _ = geo_grid.decode(cell)
         params = {
-            "lat": lat,
-            "lon": lon,
+            "lat": round(lat, 4),
+            "lon": round(lon, 4),
             "appid": self.api_key,
-            "units": Config.UNITS,
+            "units": Config.API_UNITS,
         }
         
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(self.base_url, params=params)
-                response.raise_for_status()
-                return response.json()
-                
+            response = await self._request(params, priority)
+            response.raise_for_status()
+            return WeatherSnapshot.from_api(decode_json(response.content))
+            
+        except WeatherServiceError:
+            raise
+        except (httpx.TimeoutException, httpx.NetworkError) as e:
+            raise WeatherServiceNetworkError(
+                f"Error fetching weather data: {str(e)}"
+            )
         except Exception as e:
-            raise WeatherServiceError(f"Error fetching weather data: {str(e)}")
\ No newline at end of file
+            raise WeatherServiceError(f"Error fetching weather data: {str(e)}")
+    
+    async def get_weather_for(
+        self, location: Location, background: bool = False
+    ) -> WeatherSnapshot:
+        """Fetch weather for a city name or a (lat, lon) pair."""
+        if isinstance(location, str):
+            return await self.get_weather(location, background)
+        lat, lon = location
+        return await self.get_weather_by_coordinates(lat, lon, background)
+    
+    async def get_weather_many(
+        self,
+        locations: Iterable[Location],
+        concurrency: Optional[int] = None,
+        background: bool = False,
+    ) -> List[BatchResult]:
+        """
+        Fetch weather for many locations concurrently.
+        
+        Args:
+            locations: City names and/or (lat, lon) pairs
+            concurrency: Maximum number of lookups running at once
+            background: Queue behind interactive lookups when rate limited
+            
+        Returns:
+            One entry per location, in input order: the weather data, or
+            the WeatherServiceError raised for that location
+        """
+        results: List[BatchResult] = []
+        batch = self.iter_weather_many(locations, concurrency, background)
+        async for index, _, result in batch:
+            results.extend([None] * (index + 1 - len(results)))
+            results[index] = result
+        return results
+    
+    async def iter_weather_many(
+        self,
+        locations: Iterable[Location],
+        concurrency: Optional[int] = None,
+        background: bool = False,
+    ) -> AsyncIterator[Tuple[int, Location, BatchResult]]:
+        """
+        Fetch weather for many locations, yielding results as they complete.
+        
+        Locations are pulled from the iterable only as slots free up, so
+        at most ``concurrency`` lookups are pending and arbitrarily long
+        inputs use constant memory. A failing location does not stop the
+        batch.
+        
+        Args:
+            locations: City names and/or (lat, lon) pairs
+            concurrency: Maximum number of lookups running at once
+            background: Queue behind interactive lookups when rate limited
+            
+        Yields:
+            (index, location, result) tuples in completion order, where
+            result is the weather data or a WeatherServiceError
+        """
+        limit = concurrency or Config.BATCH_CONCURRENCY
+        if limit < 1:
+            raise ValueError("concurrency must be at least 1")
+        
+        async def lookup(index: int, location: Location):
+            try:
+                data = await self.get_weather_for(location, background)
+                return index, location, data
+            except WeatherServiceError as e:
+                return index, location, e
+        
+        pending = set()
+        source = enumerate(locations)
+        try:
+            while True:
+                for index, location in source:
+                    pending.add(asyncio.ensure_future(lookup(index, location)))
+                    if len(pending) >= limit:
+                        break
+                if not pending:
+                    return
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
@@ -0,0 +1,123 @@
+"""SQLite-backed persistent store for weather API responses."""
+
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+
+
+class WeatherStore:
+    """Keeps the last response per lookup on disk across restarts.
+
+    Payloads are stored zlib-compressed together with the time they were
+    fetched and the units they were requested in. When the total payload
+    size exceeds ``max_bytes`` the least recently fetched rows are evicted;
+    the total is kept as a running count rather than summed on each put.
+    The connection is shared between threads so the service can call it
+    through ``asyncio.to_thread``.
+    """
+
+    def __init__(self, path: Union[str, Path], max_bytes: int = 1_000_000):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                units TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                payload BLOB NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_responses_fetched_at "
+            "ON responses (fetched_at)"
+        )
+        self._conn.commit()
+        (self._bytes,) = self._conn.execute(
+            "SELECT COALESCE(SUM(LENGTH(payload)), 0) FROM responses"
+        ).fetchone()
+
+    def get(self, key: str) -> Optional[Tuple[Dict, str, float]]:
+        """
+        Load a stored response.
+
+        Args:
+            key: Normalized lookup key
+
+        Returns:
+            (data, units, fetched_at) or None if nothing is stored
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, units, fetched_at FROM responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+        if row is None:
+            return None
+        payload, units, fetched_at = row
+        try:
+            data = json.loads(zlib.decompress(payload))
+        except (zlib.error, ValueError):
+            return None
+        return data, units, fetched_at
+
+    def put(self, key: str, data: Dict, units: str, fetched_at: Optional[float] = None):
+        """Store a response, evicting the oldest rows if over ``max_bytes``."""
+        payload = zlib.compress(json.dumps(data, separators=(",", ":")).encode("utf-8"))
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        with self._lock:
+            replaced = self._conn.execute(
+                "SELECT LENGTH(payload) FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, units, fetched_at, payload) "
+                "VALUES (?, ?, ?, ?)",
+                (key, units, fetched_at, payload),
+            )
+            size = self._bytes + len(payload) - (replaced[0] if replaced else 0)
+            size -= self._evict(size)
+            self._conn.commit()
+            self._bytes = size
+
+    def _evict(self, total: int) -> int:
+        """Delete the oldest rows until ``total`` fits ``max_bytes``; returns the bytes freed."""
+        if total <= self.max_bytes:
+            return 0
+        excess = total - self.max_bytes
+        doomed = []
+        freed = 0
+        for key, size in self._conn.execute(
+            "SELECT key, LENGTH(payload) FROM responses ORDER BY fetched_at"
+        ):
+            doomed.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", doomed)
+        return freed
+
+    def size_bytes(self) -> int:
+        """Total size of the stored (compressed) payloads."""
+        return self._bytes
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+            self._bytes = 0
+
+    def close(self):
+        with self._lock:
+            self._conn.close()